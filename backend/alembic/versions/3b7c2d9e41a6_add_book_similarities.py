@@ -0,0 +1,41 @@
+"""add book_similarities and books.content_indexed_at
+
+Revision ID: 3b7c2d9e41a6
+Revises: ef0e0ae7525d
+Create Date: 2026-10-19 10:12:04.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c2d9e41a6'
+down_revision: Union[str, None] = 'ef0e0ae7525d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('content_indexed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_books_content_indexed_at'), 'books', ['content_indexed_at'], unique=False)
+    op.create_table('book_similarities',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('similar_book_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['similar_book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'similar_book_id')
+    )
+    op.create_index('idx_book_similarity_score', 'book_similarities', ['book_id', 'score'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_book_similarity_score', table_name='book_similarities')
+    op.drop_table('book_similarities')
+    op.drop_index(op.f('ix_books_content_indexed_at'), table_name='books')
+    op.drop_column('books', 'content_indexed_at')
@@ -1,6 +1,6 @@
 import math
 import secrets
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from app.core.database import get_db
@@ -21,6 +21,11 @@ from app.schemas.admin import (
     PaginationResponse,
 )
 from app.schemas.base_schema import ApiResponse
+from app.services.recommendation_batch import get_batch_status, is_batch_running, run_batch_in_background
+from app.services.llm_usage import get_daily_usage
+from app.core.metrics import get_counters, get_histograms
+from app.core.circuit_breaker import get_circuit_breaker_stats
+from app.core.bulkhead import get_bulkhead_stats
 
 router = APIRouter()
 
@@ -464,3 +469,58 @@ def delete_user_book(
     db.commit()
 
     return {"message": f"User-book record {user_book_id} has been deleted"}
+
+
+@router.post("/recommendations/batch", status_code=202)
+@log_exceptions("POST /admin/recommendations/batch")
+def trigger_recommendation_batch(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_admin_user),
+):
+    """Start (or resume) the recommendation batch for active users."""
+    if is_batch_running():
+        raise HTTPException(status_code=409, detail="A recommendation batch is already running")
+    background_tasks.add_task(run_batch_in_background)
+    return ApiResponse(data=get_batch_status(), message="Recommendation batch started")
+
+
+@router.get("/recommendations/batch")
+@log_exceptions("GET /admin/recommendations/batch")
+def recommendation_batch_status(current_user: User = Depends(get_admin_user)):
+    """Progress of the current or last recommendation batch."""
+    return ApiResponse(data={"running": is_batch_running(), "checkpoint": get_batch_status()})
+
+
+@router.get("/metrics/llm")
+@log_exceptions("GET /admin/metrics/llm")
+def llm_usage_metrics(
+    days: int = Query(default=7, ge=1, le=90),
+    current_user: User = Depends(get_admin_user),
+):
+    """LLM tokens, estimated cost, latency and cache effectiveness per day.
+
+    ``daily`` is aggregated across workers in Redis (None without Redis);
+    ``process`` is this worker's counters since it started.
+    """
+    counters = {name: value for name, value in get_counters().items() if name.startswith("llm.")}
+    histograms = {name: h for name, h in get_histograms().items() if name.startswith("llm.")}
+    return ApiResponse(data={
+        "daily": get_daily_usage(days),
+        "process": {"counters": counters, "histograms": histograms},
+    })
+
+
+@router.get("/metrics/circuit-breakers")
+@log_exceptions("GET /admin/metrics/circuit-breakers")
+def circuit_breaker_metrics(current_user: User = Depends(get_admin_user)):
+    """State of each circuit breaker and this worker's rolling call window
+    (call count, failure and slow-call rates, latency percentiles)."""
+    return ApiResponse(data=get_circuit_breaker_stats())
+
+
+@router.get("/metrics/bulkheads")
+@log_exceptions("GET /admin/metrics/bulkheads")
+def bulkhead_metrics(current_user: User = Depends(get_admin_user)):
+    """Current adaptive concurrency limit and calls in flight per dependency
+    (this worker)."""
+    return ApiResponse(data=get_bulkhead_stats())
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Form, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.core.database import get_db
-from app.services.user_service import UserService
+from app.core.database import get_async_db
+from app.core.offload import PASSWORD_POOL, run_in_pool
+from app.services.user_service import AsyncUserService, UserService
 from .users import get_user_service
-from app.core.security import verify_password, create_access_token, create_activation_token, verify_activation_token
+from app.core.security import hash_password, verify_password, create_access_token, create_activation_token, verify_activation_token
 from app.core.config import settings, is_testing
 from app.schemas.user import UserCreate
 from app.schemas.base_schema import ApiResponse
@@ -21,13 +23,16 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 async def login_for_access_token(
     background_tasks: BackgroundTasks,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user_service = UserService(db)
-    user = user_service.get_user_by_email(form_data.username)
+    user = await AsyncUserService(db).get_user_by_email(form_data.username)
+    # End the read transaction so the connection goes back to the pool
+    # instead of sitting idle while bcrypt runs
+    await db.commit()
 
-    if not user or not verify_password(form_data.password, user.password):
+    # bcrypt takes ~250 ms of CPU; keep it off the event loop
+    if not user or not await run_in_pool(PASSWORD_POOL, verify_password, form_data.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not user.is_active:
@@ -75,7 +80,7 @@ async def signup(
     user_service: UserService = Depends(get_user_service),
 ):
     """Signup a new user and send activation email (Public Endpoint)"""
-    existing_user = user_service.get_by_email(email)
+    existing_user = await run_in_threadpool(user_service.get_by_email, email)
 
     if existing_user and not existing_user.is_active:
         activation_token = create_activation_token(existing_user.email)
@@ -92,7 +97,12 @@ async def signup(
         raise HTTPException(status_code=409, detail="Email already registered")
 
 
-    user_obj = user_service.create(UserCreate(name=name, email=email, password=password))
+    # Only bcrypt runs on the password pool; the session stays on the
+    # threadpool side, like the lookup above
+    hashed_password = await run_in_pool(PASSWORD_POOL, hash_password, password)
+    user_obj = await run_in_threadpool(
+        user_service.create, UserCreate(name=name, email=email, password=password), hashed_password
+    )
 
     activation_token = create_activation_token(user_obj.email)
     activation_link = f"{settings.BACKEND_URL}/auth/activate?token={activation_token}"
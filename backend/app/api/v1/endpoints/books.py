@@ -1,25 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.book_service import BookService
+from app.core.database import get_async_db, get_db
+from app.services.book_service import AsyncBookService, BookService
 from app.services.user_book_service import UserBookService
 from app.services.review_service import ReviewService
 from app.schemas.base_schema import ApiResponse, PaginationResponse
-from app.schemas.book import BookCreate, BookResponse
+from app.schemas.book import BookCreate, BookResponse, SimilarBookResponse
 from app.schemas.user_book import serialize_user_book
 from app.schemas.review import ReviewResponse
 from app.core.security import get_current_user
 from app.models.user import User
 from app.core.logging_decorator import log_exceptions
 from app.core.config import settings
-from app.core.rate_limiter import RateLimiter
+from app.core.rate_limiter import HybridRateLimiter, RateLimiter
 from app.core.redis import get_redis
-from app.core.circuit_breaker import CircuitBreaker
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.bulkhead import get_google_books_bulkhead
+from app.services.content_similarity import get_similar_books
+from app.services import google_books
 
 import re, html, requests, os
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 logger = logging.getLogger(__name__)
 
@@ -58,12 +62,12 @@ def set_cached_popular_books(max_results: int, data: list):
     logger.info(f"Cached popular books with max_results={max_results}, data_count={len(data)}")
 
 def _get_google_books_circuit_breaker() -> CircuitBreaker:
-    """Return a CircuitBreaker instance for Google Books API."""
-    return CircuitBreaker(
-        name="google_books",
+    """Return the shared CircuitBreaker for Google Books API."""
+    return get_circuit_breaker(
+        "google_books",
         failure_threshold=settings.CB_GOOGLE_FAILURE_THRESHOLD,
         recovery_timeout=settings.CB_GOOGLE_RECOVERY_TIMEOUT,
-        redis_client=get_redis(),
+        slow_call_duration=settings.CB_GOOGLE_SLOW_CALL_SECONDS,
     )
 
 
@@ -72,6 +76,11 @@ def get_book_service(
 ) -> BookService:
     return BookService(db)
 
+def get_async_book_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncBookService:
+    return AsyncBookService(db)
+
 def get_book_service_auth(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -91,14 +100,33 @@ def get_user_book_service(
     return UserBookService(db)
 
 
+_search_limiter: Optional[HybridRateLimiter] = None
+
+
+def _get_search_limiter():
+    """Per-worker hybrid limiter (shared buckets), or a per-request Redis limiter."""
+    global _search_limiter
+    if settings.SEARCH_RATE_LIMIT_MODE != "hybrid":
+        return RateLimiter(
+            redis_client=get_redis(),
+            max_requests=settings.SEARCH_RATE_LIMIT,
+            window_seconds=settings.SEARCH_RATE_LIMIT_WINDOW,
+            mode=settings.SEARCH_RATE_LIMIT_MODE,
+        )
+    if _search_limiter is None:
+        _search_limiter = HybridRateLimiter(
+            redis_factory=get_redis,
+            max_requests=settings.SEARCH_RATE_LIMIT,
+            window_seconds=settings.SEARCH_RATE_LIMIT_WINDOW,
+            sync_interval=settings.SEARCH_RATE_LIMIT_SYNC_INTERVAL,
+            local_share=settings.SEARCH_RATE_LIMIT_LOCAL_SHARE,
+        )
+    return _search_limiter
+
+
 def check_search_rate_limit(request: Request) -> None:
     """FastAPI dependency that enforces per-user rate limiting on search endpoints."""
-    redis_client = get_redis()
-    limiter = RateLimiter(
-        redis_client=redis_client,
-        max_requests=settings.SEARCH_RATE_LIMIT,
-        window_seconds=settings.SEARCH_RATE_LIMIT_WINDOW,
-    )
+    limiter = _get_search_limiter()
 
     # Identify by user ID if authenticated, otherwise by IP
     identifier = str(request.client.host) if request.client else "unknown"
@@ -121,15 +149,15 @@ def create(book: BookCreate, book_service: BookService = Depends(get_book_servic
 
 @router.get("/", response_model=PaginationResponse[BookResponse])
 @log_exceptions("GET /books", log_response=False)
-def index(
+async def index(
     search: str = Query(default=None, description="Search books by title or author"),
     genre: str = Query(default=None, description="Filter by genre"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
-    book_service: BookService = Depends(get_book_service)
+    book_service: AsyncBookService = Depends(get_async_book_service)
 ):
     try:
-        books, total_count, total_pages, current_page = book_service.filter_books_paginated(
+        books, total_count, total_pages, current_page = await book_service.filter_books_paginated(
             page=page, page_size=page_size, search=search, genre=genre
         )
         pagination_info = {
@@ -162,15 +190,22 @@ def search_external_books(
 ):
     """
     Search for books using the Google Books API and return normalized results.
-    Falls back to local database search when the Google Books circuit breaker is open.
+    Falls back to local database search when the Google Books circuit breaker is open
+    or too many Google Books calls are already in flight.
     """
     cb = _get_google_books_circuit_breaker()
 
-    if not cb.is_call_permitted():
+    if not cb.acquire_probe():
         # Circuit is open – fall back to local database search
         logger.warning("Google Books circuit open, falling back to local search")
         return _search_local_books(q, max_results, page, db)
 
+    bulkhead = get_google_books_bulkhead()
+    if not bulkhead.try_acquire():
+        cb.release_probe()
+        logger.warning("Too many Google Books calls in flight, falling back to local search")
+        return _search_local_books(q, max_results, page, db)
+
     GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
     GOOGLE_BOOKS_API_KEY = os.getenv("GOOGLE_BOOKS_API_KEY")
 
@@ -185,10 +220,11 @@ def search_external_books(
     if GOOGLE_BOOKS_API_KEY:
         params["key"] = GOOGLE_BOOKS_API_KEY
 
+    started = time.monotonic()
     try:
-        resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        with bulkhead.held():
+            data = google_books.get_json(GOOGLE_BOOKS_API_URL, params)
+        elapsed = time.monotonic() - started
 
         books = []
         for item in data.get("items", []):
@@ -219,7 +255,7 @@ def search_external_books(
             "end_index": start_index + len(books)
         }
 
-        cb.record_success()
+        cb.record_success(elapsed)
 
         return PaginationResponse(
             data=books,
@@ -229,11 +265,14 @@ def search_external_books(
         )
 
     except requests.RequestException as e:
-        cb.record_failure()
+        cb.record_failure(time.monotonic() - started)
         error_msg = str(e)
         if GOOGLE_BOOKS_API_KEY and GOOGLE_BOOKS_API_KEY in error_msg:
             error_msg = error_msg.replace(GOOGLE_BOOKS_API_KEY, "[REDACTED]")
         raise HTTPException(status_code=502, detail=f"Google Books API error: {error_msg}")
+    finally:
+        # No-op once the outcome was recorded; frees the probe on other errors
+        cb.release_probe()
 
 def _search_local_books(q: str, max_results: int, page: int, db: Session) -> PaginationResponse:
     """Search the local books table by title/author ILIKE and return in the same format."""
@@ -302,15 +341,20 @@ def get_book_by_external_id(
     if GOOGLE_BOOKS_API_KEY:
         params["key"] = GOOGLE_BOOKS_API_KEY
 
-    if not cb.is_call_permitted():
+    if not cb.acquire_probe():
         raise HTTPException(status_code=502, detail="Google Books API is temporarily unavailable")
 
+    bulkhead = get_google_books_bulkhead()
+    if not bulkhead.try_acquire():
+        cb.release_probe()
+        raise HTTPException(status_code=503, detail="Google Books API is busy, try again shortly")
+
+    started = time.monotonic()
     try:
-        resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        item = resp.json()
+        with bulkhead.held():
+            item = google_books.get_json(GOOGLE_BOOKS_API_URL, params)
 
-        cb.record_success()
+        cb.record_success(time.monotonic() - started)
 
         user_book = user_book_service.get_by_external_book(external_id)
 
@@ -353,8 +397,10 @@ def get_book_by_external_id(
         }
 
     except requests.RequestException as e:
-        cb.record_failure()
+        cb.record_failure(time.monotonic() - started)
         raise HTTPException(status_code=502, detail=f"Google Books API error: {str(e)}")
+    finally:
+        cb.release_probe()
 
 @router.get("/popular", response_model=PaginationResponse)
 @log_exceptions("GET /books/popular", log_response=False)
@@ -410,6 +456,7 @@ def get_popular_books(
 
     all_books = []
     books_per_query = max(2, max_results // len(popular_queries))
+    bulkhead = get_google_books_bulkhead()
 
     for query in popular_queries:
         params = {
@@ -420,10 +467,13 @@ def get_popular_books(
         if GOOGLE_BOOKS_API_KEY:
             params["key"] = GOOGLE_BOOKS_API_KEY
 
+        if not bulkhead.try_acquire():
+            logger.warning(f"Too many Google Books calls in flight, skipping popular query '{query}'")
+            continue
+
         try:
-            resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
+            with bulkhead.held():
+                data = google_books.get_json(GOOGLE_BOOKS_API_URL, params)
 
             for item in data.get("items", []):
                 info = item.get("volumeInfo", {})
@@ -448,7 +498,7 @@ def get_popular_books(
                         break
 
         except requests.RequestException as e:
-            print(f"Error fetching books for query '{query}': {str(e)}")
+            logger.warning(f"Error fetching popular books for query '{query}': {e}")
             continue
 
     final_books = all_books[:max_results]
@@ -527,6 +577,28 @@ def clear_popular_books_cache():
         "status": "ok"
     }
 
+@router.get("/{book_id}/similar", response_model=ApiResponse[List[SimilarBookResponse]])
+@log_exceptions("GET /books/{book_id}/similar", log_response=False)
+def get_similar(
+    book_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of similar books"),
+    book_service: BookService = Depends(get_book_service_auth),
+):
+    """Return books with the most similar content (title, genres, description).
+
+    Books added since the last content-index rebuild have no stored
+    neighbors yet; they are answered from the approximate (LSH) index.
+    """
+    similar = get_similar_books(book_service.db, book_id, limit=limit)
+    if not similar:
+        book = book_service.get_by_id(book_id)
+        if not book:
+            raise HTTPException(status_code=404, detail="Book not found")
+        from app.services.ann_index import get_approximate_similar_books  # deferred: pulls in numpy
+
+        similar = get_approximate_similar_books(book_service.db, book, limit=limit)
+    return ApiResponse(data=[SimilarBookResponse.from_orm_with_score(b, score) for b, score in similar])
+
 @router.get("/{book_id}", response_model=ApiResponse[BookResponse])
 @log_exceptions("GET /books/{book_id}", log_response=False)
 def get(book_id: int, book_service: BookService = Depends(get_book_service_auth)):
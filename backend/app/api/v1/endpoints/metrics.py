@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import render_prometheus
+
+router = APIRouter()
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """This worker's counters and histograms in the Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
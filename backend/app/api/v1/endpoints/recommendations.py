@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
 from app.models.review import Review
-from app.services.recommendation_service import generate_book_recommendations, create_book_recommendation_graph
+from app.services.recommendation_service import (
+    generate_book_recommendations,
+    create_book_recommendation_graph,
+    explain_recommendations,
+)
+from app.services.collaborative_filtering import recommend_for_user
+from app.services.candidate_pools import get_user_genres, top_rated_in_genres
+from app.services.llm_provider import LLMBusyError, LLMTimeoutError
 from app.schemas.base_schema import ApiResponse
 from app.core.security import get_current_user
 from app.core.logging_decorator import log_exceptions
@@ -13,6 +20,9 @@ router = APIRouter()
 @router.get("/")
 @log_exceptions("GET /recommendations")
 def get_recommendations(
+        strategy: str = Query("local", pattern="^(local|llm)$", description="local: item-item CF (no external calls); llm: OpenAI over precomputed candidate pools"),
+        explain: bool = Query(False, description="With strategy=local, ask the LLM to explain each recommendation"),
+        limit: int = Query(5, ge=1, le=20),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
     ):
@@ -23,7 +33,35 @@ def get_recommendations(
     from app.schemas.review import ReviewResponse
     user_reviews_pydantic = [ReviewResponse.model_validate(r) for r in user_reviews]
 
-    recommendations = generate_book_recommendations(user_reviews_pydantic)
+    if strategy == "local":
+        local_recommendations = recommend_for_user(db, current_user.id, limit=limit)
+        message = "Success" if local_recommendations else "Not enough reading activity yet to recommend books."
+        if explain and local_recommendations:
+            explained = explain_recommendations(user_reviews_pydantic, local_recommendations)
+            if explained is None:
+                message = "AI explanations are temporarily unavailable."
+            else:
+                local_recommendations = explained
+        return ApiResponse(
+            data={"strategy": "local", "recommendations": local_recommendations},
+            message=message,
+        )
+
+    user_genres = get_user_genres(db, [r.book_id for r in user_reviews if r.rate >= 3])
+    try:
+        recommendations = generate_book_recommendations(user_reviews_pydantic, user_genres)
+    except LLMTimeoutError as e:
+        # Deadline passed or too many calls in flight: answer from the
+        # catalog instead of making the user wait
+        read_book_ids = {r.book_id for r in user_reviews if r.book_id}
+        reason = "are busy" if isinstance(e, LLMBusyError) else "took too long"
+        return ApiResponse(
+            data={
+                "strategy": "local",
+                "recommendations": top_rated_in_genres(db, user_genres, read_book_ids, limit=limit),
+            },
+            message=f"AI recommendations {reason}; showing top-rated books in your genres.",
+        )
 
     if recommendations is None:
         return ApiResponse(
@@ -32,16 +70,29 @@ def get_recommendations(
             status="ok",
         )
 
-    return ApiResponse(data=recommendations)
+    if not recommendations:
+        message = (
+            "Could not generate recommendations right now. Please try again shortly."
+            if any(r.rate >= 3 for r in user_reviews)
+            else "No positive reviews found. Please rate some books you enjoyed to get better recommendations."
+        )
+    else:
+        message = "Success"
+    return ApiResponse(
+        data={"strategy": "llm", "recommendations": recommendations},
+        message=message,
+    )
 
 @router.get("/graph")
 @log_exceptions("GET /recommendations/graph")
 def get_recommendation_graph(
+        compact: bool = Query(False, description="Send style classes once in a legend instead of per node/edge"),
+        columnar: bool = Query(False, description="With compact, send node positions and edges as parallel arrays"),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
     ):
     """Get recommendation graph data with similarity vertices."""
     print(f"🔍 GET /recommendations/graph called for user {current_user.id} ({current_user.name})")
-    graph_data = create_book_recommendation_graph(db, current_user.id)
+    graph_data = create_book_recommendation_graph(db, current_user.id, compact=compact, columnar=columnar)
     print(f"📊 Graph generated: {len(graph_data.get('nodes', []))} nodes, {len(graph_data.get('edges', []))} edges")
     return ApiResponse(data=graph_data)
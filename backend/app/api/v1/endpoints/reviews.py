@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.review_service import ReviewService
+from app.core.database import get_async_db, get_db
+from app.services.review_service import AsyncReviewService, ReviewService
 from app.schemas.base_schema import ApiResponse, PaginationResponse
 from app.core.security import get_current_user
 from app.models.user import User
@@ -25,6 +26,14 @@ def get_review_service(
     return ReviewService(db)
 
 
+def get_async_review_service(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> AsyncReviewService:
+    """Inject AsyncReviewService, requiring authenticated user."""
+    return AsyncReviewService(db)
+
+
 def _build_pagination(
     page: int, page_size: int, total_count: int
 ) -> dict:
@@ -102,7 +111,7 @@ def get(review_id: int, review_service: ReviewService = Depends(get_review_servi
 
 @router.get("/book/{book_id}", response_model=PaginationResponse[ReviewResponse])
 @log_exceptions("GET /reviews/book/{book_id}")
-def get_by_book(
+async def get_by_book(
     book_id: int,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(
@@ -110,11 +119,11 @@ def get_by_book(
         ge=1,
         description="Number of items per page (clamped to MAX_PAGE_SIZE)",
     ),
-    review_service: ReviewService = Depends(get_review_service),
+    review_service: AsyncReviewService = Depends(get_async_review_service),
 ):
     """Paginated reviews for a local book."""
     page_size = min(page_size, settings.MAX_PAGE_SIZE)
-    rows, total_count = review_service.get_by_book_with_user_paginated(
+    rows, total_count = await review_service.get_by_book_with_user_paginated(
         book_id, page=page, page_size=page_size
     )
     return PaginationResponse(
@@ -127,7 +136,7 @@ def get_by_book(
 
 @router.get("/book/external/{book_id}", response_model=PaginationResponse[ReviewResponse])
 @log_exceptions("GET /reviews/book/external/{book_id}")
-def get_by_external_book(
+async def get_by_external_book(
     book_id: str,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(
@@ -135,11 +144,11 @@ def get_by_external_book(
         ge=1,
         description="Number of items per page (clamped to MAX_PAGE_SIZE)",
     ),
-    review_service: ReviewService = Depends(get_review_service),
+    review_service: AsyncReviewService = Depends(get_async_review_service),
 ):
     """Paginated reviews for an external (Google Books) book."""
     page_size = min(page_size, settings.MAX_PAGE_SIZE)
-    rows, total_count = review_service.get_by_external_book_with_user_paginated(
+    rows, total_count = await review_service.get_by_external_book_with_user_paginated(
         book_id, page=page, page_size=page_size
     )
     return PaginationResponse(
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.user_book_service import UserBookService
+from app.core.database import get_async_db, get_db
+from app.services.user_book_service import AsyncUserBookService, UserBookService
 from app.services.book_service import BookService
 from app.schemas.base_schema import ApiResponse, PaginationResponse
 from app.core.security import get_current_user
@@ -17,6 +18,9 @@ router = APIRouter()
 def get_user_book_service(db: Session = Depends(get_db)) -> UserBookService:
     return UserBookService(db)
 
+def get_async_user_book_service(db: AsyncSession = Depends(get_async_db)) -> AsyncUserBookService:
+    return AsyncUserBookService(db)
+
 def get_book_service(db: Session = Depends(get_db)) -> BookService:
     return BookService(db)
 
@@ -79,9 +83,9 @@ def create(
 
 @router.get("/my-books", response_model=PaginationResponse[UserBookResponse])
 @log_exceptions("GET /user-books/my-books")
-def get_my_books(
+async def get_my_books(
     current_user: User = Depends(get_current_user),
-    user_book_service: UserBookService = Depends(get_user_book_service),
+    user_book_service: AsyncUserBookService = Depends(get_async_user_book_service),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(
         settings.DEFAULT_PAGE_SIZE,
@@ -92,7 +96,7 @@ def get_my_books(
 ):
     """Get paginated books in the user's library, optionally filtered by status."""
     page_size = min(page_size, settings.MAX_PAGE_SIZE)
-    books, total_count, total_pages, current_page = user_book_service.get_books_by_user_paginated(
+    books, total_count, total_pages, current_page = await user_book_service.get_books_by_user_paginated(
         current_user.id, page=page, page_size=page_size, status=status
     )
     pagination_info = {
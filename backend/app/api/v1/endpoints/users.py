@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.user_service import UserService
@@ -63,7 +64,7 @@ def index(
     )
 
 @router.get("/me", response_model=ApiResponse[MeResponse])
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     """Get details of the logged-in user (Protected Route)"""
     is_admin = current_user.email.strip().lower() in settings.ADMIN_EMAILS
     me = MeResponse(**UserResponse.model_validate(current_user).model_dump(), is_admin=is_admin)
@@ -107,7 +108,7 @@ async def upload_profile_picture(
         
         # Update user profile with the new picture filename
         profile_data = UserProfileUpdate(profile_picture=filename)
-        updated_user = user_service.update_profile(int(current_user.id), profile_data)
+        updated_user = await run_in_threadpool(user_service.update_profile, int(current_user.id), profile_data)
         
         return ApiResponse(data=UserResponse.model_validate(updated_user))
     except Exception as e:
@@ -0,0 +1,171 @@
+"""Adaptive concurrency limits (bulkheads) for outbound calls.
+
+Every call to an external API holds a request thread until it returns.
+Without a cap, a slow dependency can absorb the whole thread pool and
+unrelated endpoints queue behind it.  A bulkhead caps the calls in flight
+per dependency; callers over the cap are rejected immediately and serve
+their fallback (local search, cached data) instead of waiting.
+
+The cap adapts to observed latency (AIMD, as in TCP congestion control):
+
+- a call slower than *latency_target* or failed shrinks the limit by
+  *backoff_ratio*, at most once per *latency_target* so one burst of
+  slow completions does not collapse it;
+- a fast call while at least half the limit is in use grows it by
+  ``1 / limit``, i.e. by about one per limit's worth of calls.
+
+The limit stays within [*min_limit*, *max_limit*].  Limits are per worker
+process; the circuit breaker remains the cluster-wide signal.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import increment
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBulkhead:
+    """Non-blocking, latency-adaptive cap on concurrent calls to one dependency.
+
+    Usage::
+
+        if not bulkhead.try_acquire():
+            return fallback()
+        with bulkhead.held():
+            response = call()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        latency_target: float,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        backoff_ratio: float = 0.9,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(max_limit if initial_limit is None else initial_limit)
+        self._in_flight = 0
+        self._next_decrease_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free; never waits."""
+        with self._lock:
+            if self._in_flight >= self.limit:
+                rejected = True
+            else:
+                self._in_flight += 1
+                rejected = False
+        if rejected:
+            increment(f"bulkhead.{self.name}.rejected")
+            logger.warning(f"Bulkhead({self.name}) full at {self.limit} calls in flight, rejecting")
+            return False
+        return True
+
+    def release(self, duration: float, failed: bool = False) -> None:
+        """Return a slot and adjust the limit from the call's outcome."""
+        now = time.monotonic()
+        with self._lock:
+            in_flight = self._in_flight
+            self._in_flight = max(0, in_flight - 1)
+            if failed or duration > self.latency_target:
+                if now >= self._next_decrease_at:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                    self._next_decrease_at = now + self.latency_target
+            elif in_flight * 2 >= self._limit:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+    @contextmanager
+    def held(self) -> Iterator[None]:
+        """Time the block and release the slot taken by ``try_acquire``.
+
+        The call counts as failed if the block raises.  An exception carrying
+        a ``running_call`` future (a call the caller gave up on but that is
+        still running on a worker thread, see ``LLMTimeoutError``) keeps the
+        slot until that call actually finishes.
+        """
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            running_call = getattr(e, "running_call", None)
+            if running_call is None:
+                self.release(time.monotonic() - started, failed=True)
+            else:
+                running_call.add_done_callback(lambda _: self.release(time.monotonic() - started, failed=True))
+            raise
+        self.release(time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_target": self.latency_target,
+        }
+
+
+# ----------------------------------------------------------------------
+# Shared bulkheads
+# ----------------------------------------------------------------------
+
+_bulkheads: Dict[str, AdaptiveBulkhead] = {}
+_bulkheads_lock = threading.Lock()
+
+
+def get_bulkhead(name: str, max_limit: int, latency_target: float) -> AdaptiveBulkhead:
+    """Return the process-wide bulkhead for *name*, creating it on first use."""
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        with _bulkheads_lock:
+            bulkhead = _bulkheads.get(name)
+            if bulkhead is None:
+                bulkhead = AdaptiveBulkhead(
+                    name, max_limit=max_limit, latency_target=latency_target, min_limit=settings.BULKHEAD_MIN_LIMIT
+                )
+                _bulkheads[name] = bulkhead
+    return bulkhead
+
+
+def get_google_books_bulkhead() -> AdaptiveBulkhead:
+    """Return the shared concurrency limit for Google Books API calls."""
+    return get_bulkhead(
+        "google_books",
+        max_limit=settings.GOOGLE_BOOKS_MAX_CONCURRENCY,
+        latency_target=settings.GOOGLE_BOOKS_LATENCY_TARGET,
+    )
+
+
+def get_openai_bulkhead() -> AdaptiveBulkhead:
+    """Return the shared concurrency limit for OpenAI API calls."""
+    return get_bulkhead(
+        "openai",
+        max_limit=settings.OPENAI_MAX_CONCURRENCY,
+        latency_target=settings.OPENAI_LATENCY_TARGET,
+    )
+
+
+def get_bulkhead_stats() -> List[Dict[str, Any]]:
+    """Stats of every bulkhead this process has used."""
+    return [bulkhead.get_stats() for _, bulkhead in sorted(_bulkheads.items())]
@@ -1,10 +1,28 @@
+import json
 import logging
+import threading
 import time
+import uuid
+from collections import deque
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis, report_redis_error
 
 logger = logging.getLogger(__name__)
 
+# Pub/sub channel carrying every state write
+CHANNEL = "circuit_breaker:updates"
+
+# Delete the probe lease only if it still holds the caller's token
+RELEASE_PROBE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 
 class CircuitState(str, Enum):
     CLOSED = "closed"
@@ -12,6 +30,58 @@ class CircuitState(str, Enum):
     HALF_OPEN = "half_open"
 
 
+def _encode(value: Any) -> str:
+    """Hash field value as Redis returns it (``CircuitState`` → its value)."""
+    return value.value if isinstance(value, CircuitState) else str(value)
+
+
+class CallWindow:
+    """Outcomes and durations of the calls made in the last *window_seconds*.
+
+    Kept per process: each worker judges the dependency from the calls it
+    made itself, and a trip opens the shared circuit for everyone.
+    """
+
+    def __init__(self, window_seconds: float, max_calls: int = 10_000):
+        self.window_seconds = window_seconds
+        self._calls: deque = deque(maxlen=max_calls)  # (finished_at, duration, failed)
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def add(self, duration: float, failed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._calls.append((now, duration, failed))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+    def stats(self, slow_call_duration: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(time.monotonic())
+            durations = sorted(duration for _, duration, _ in self._calls)
+            failures = sum(1 for _, _, failed in self._calls if failed)
+        calls = len(durations)
+        slow = sum(1 for d in durations if slow_call_duration is not None and d >= slow_call_duration)
+        return {
+            "window_seconds": self.window_seconds,
+            "calls": calls,
+            "failures": failures,
+            "slow_calls": slow,
+            "failure_rate": round(failures / calls, 3) if calls else None,
+            "slow_call_rate": round(slow / calls, 3) if calls else None,
+            "p50_seconds": round(durations[calls // 2], 3) if calls else None,
+            "p95_seconds": round(durations[min(calls - 1, int(calls * 0.95))], 3) if calls else None,
+            "max_seconds": round(durations[-1], 3) if calls else None,
+        }
+
+
 class CircuitBreaker:
     """Redis-backed circuit breaker with three states: CLOSED, OPEN, HALF_OPEN.
 
@@ -24,6 +94,37 @@ class CircuitBreaker:
     - HALF_OPEN: one probe request is permitted.  Success → CLOSED,
       failure → OPEN.
 
+    Transitions are safe across workers: failures are counted with
+    ``HINCRBY`` and the HALF_OPEN probe is a lease (``SET NX`` with an
+    expiry of *probe_lease* seconds), so exactly one request in the cluster
+    tests recovery.  If the prober dies without reporting, the lease expires
+    and another request probes.  The lease holds a token unique to its
+    holder and is deleted with a compare-and-delete script, so a late
+    outcome reported by another worker never frees someone else's lease.
+
+    Callers check ``state_permits()`` (read-only) to fail fast, then call
+    ``acquire_probe()`` right before the outbound call; that is what takes
+    the lease.  A caller that took it and then skips the call (bulkhead
+    full, deadline passed, ...) must ``release_probe()`` so another request
+    can probe at once.  ``record_success``/``record_failure`` release it too.
+
+    Calls reported with a ``duration`` also feed a rolling ``CallWindow``.
+    Once it holds at least *minimum_calls* calls from the last
+    *window_seconds*, the circuit also opens when *failure_rate_threshold*
+    of them failed, however they were spread among successes.  With
+    *slow_call_duration* set, it opens as well when
+    *slow_call_rate_threshold* of them took that long or longer, even if
+    they succeeded.  A slow HALF_OPEN probe counts as a failed probe.
+
+    The state is cached in-process for *cache_ttl* seconds, so checking a
+    healthy circuit costs no Redis call.  Every write is published on
+    ``CHANNEL``; processes running ``start_circuit_breaker_listener`` apply
+    it to their cached copy straight away, and the TTL bounds how stale a
+    process that misses a message can be.
+
+    Pass *redis_factory* instead of *redis_client* for long-lived breakers
+    (see ``get_circuit_breaker``) so the current client is used on each call.
+
     If Redis is unavailable the breaker *fails open* (permits all calls).
     """
 
@@ -32,53 +133,185 @@ class CircuitBreaker:
         name: str,
         failure_threshold: int,
         recovery_timeout: int,
-        redis_client: Any,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = None,
+        cache_ttl: Optional[float] = None,
+        probe_lease: Optional[int] = None,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate_threshold: Optional[float] = None,
+        failure_rate_threshold: Optional[float] = None,
+        window_seconds: Optional[float] = None,
+        minimum_calls: Optional[int] = None,
     ):
         self.name = name
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
-        self.redis_client = redis_client
+        self._redis_client = redis_client
+        self._redis_factory = redis_factory
+        self.cache_ttl = settings.CB_STATE_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.probe_lease = settings.CB_PROBE_LEASE_SECONDS if probe_lease is None else probe_lease
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = (
+            settings.CB_SLOW_CALL_RATE_THRESHOLD if slow_call_rate_threshold is None else slow_call_rate_threshold
+        )
+        self.failure_rate_threshold = (
+            settings.CB_FAILURE_RATE_THRESHOLD if failure_rate_threshold is None else failure_rate_threshold
+        )
+        self.minimum_calls = settings.CB_MINIMUM_CALLS if minimum_calls is None else minimum_calls
+        self.window = CallWindow(settings.CB_WINDOW_SECONDS if window_seconds is None else window_seconds)
         self._key = f"circuit_breaker:{name}"
+        self._probe_key = f"circuit_breaker:{name}:probe"
+        # (state, fetched_at); replaced as a whole so readers never see a torn pair
+        self._cache: Optional[Tuple[dict, float]] = None
+        # Token of the probe lease held by the current thread, if any
+        self._lease = threading.local()
+
+    @property
+    def redis_client(self) -> Any:
+        if self._redis_factory is not None:
+            return self._redis_factory()
+        return self._redis_client
 
     # ------------------------------------------------------------------
     # State helpers
     # ------------------------------------------------------------------
 
-    def _get_state(self) -> dict:
-        """Read the full circuit state from Redis."""
-        if self.redis_client is None:
+    def _get_state(self, fresh: bool = False) -> dict:
+        """Return the circuit state, from the local cache unless *fresh*."""
+        cached = self._cache
+        if not fresh and cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            return cached[0]
+        redis_client = self.redis_client
+        if redis_client is None:
             return {}
         try:
-            data = self.redis_client.hgetall(self._key)
-            return data if data else {}
+            data = redis_client.hgetall(self._key) or {}
         except Exception as e:
             logger.warning(f"CircuitBreaker({self.name}) Redis read error, failing open: {e}")
+            report_redis_error(e)
             return {}
+        self._cache = (data, time.monotonic())
+        return data
 
-    def _set_state(self, state: str, failure_count: int, last_failure_time: float) -> None:
-        if self.redis_client is None:
-            return
-        try:
-            self.redis_client.hset(
-                self._key,
-                mapping={
-                    "state": state,
-                    "failure_count": str(failure_count),
-                    "last_failure_time": str(last_failure_time),
-                },
-            )
-        except Exception as e:
-            logger.warning(f"CircuitBreaker({self.name}) Redis write error: {e}")
+    def _write(
+        self,
+        redis_client: Any,
+        fields: dict,
+        release_probe: bool = False,
+        known: Optional[dict] = None,
+    ) -> None:
+        """Set *fields* on the circuit hash, update the cache and publish.
+
+        Only *fields* are written, so concurrent updates to other fields by
+        other workers survive.  *known* holds values already current in
+        Redis (e.g. an ``HINCRBY`` result) for the cache and the message.
+        """
+        fields = {name: _encode(value) for name, value in fields.items()}
+        cached = self._cache[0] if self._cache is not None else {}
+        data = {**cached, **{name: _encode(value) for name, value in (known or {}).items()}, **fields}
+        self._cache = (data, time.monotonic())
+        redis_client.hset(self._key, mapping=fields)
+        if release_probe:
+            self.release_probe()
+        redis_client.publish(CHANNEL, json.dumps({"name": self.name, **data}))
+
+    def _acquire_probe(self, redis_client: Any, state: str) -> bool:
+        """Try to take the cluster-wide HALF_OPEN probe lease."""
+        token = uuid.uuid4().hex
+        if not redis_client.set(self._probe_key, token, nx=True, ex=self.probe_lease):
+            return False
+        self._lease.token = token
+        if state != CircuitState.HALF_OPEN:
+            logger.info(f"CircuitBreaker({self.name}): OPEN → HALF_OPEN")
+            self._write(redis_client, {"state": CircuitState.HALF_OPEN})
+        return True
+
+    def _is_slow(self, duration: Optional[float]) -> bool:
+        return duration is not None and self.slow_call_duration is not None and duration >= self.slow_call_duration
+
+    def _rate_exceeded(self) -> Optional[str]:
+        """Why the window's failure or slow-call rate should open the circuit, else None."""
+        stats = self.window.stats(self.slow_call_duration)
+        if not stats["calls"] or stats["calls"] < self.minimum_calls:
+            return None
+        if stats["failure_rate"] >= self.failure_rate_threshold:
+            return f"{stats['failure_rate']:.0%} of calls failed"
+        if self.slow_call_duration is not None and stats["slow_call_rate"] >= self.slow_call_rate_threshold:
+            return f"{stats['slow_call_rate']:.0%} of calls slower than {self.slow_call_duration}s"
+        return None
+
+    def _observe(self, duration: float, failed: bool) -> bool:
+        """Add a call to the window; open the circuit if failures or slow calls dominate.
+
+        Returns True if the circuit was opened.
+        """
+        self.window.add(duration, failed)
+        if self._get_state().get("state", CircuitState.CLOSED) != CircuitState.CLOSED:
+            return False
+        reason = self._rate_exceeded()
+        if reason is None:
+            return False
+        redis_client = self.redis_client
+        if redis_client is None:
+            return False
+        logger.info(f"CircuitBreaker({self.name}): CLOSED → OPEN ({reason})")
+        self._write(
+            redis_client,
+            {"state": CircuitState.OPEN, "last_failure_time": time.time()},
+            release_probe=True,
+        )
+        # Judge the dependency afresh once the circuit closes again
+        self.window.clear()
+        return True
+
+    def apply_update(self, data: dict) -> None:
+        """Replace the cached state with one published by another process."""
+        self._cache = (data, time.monotonic())
+
+    def invalidate(self) -> None:
+        """Drop the cached state so the next check reads Redis."""
+        self._cache = None
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    def is_call_permitted(self) -> bool:
-        """Return True if a call should be attempted."""
-        if self.redis_client is None:
+    def state_permits(self) -> bool:
+        """Return True if the circuit would let a call through, without claiming it.
+
+        Cheap enough to check before doing any work for a call: no lease is
+        taken, so a True here must still be followed by ``acquire_probe()``.
+        """
+        try:
+            data = self._get_state()
+            state = data.get("state", CircuitState.CLOSED)
+
+            if state == CircuitState.OPEN:
+                last_failure = float(data.get("last_failure_time", 0))
+                if time.time() - last_failure < self.recovery_timeout:
+                    return False
+
+            if state in (CircuitState.OPEN, CircuitState.HALF_OPEN):
+                redis_client = self.redis_client
+                if redis_client is None:
+                    return True
+                return not redis_client.exists(self._probe_key)
+
+            return True
+
+        except Exception as e:
+            logger.warning(f"CircuitBreaker({self.name}) state_permits error, failing open: {e}")
+            report_redis_error(e)
             return True
 
+    def acquire_probe(self) -> bool:
+        """Claim the call about to be made; return False if it must not be made.
+
+        CLOSED permits every call.  Once the recovery timeout has passed
+        (OPEN) or in HALF_OPEN, this takes the cluster-wide probe lease, so
+        call it immediately before the outbound call and release the lease
+        with ``release_probe()`` on any path that then skips the call.
+        """
         try:
             data = self._get_state()
             state = data.get("state", CircuitState.CLOSED)
@@ -88,73 +321,233 @@ class CircuitBreaker:
 
             if state == CircuitState.OPEN:
                 last_failure = float(data.get("last_failure_time", 0))
-                if time.time() - last_failure >= self.recovery_timeout:
-                    # Transition to HALF_OPEN – allow one probe
-                    logger.info(f"CircuitBreaker({self.name}): OPEN → HALF_OPEN")
-                    self._set_state(
-                        CircuitState.HALF_OPEN,
-                        int(data.get("failure_count", 0)),
-                        last_failure,
-                    )
-                    return True
-                return False
+                if time.time() - last_failure < self.recovery_timeout:
+                    return False
 
-            if state == CircuitState.HALF_OPEN:
-                # Allow one probe request
-                return True
+            if state in (CircuitState.OPEN, CircuitState.HALF_OPEN):
+                redis_client = self.redis_client
+                if redis_client is None:
+                    return True
+                return self._acquire_probe(redis_client, state)
 
             return True  # unknown state → fail open
 
         except Exception as e:
-            logger.warning(f"CircuitBreaker({self.name}) is_call_permitted error, failing open: {e}")
+            logger.warning(f"CircuitBreaker({self.name}) acquire_probe error, failing open: {e}")
+            report_redis_error(e)
             return True
 
-    def record_success(self) -> None:
-        """Record a successful call. Resets failure count; HALF_OPEN → CLOSED."""
-        if self.redis_client is None:
+    # Check and claim in one step, for a call made straight away
+    is_call_permitted = acquire_probe
+
+    def release_probe(self) -> None:
+        """Give back the probe lease if this thread holds it.
+
+        Called after a skipped call and after the outcome was recorded; a
+        lease that expired and was taken by another request is left alone.
+        """
+        token = getattr(self._lease, "token", None)
+        if token is None:
             return
+        self._lease.token = None
+        redis_client = self.redis_client
+        if redis_client is None:
+            return
+        try:
+            redis_client.register_script(RELEASE_PROBE_SCRIPT)(keys=[self._probe_key], args=[token])
+        except Exception as e:
+            logger.warning(f"CircuitBreaker({self.name}) release_probe error: {e}")
+            report_redis_error(e)
 
+    def record_success(self, duration: Optional[float] = None) -> None:
+        """Record a successful call. Resets failure count; HALF_OPEN → CLOSED.
+
+        Writes nothing when the circuit is already CLOSED with no failures,
+        which is the common case.  *duration* (seconds) feeds the slow-call
+        window.
+        """
         try:
             data = self._get_state()
             old_state = data.get("state", CircuitState.CLOSED)
 
+            if old_state == CircuitState.HALF_OPEN and self._is_slow(duration):
+                logger.info(f"CircuitBreaker({self.name}): probe took {duration:.2f}s, still slow")
+                self.record_failure(duration)
+                return
+            if duration is not None and self._observe(duration, failed=False):
+                return
+
+            if old_state == CircuitState.CLOSED and int(data.get("failure_count", 0)) == 0:
+                self.release_probe()
+                return
+
+            redis_client = self.redis_client
+            if redis_client is None:
+                return
             if old_state == CircuitState.HALF_OPEN:
                 logger.info(f"CircuitBreaker({self.name}): HALF_OPEN → CLOSED")
 
-            self._set_state(CircuitState.CLOSED, 0, 0)
+            self._write(
+                redis_client,
+                {"state": CircuitState.CLOSED, "failure_count": 0, "last_failure_time": 0},
+                release_probe=True,
+            )
 
         except Exception as e:
             logger.warning(f"CircuitBreaker({self.name}) record_success error: {e}")
+            report_redis_error(e)
 
-    def record_failure(self) -> None:
+    def record_failure(self, duration: Optional[float] = None) -> None:
         """Record a failed call.
 
         - CLOSED: increment failure count; open circuit if threshold reached.
         - HALF_OPEN: immediately transition back to OPEN.
+        - OPEN: only count it.  A straggler that started before the circuit
+          opened must not restart the recovery timeout.
         """
-        if self.redis_client is None:
-            return
-
         try:
-            data = self._get_state()
-            old_state = data.get("state", CircuitState.CLOSED)
-            failure_count = int(data.get("failure_count", 0)) + 1
+            if duration is not None and self._observe(duration, failed=True):
+                return
+            redis_client = self.redis_client
+            if redis_client is None:
+                return
+            failure_count = int(redis_client.hincrby(self._key, "failure_count", 1))
+            old_state = redis_client.hget(self._key, "state") or CircuitState.CLOSED
             now = time.time()
 
-            if old_state == CircuitState.HALF_OPEN:
-                logger.info(f"CircuitBreaker({self.name}): HALF_OPEN → OPEN")
-                self._set_state(CircuitState.OPEN, failure_count, now)
+            if old_state == CircuitState.OPEN:
+                self.release_probe()
                 return
 
-            if failure_count >= self.failure_threshold:
+            if old_state == CircuitState.HALF_OPEN:
+                logger.info(f"CircuitBreaker({self.name}): HALF_OPEN → OPEN")
+            elif failure_count >= self.failure_threshold:
                 logger.info(f"CircuitBreaker({self.name}): CLOSED → OPEN (failures={failure_count})")
-                self._set_state(CircuitState.OPEN, failure_count, now)
             else:
-                self._set_state(
-                    old_state if old_state else CircuitState.CLOSED,
-                    failure_count,
-                    now,
+                self._write(
+                    redis_client,
+                    {"last_failure_time": now},
+                    known={"state": old_state, "failure_count": failure_count},
                 )
+                self.release_probe()
+                return
+
+            self._write(
+                redis_client,
+                {"state": CircuitState.OPEN, "last_failure_time": now},
+                release_probe=True,
+                known={"failure_count": failure_count},
+            )
 
         except Exception as e:
             logger.warning(f"CircuitBreaker({self.name}) record_failure error: {e}")
+            report_redis_error(e)
+
+    def record_slow_call(self, duration: Optional[float] = None) -> None:
+        """Record a call abandoned at its deadline.
+
+        A caller that gave up on a dependency is as badly served as one that
+        got an error, so slow calls count towards opening the circuit.
+        """
+        logger.info(f"CircuitBreaker({self.name}): call exceeded its deadline")
+        self.record_failure(duration)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """State, thresholds and this worker's call window, for monitoring."""
+        data = self._get_state()
+        return {
+            "name": self.name,
+            "state": data.get("state", CircuitState.CLOSED),
+            "failure_count": int(data.get("failure_count", 0)),
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "slow_call_duration": self.slow_call_duration,
+            "slow_call_rate_threshold": self.slow_call_rate_threshold,
+            "failure_rate_threshold": self.failure_rate_threshold,
+            "minimum_calls": self.minimum_calls,
+            "window": self.window.stats(self.slow_call_duration),
+        }
+
+
+# ----------------------------------------------------------------------
+# Shared breakers
+# ----------------------------------------------------------------------
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_listener: Optional[threading.Thread] = None
+
+
+def get_circuit_breaker(
+    name: str,
+    failure_threshold: int,
+    recovery_timeout: int,
+    slow_call_duration: Optional[float] = None,
+) -> CircuitBreaker:
+    """Return the process-wide breaker for *name*, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name=name,
+                    failure_threshold=failure_threshold,
+                    recovery_timeout=recovery_timeout,
+                    redis_factory=get_redis,
+                    slow_call_duration=slow_call_duration,
+                )
+                _breakers[name] = breaker
+    return breaker
+
+
+def get_circuit_breaker_stats() -> List[Dict[str, Any]]:
+    """Stats of every breaker this process has used."""
+    return [breaker.get_stats() for _, breaker in sorted(_breakers.items())]
+
+
+def _apply_message(message: Optional[dict]) -> None:
+    if not message or message.get("type") != "message":
+        return
+    try:
+        data = json.loads(message["data"])
+        breaker = _breakers.get(data.pop("name"))
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed circuit breaker message: {e}")
+        return
+    if breaker is not None:
+        breaker.apply_update(data)
+
+
+def _listen_loop() -> None:
+    while True:
+        redis_client = get_redis()
+        if redis_client is None:
+            time.sleep(1)
+            continue
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            # Updates may have been missed while unsubscribed
+            for breaker in list(_breakers.values()):
+                breaker.invalidate()
+            while True:
+                _apply_message(pubsub.get_message(timeout=1.0))
+        except Exception as e:
+            logger.warning(f"Circuit breaker listener error, resubscribing: {e}")
+            report_redis_error(e)
+            time.sleep(1)
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+def start_circuit_breaker_listener() -> None:
+    """Subscribe to breaker updates in a background thread (once per process)."""
+    global _listener
+    if _listener is not None:
+        return
+    _listener = threading.Thread(target=_listen_loop, name="circuit-breaker-listener", daemon=True)
+    _listener.start()
@@ -1,7 +1,11 @@
 import os
 import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# backend/, so relative data paths don't depend on the working directory
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
 # Detect if running tests
 is_testing = (
     os.getenv("PYTEST_CURRENT_TEST") is not None or
@@ -10,7 +14,12 @@ is_testing = (
     "test" in sys.argv[0] if sys.argv else False
 )
 
-load_dotenv(override=True)
+# The only place environment files are loaded; other modules read `settings`
+# (or os.environ) after importing this one.
+if os.getenv("PYTEST_CURRENT_TEST"):
+    load_dotenv(".env.test", override=True)
+else:
+    load_dotenv(override=True)
 
 class Settings:
     PROJECT_NAME: str = os.getenv("PROJECT_NAME", "SonicLibrary")
@@ -38,15 +47,118 @@ class Settings:
         raw = os.getenv("ADMIN_EMAILS", "admin@sonic.com")
         return [e.strip().lower() for e in raw.split(",") if e.strip()]
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_HEALTH_CHECK_INTERVAL: float = float(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 0 if is_testing else 5))
+    REDIS_RECONNECT_BACKOFF_MAX: float = float(os.getenv("REDIS_RECONNECT_BACKOFF_MAX", 30))
     SEARCH_RATE_LIMIT: int = int(os.getenv("SEARCH_RATE_LIMIT", 30))
     SEARCH_RATE_LIMIT_WINDOW: int = int(os.getenv("SEARCH_RATE_LIMIT_WINDOW", 60))
+    # "hybrid" (local token buckets synced to Redis in batches), "log" (exact,
+    # one entry per request) or "approximate" (two counters per key)
+    SEARCH_RATE_LIMIT_MODE: str = os.getenv("SEARCH_RATE_LIMIT_MODE", "hybrid")
+    SEARCH_RATE_LIMIT_SYNC_INTERVAL: float = float(os.getenv("SEARCH_RATE_LIMIT_SYNC_INTERVAL", 1.0))
+    # Fraction of the limit each worker may admit per client between syncs;
+    # bounds the overshoot at about workers * share * limit
+    SEARCH_RATE_LIMIT_LOCAL_SHARE: float = float(os.getenv("SEARCH_RATE_LIMIT_LOCAL_SHARE", 0.2))
     GOOGLE_BOOKS_GLOBAL_RATE_LIMIT: int = int(os.getenv("GOOGLE_BOOKS_GLOBAL_RATE_LIMIT", 100))
+    GOOGLE_BOOKS_RATE_LIMIT_MODE: str = os.getenv("GOOGLE_BOOKS_RATE_LIMIT_MODE", "log")
     CB_GOOGLE_FAILURE_THRESHOLD: int = int(os.getenv("CB_GOOGLE_FAILURE_THRESHOLD", 5))
     CB_GOOGLE_RECOVERY_TIMEOUT: int = int(os.getenv("CB_GOOGLE_RECOVERY_TIMEOUT", 30))
     CB_OPENAI_FAILURE_THRESHOLD: int = int(os.getenv("CB_OPENAI_FAILURE_THRESHOLD", 5))
     CB_OPENAI_RECOVERY_TIMEOUT: int = int(os.getenv("CB_OPENAI_RECOVERY_TIMEOUT", 30))
+    # Seconds a process trusts its cached copy of a circuit's state
+    CB_STATE_CACHE_TTL: float = float(os.getenv("CB_STATE_CACHE_TTL", 5))
+    # Seconds the single HALF_OPEN probe holds its lease before another may try
+    CB_PROBE_LEASE_SECONDS: int = int(os.getenv("CB_PROBE_LEASE_SECONDS", 30))
+    # Rate-based tripping: open when CB_FAILURE_RATE_THRESHOLD of the calls in
+    # the last CB_WINDOW_SECONDS (at least CB_MINIMUM_CALLS) failed, or
+    # CB_SLOW_CALL_RATE_THRESHOLD of them took the dependency's slow-call
+    # duration or longer
+    CB_FAILURE_RATE_THRESHOLD: float = float(os.getenv("CB_FAILURE_RATE_THRESHOLD", 0.5))
+    CB_GOOGLE_SLOW_CALL_SECONDS: float = float(os.getenv("CB_GOOGLE_SLOW_CALL_SECONDS", 5))
+    CB_OPENAI_SLOW_CALL_SECONDS: float = float(os.getenv("CB_OPENAI_SLOW_CALL_SECONDS", 10))
+    CB_SLOW_CALL_RATE_THRESHOLD: float = float(os.getenv("CB_SLOW_CALL_RATE_THRESHOLD", 0.5))
+    CB_WINDOW_SECONDS: float = float(os.getenv("CB_WINDOW_SECONDS", 60))
+    CB_MINIMUM_CALLS: int = int(os.getenv("CB_MINIMUM_CALLS", 10))
+    # Time budget of an HTTP request (0 disables deadlines); clients may ask for
+    # less with an X-Request-Timeout header
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", 10))
+    RECOMMENDATIONS_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("RECOMMENDATIONS_REQUEST_DEADLINE_SECONDS", 20))
+    # Google Books GETs: total time per call across retries, attempts, and the
+    # share of base traffic that may be retried (cluster-wide, per 10 s)
+    GOOGLE_BOOKS_DEADLINE_SECONDS: float = float(os.getenv("GOOGLE_BOOKS_DEADLINE_SECONDS", 10))
+    GOOGLE_BOOKS_MAX_ATTEMPTS: int = int(os.getenv("GOOGLE_BOOKS_MAX_ATTEMPTS", 3))
+    GOOGLE_BOOKS_RETRY_BASE_DELAY: float = float(os.getenv("GOOGLE_BOOKS_RETRY_BASE_DELAY", 0.2))
+    GOOGLE_BOOKS_RETRY_MAX_DELAY: float = float(os.getenv("GOOGLE_BOOKS_RETRY_MAX_DELAY", 2))
+    GOOGLE_BOOKS_RETRY_BUDGET_RATIO: float = float(os.getenv("GOOGLE_BOOKS_RETRY_BUDGET_RATIO", 0.1))
+    GOOGLE_BOOKS_RETRY_MIN_PER_WINDOW: int = int(os.getenv("GOOGLE_BOOKS_RETRY_MIN_PER_WINDOW", 3))
+    # Adaptive concurrency limits (bulkheads) on outbound calls, per worker:
+    # calls slower than the latency target shrink the limit
+    BULKHEAD_MIN_LIMIT: int = int(os.getenv("BULKHEAD_MIN_LIMIT", 1))
+    GOOGLE_BOOKS_MAX_CONCURRENCY: int = int(os.getenv("GOOGLE_BOOKS_MAX_CONCURRENCY", 16))
+    GOOGLE_BOOKS_LATENCY_TARGET: float = float(os.getenv("GOOGLE_BOOKS_LATENCY_TARGET", 2))
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", 8))
+    OPENAI_LATENCY_TARGET: float = float(os.getenv("OPENAI_LATENCY_TARGET", 8))
+    # Load shedding, per worker: requests running at once per route class and
+    # how many may queue behind them, for how long, before a 503 (a limit of
+    # 0 disables shedding for that class).  The two limits together stay
+    # within the 40 threads sync endpoints run on.
+    LOAD_SHED_EXPENSIVE_CONCURRENCY: int = int(os.getenv("LOAD_SHED_EXPENSIVE_CONCURRENCY", 8))
+    LOAD_SHED_EXPENSIVE_QUEUE: int = int(os.getenv("LOAD_SHED_EXPENSIVE_QUEUE", 16))
+    LOAD_SHED_DEFAULT_CONCURRENCY: int = int(os.getenv("LOAD_SHED_DEFAULT_CONCURRENCY", 32))
+    LOAD_SHED_DEFAULT_QUEUE: int = int(os.getenv("LOAD_SHED_DEFAULT_QUEUE", 64))
+    LOAD_SHED_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LOAD_SHED_QUEUE_TIMEOUT_SECONDS", 2))
+    # Dedicated threads for CPU-bound work in async endpoints (bcrypt, PIL)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    IMAGE_PROCESSING_WORKERS: int = int(os.getenv("IMAGE_PROCESSING_WORKERS", 2))
+    # Event-loop lag sampling period (0 disables) and the lag worth a warning
+    LOOP_LAG_CHECK_INTERVAL: float = float(os.getenv("LOOP_LAG_CHECK_INTERVAL", 0 if is_testing else 0.5))
+    LOOP_LAG_THRESHOLD: float = float(os.getenv("LOOP_LAG_THRESHOLD", 0.1))
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    # "openai" or "fake" (offline, deterministic).  Fake answers are never
+    # served unless asked for: without a key the openai provider fails its
+    # calls, the circuit opens and recommendations fall back to local ones.
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "fake" if is_testing else "openai")
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", 0.3))
+    # Per-request budget for an LLM recommendation call before falling back
+    # to the local recommender
+    LLM_DEADLINE_SECONDS: float = float(os.getenv("LLM_DEADLINE_SECONDS", 15))
+    LLM_MAX_WORKERS: int = int(os.getenv("LLM_MAX_WORKERS", 8))
+    # USD per 1k tokens, used to estimate spend in the LLM usage metrics
+    LLM_PROMPT_COST_PER_1K: float = float(os.getenv("LLM_PROMPT_COST_PER_1K", 0.0005))
+    LLM_COMPLETION_COST_PER_1K: float = float(os.getenv("LLM_COMPLETION_COST_PER_1K", 0.0015))
+    LLM_USAGE_RETENTION_DAYS: int = int(os.getenv("LLM_USAGE_RETENTION_DAYS", 90))
     MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", 100))
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
+    CF_TOP_K_NEIGHBORS: int = int(os.getenv("CF_TOP_K_NEIGHBORS", 50))
+    CF_MAX_PROFILE_ITEMS: int = int(os.getenv("CF_MAX_PROFILE_ITEMS", 200))
+    CF_MODEL_TTL: int = int(os.getenv("CF_MODEL_TTL", 900))  # rebuild item-item model every 15 min
+    CONTENT_SIMILARITY_TOP_K: int = int(os.getenv("CONTENT_SIMILARITY_TOP_K", 20))
+    CONTENT_SIMILARITY_CHUNK_SIZE: int = int(os.getenv("CONTENT_SIMILARITY_CHUNK_SIZE", 256))
+    CONTENT_SIMILARITY_MIN_SCORE: float = float(os.getenv("CONTENT_SIMILARITY_MIN_SCORE", 0.05))
+    CONTENT_SIMILARITY_MAX_DF: float = float(os.getenv("CONTENT_SIMILARITY_MAX_DF", 0.5))
+    CONTENT_SIMILARITY_STYLE_THRESHOLD: float = float(os.getenv("CONTENT_SIMILARITY_STYLE_THRESHOLD", 0.25))
+    ANN_INDEX_DIR: str = str(BACKEND_DIR / os.getenv("ANN_INDEX_DIR", "data/ann_index"))
+    ANN_DIM: int = int(os.getenv("ANN_DIM", 256))
+    ANN_TABLES: int = int(os.getenv("ANN_TABLES", 8))
+    ANN_BITS: int = int(os.getenv("ANN_BITS", 12))
+    CANDIDATE_POOL_SIZE: int = int(os.getenv("CANDIDATE_POOL_SIZE", 40))
+    CANDIDATE_POOL_GOOGLE_GENRES: int = int(os.getenv("CANDIDATE_POOL_GOOGLE_GENRES", 10))
+    CANDIDATE_POOL_REFRESH_SECONDS: int = int(os.getenv("CANDIDATE_POOL_REFRESH_SECONDS", 0 if is_testing else 3600))
+    CANDIDATE_POOL_TTL: int = int(os.getenv("CANDIDATE_POOL_TTL", 3 * 3600))
+    CANDIDATE_POOL_LOCAL_TTL: int = int(os.getenv("CANDIDATE_POOL_LOCAL_TTL", 60))
+    REC_REUSE_BANDS: int = int(os.getenv("REC_REUSE_BANDS", 16))
+    REC_REUSE_ROWS: int = int(os.getenv("REC_REUSE_ROWS", 4))
+    REC_REUSE_JACCARD_THRESHOLD: float = float(os.getenv("REC_REUSE_JACCARD_THRESHOLD", 0.7))
+    REC_REUSE_MIN_PROFILE_ITEMS: int = int(os.getenv("REC_REUSE_MIN_PROFILE_ITEMS", 3))
+    REC_REUSE_MIN_RESULTS: int = int(os.getenv("REC_REUSE_MIN_RESULTS", 3))
+    REC_REUSE_TTL: int = int(os.getenv("REC_REUSE_TTL", 7 * 24 * 3600))
+    REC_BATCH_ACTIVE_DAYS: int = int(os.getenv("REC_BATCH_ACTIVE_DAYS", 30))
+    REC_BATCH_CONCURRENCY: int = int(os.getenv("REC_BATCH_CONCURRENCY", 4))
+    REC_BATCH_TOKEN_BUDGET: int = int(os.getenv("REC_BATCH_TOKEN_BUDGET", 500_000))
+    REC_BATCH_CACHE_TTL: int = int(os.getenv("REC_BATCH_CACHE_TTL", 26 * 3600))  # outlives one nightly cycle
+    REC_BATCH_MAX_BREAKER_WAIT: int = int(os.getenv("REC_BATCH_MAX_BREAKER_WAIT", 600))
+    REC_BATCH_LOCK_TTL: int = int(os.getenv("REC_BATCH_LOCK_TTL", 4 * 3600))
 
 
 settings = Settings()
\ No newline at end of file
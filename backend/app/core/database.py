@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, event, text
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool
-from app.core.config import settings
-from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
+from app.core.config import settings, is_testing
+from app.core.deadline import DeadlineExceeded, remaining
 import logging
 import time
 import os
@@ -11,10 +12,8 @@ from typing import Optional
 # Configure logging for database operations
 db_logger = logging.getLogger("database")
 
-if os.getenv("PYTEST_CURRENT_TEST"):
-    load_dotenv(".env.test", override=True)
-else:
-    load_dotenv(override=True)
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
 
 DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
 
@@ -37,6 +36,35 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_url(url: str) -> str:
+    """The asyncpg form of a postgresql:// (psycopg2) URL."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Async engine for endpoints declared ``async def``: their queries run on the
+# event loop instead of taking a threadpool slot.  Its pool sits beside the
+# sync one above; together they stay under Postgres' default 100
+# connections.  asyncpg connections belong to the event loop that opened
+# them; tests start a new loop per client, so they don't pool at all.
+_async_pool_options = (
+    {"poolclass": NullPool}
+    if is_testing
+    else {"pool_size": 20, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 3600, "pool_timeout": 30}
+)
+async_engine = create_async_engine(async_url(DATABASE_URL), echo=False, **_async_pool_options)
+
+
+class AsyncRequestSession(Session):
+    """Sync session class behind ``AsyncSessionLocal``, to scope its events."""
+
+
+# expire_on_commit=False: attributes must not lazy-load after a commit,
+# which an AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=AsyncRequestSession, autoflush=False, expire_on_commit=False
+)
+
+
 def get_db():
     """Get database session with connection pooling."""
     db = SessionLocal()
@@ -46,6 +74,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Get an async database session, for ``async def`` endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables."""
     from app.models import User, Book, Review, UserBook
@@ -54,12 +88,14 @@ def init_db():
 
 # Database query monitoring and optimization
 @event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     """Log slow queries and monitor database performance."""
     context._query_start_time = time.time()
 
 
 @event.listens_for(engine, "after_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
 def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     """Log query execution time and identify slow queries."""
     total = time.time() - context._query_start_time
@@ -75,6 +111,28 @@ def after_cursor_execute(conn, cursor, statement, parameters, context, executema
         db_logger.debug(f"Query executed in {total:.3f}s: {statement[:100]}...")
 
 
+# Request deadlines: a transaction may not outlive the request it serves
+@event.listens_for(SessionLocal, "after_begin")
+@event.listens_for(AsyncRequestSession, "after_begin")
+def apply_request_deadline(session, transaction, connection):
+    """Bound every statement of the transaction by the request's time left."""
+    left = remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
+
+
+@event.listens_for(engine, "handle_error")
+@event.listens_for(async_engine.sync_engine, "handle_error")
+def translate_statement_timeout(context):
+    """Report a statement cancelled by the request deadline as a 504."""
+    if getattr(context.original_exception, "pgcode", None) == QUERY_CANCELED and remaining() is not None:
+        return DeadlineExceeded("Request deadline exceeded during a database query")
+
+
 # Connection pool monitoring
 def get_pool_status():
     """Get connection pool status for monitoring."""
@@ -0,0 +1,116 @@
+"""Request-scoped deadlines.
+
+``RequestDeadlineMiddleware`` gives every HTTP request a deadline: the
+route's time budget, shortened by an ``X-Request-Timeout`` header (seconds)
+if the client sends a smaller one.  The deadline lives in a context
+variable, so it follows the request into threadpool endpoints, and the
+code that waits on something consumes it:
+
+- ``google_books.get_json`` caps its own deadline (and each attempt's
+  timeout) by the time left;
+- LLM calls cap their deadline the same way;
+- database transactions begin with ``SET LOCAL statement_timeout`` set to
+  the time left (see ``app.core.database``).
+
+Once the deadline has passed, ``check_deadline`` raises
+``DeadlineExceeded`` (504) instead of starting more work.  Code outside a
+request (background threads, the recommendation batch) has no deadline.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+DEADLINE_HEADER = "x-request-timeout"
+
+# time.monotonic() timestamp by which the current request must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """The request ran out of time before its work could finish."""
+
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=504, detail=detail)
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the request deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def cap(deadline: float) -> float:
+    """The earlier of ``deadline`` (monotonic) and the request deadline."""
+    request_deadline = _deadline.get()
+    return deadline if request_deadline is None else min(deadline, request_deadline)
+
+
+def check_deadline() -> None:
+    """Raise ``DeadlineExceeded`` if the request deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block with a deadline ``seconds`` from now (None: no deadline)."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def route_budgets() -> List[Tuple[str, float]]:
+    """(path prefix, seconds) pairs; the first matching prefix wins."""
+    return [
+        ("/recommendations", settings.RECOMMENDATIONS_REQUEST_DEADLINE_SECONDS),
+    ]
+
+
+def budget_for(path: str, header_value: Optional[str] = None) -> Optional[float]:
+    """Time budget for a request to ``path``; None when deadlines are off."""
+    budget = settings.REQUEST_DEADLINE_SECONDS
+    for prefix, seconds in route_budgets():
+        if path.startswith(prefix):
+            budget = seconds
+            break
+    if budget <= 0:
+        return None
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            requested = budget
+        if requested > 0:
+            budget = min(budget, requested)
+    return budget
+
+
+class RequestDeadlineMiddleware:
+    """ASGI middleware setting the request deadline context variable."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header_value = None
+        for name, value in scope.get("headers", ()):
+            if name == DEADLINE_HEADER.encode():
+                header_value = value.decode("latin-1")
+                break
+        with deadline_scope(budget_for(scope["path"], header_value)):
+            await self.app(scope, receive, send)
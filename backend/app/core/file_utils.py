@@ -3,9 +3,10 @@ import uuid
 from pathlib import Path
 from typing import Optional
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 import io
 
+from app.core.offload import IMAGE_POOL, run_in_pool
+
 # Configuration
 UPLOAD_DIR = Path("uploads/profile_pictures")
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
@@ -23,6 +24,24 @@ def is_valid_image_file(filename: str) -> bool:
     return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
 
 
+def process_image(content: bytes, file_path: Path) -> None:
+    """Decode, normalise, shrink and save an image (blocking, CPU-bound)."""
+    from PIL import Image  # deferred: Pillow is only needed for uploads
+
+    image = Image.open(io.BytesIO(content))
+    
+    # Convert to RGB if necessary (for JPEG compatibility)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGB')
+    
+    # Resize if too large
+    if image.width > MAX_IMAGE_DIMENSIONS[0] or image.height > MAX_IMAGE_DIMENSIONS[1]:
+        image.thumbnail(MAX_IMAGE_DIMENSIONS, Image.Resampling.LANCZOS)
+    
+    # Save processed image
+    image.save(file_path, quality=85, optimize=True)
+
+
 async def save_profile_picture(file: UploadFile, user_id: int) -> str:
     """
     Save a profile picture file and return the filename.
@@ -60,19 +79,8 @@ async def save_profile_picture(file: UploadFile, user_id: int) -> str:
         # Read file content
         content = await file.read()
         
-        # Process image with PIL
-        image = Image.open(io.BytesIO(content))
-        
-        # Convert to RGB if necessary (for JPEG compatibility)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-        
-        # Resize if too large
-        if image.width > MAX_IMAGE_DIMENSIONS[0] or image.height > MAX_IMAGE_DIMENSIONS[1]:
-            image.thumbnail(MAX_IMAGE_DIMENSIONS, Image.Resampling.LANCZOS)
-        
-        # Save processed image
-        image.save(file_path, quality=85, optimize=True)
+        # Process image with PIL off the event loop
+        await run_in_pool(IMAGE_POOL, process_image, content, file_path)
         
         return filename
         
@@ -0,0 +1,182 @@
+"""Load shedding with per-route-class concurrency limits.
+
+All endpoints share one worker's threadpool and database pool, so during a
+spike a handful of expensive routes (recommendations, Google Books
+proxies) can hold every thread and starve cheap ones like ``/users/me``.
+``LoadSheddingMiddleware`` sorts requests into route classes by path
+prefix and gives each class its own limit:
+
+- up to ``limit`` requests of the class run at once;
+- up to ``max_queue`` more wait, first come first served, for at most the
+  queue timeout (or the time left before the request deadline, if sooner);
+- anything beyond that is turned away at once with 503 and ``Retry-After``.
+
+Each class's in-flight count and queue depth are exported as gauges
+(``load_shedding.<class>.in_flight`` / ``.queue_depth``) and rejections as
+counters (``.rejected`` for a full queue, ``.timed_out`` for a wait that ran
+out).  Limits are per worker process and all bookkeeping happens on the
+event loop, so no locking is needed.
+"""
+import asyncio
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.deadline import remaining
+from app.core.metrics import increment, set_gauge
+
+# Never shed these: scrapes must keep working while the worker is overloaded
+EXEMPT_PREFIXES: Tuple[str, ...] = ("/metrics",)
+
+DEFAULT_CLASS = "default"
+
+
+def route_classes() -> List[Tuple[str, Tuple[str, ...], int, int]]:
+    """(class, path prefixes, limit, max queue) rows; the first matching prefix wins.
+
+    Paths matching no row fall into the ``default`` class.
+    """
+    return [
+        (
+            "expensive",
+            ("/recommendations", "/books/search-external", "/books/external", "/books/popular"),
+            settings.LOAD_SHED_EXPENSIVE_CONCURRENCY,
+            settings.LOAD_SHED_EXPENSIVE_QUEUE,
+        ),
+        (DEFAULT_CLASS, (), settings.LOAD_SHED_DEFAULT_CONCURRENCY, settings.LOAD_SHED_DEFAULT_QUEUE),
+    ]
+
+
+def classify(path: str) -> Optional[str]:
+    """Route class of ``path``; None for paths that are never shed."""
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    for name, prefixes, _, _ in route_classes():
+        if prefixes and path.startswith(prefixes):
+            return name
+    return DEFAULT_CLASS
+
+
+class ConcurrencyLimit:
+    """At most ``limit`` holders at once, with a bounded FIFO queue behind them."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._publish()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        set_gauge(f"load_shedding.{self.name}.in_flight", self.in_flight)
+        set_gauge(f"load_shedding.{self.name}.queue_depth", self.queue_depth)
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, queueing for up to ``timeout`` seconds; False if shed."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._publish()
+            return True
+        if timeout is None:
+            timeout = self.queue_timeout
+        if len(self._waiters) >= self.max_queue or timeout <= 0:
+            increment(f"load_shedding.{self.name}.rejected")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            # release() may have handed us the slot just as the wait ran out
+            if waiter.done() and not waiter.cancelled():
+                return True
+            increment(f"load_shedding.{self.name}.timed_out")
+            return False
+        except BaseException:
+            # The client went away while queued; pass on a slot we were given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._publish()
+
+    def release(self) -> None:
+        """Hand the slot to the next waiter, or free it if nobody is queued."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.in_flight -= 1
+        self._publish()
+
+    def get_stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+        }
+
+
+def _busy_response(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={
+            "data": None,
+            "message": f"Server is busy. Try again in {retry_after} seconds.",
+            "status": "error",
+        },
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware applying the route classes' concurrency limits."""
+
+    def __init__(self, app):
+        self.app = app
+        queue_timeout = settings.LOAD_SHED_QUEUE_TIMEOUT_SECONDS
+        self.limits: Dict[str, ConcurrencyLimit] = {
+            name: ConcurrencyLimit(name, limit, max_queue, queue_timeout)
+            for name, _, limit, max_queue in route_classes()
+            if limit > 0
+        }
+        self.retry_after = max(1, math.ceil(queue_timeout))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["path"])
+        limit = self.limits.get(route_class) if route_class else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        timeout = limit.queue_timeout
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        if not await limit.acquire(timeout):
+            await _busy_response(self.retry_after)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
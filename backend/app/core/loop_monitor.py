@@ -0,0 +1,63 @@
+"""Event-loop lag monitor.
+
+A task on the event loop sleeps for ``LOOP_LAG_CHECK_INTERVAL`` and
+measures how late it wakes up.  The delay is how long something held the
+loop: a blocking call in an ``async def`` endpoint or dependency, during
+which no other request on the worker made progress.
+
+Every sample goes to the ``event_loop.lag_seconds`` histogram and gauge.
+Lags over ``LOOP_LAG_THRESHOLD`` are also logged and counted in
+``event_loop.blocked``.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.metrics import increment, observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+# Loop lag is far shorter than request latency, so it gets its own buckets
+LAG_BUCKETS: Sequence[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_task: Optional[asyncio.Task] = None
+
+
+def record_lag(lag: float) -> None:
+    """Export one lag sample, and log it if it is over the threshold."""
+    observe("event_loop.lag_seconds", lag, LAG_BUCKETS)
+    set_gauge("event_loop.lag_seconds", lag)
+    if lag >= settings.LOOP_LAG_THRESHOLD:
+        increment("event_loop.blocked")
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+
+async def _monitor(interval: float) -> None:
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        record_lag(max(0.0, time.monotonic() - expected))
+
+
+def start_loop_lag_monitor() -> Optional[asyncio.Task]:
+    """Start the monitor on the running loop (no-op if disabled or running)."""
+    global _task
+    interval = settings.LOOP_LAG_CHECK_INTERVAL
+    if interval <= 0 or (_task is not None and not _task.done()):
+        return _task
+    _task = asyncio.get_running_loop().create_task(_monitor(interval), name="loop-lag-monitor")
+    return _task
+
+
+async def stop_loop_lag_monitor() -> None:
+    global _task
+    task, _task = _task, None
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
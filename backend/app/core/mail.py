@@ -1,33 +1,48 @@
 # core/mail.py
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from typing import TYPE_CHECKING, Optional
+
 from pydantic import EmailStr, BaseModel
 
 from app.core.config import settings, is_testing  # assuming you have a settings.py for env variables
 
-# Only create mail configuration if not in testing mode and mail settings are provided
-conf = None
-if not is_testing and not settings.MAIL_DISABLED and settings.MAIL_FROM:
-    conf = ConnectionConfig(
-        MAIL_USERNAME=settings.MAIL_USERNAME,
-        MAIL_PASSWORD=settings.MAIL_PASSWORD,
-        MAIL_FROM=settings.MAIL_FROM,
-        MAIL_PORT=settings.MAIL_PORT,
-        MAIL_SERVER=settings.MAIL_SERVER,
-        MAIL_STARTTLS=True,
-        MAIL_SSL_TLS=False,
-        USE_CREDENTIALS=True,
-        VALIDATE_CERTS=True
-    )
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig
+
+# fastapi_mail is only imported when the first email is actually sent
+_conf = None
+
+
+def _get_mail_config() -> Optional["ConnectionConfig"]:
+    """Build the mail configuration on first use (None when mail is off)."""
+    global _conf
+    if _conf is None and not is_testing and not settings.MAIL_DISABLED and settings.MAIL_FROM:
+        from fastapi_mail import ConnectionConfig
+
+        _conf = ConnectionConfig(
+            MAIL_USERNAME=settings.MAIL_USERNAME,
+            MAIL_PASSWORD=settings.MAIL_PASSWORD,
+            MAIL_FROM=settings.MAIL_FROM,
+            MAIL_PORT=settings.MAIL_PORT,
+            MAIL_SERVER=settings.MAIL_SERVER,
+            MAIL_STARTTLS=True,
+            MAIL_SSL_TLS=False,
+            USE_CREDENTIALS=True,
+            VALIDATE_CERTS=True
+        )
+    return _conf
 
 class EmailSchema(BaseModel):
     email: EmailStr
 
 async def send_activation_email(email: EmailStr, activation_link: str):
     # Skip email sending during tests or if mail is not configured
+    conf = _get_mail_config()
     if is_testing or settings.MAIL_DISABLED or conf is None:
         print(f"[MAIL] Skipped (disabled/unconfigured) — activation link for {email}: {activation_link}")
         return
     
+    from fastapi_mail import FastMail, MessageSchema
+
     message = MessageSchema(
         subject="Activate your Sonic Library account",
         recipients=[email],
@@ -0,0 +1,107 @@
+"""In-process counters, gauges and histograms for operational events.
+
+Metrics are per worker process and reset on restart; they are cheap enough
+to bump on every request.  ``render_prometheus`` exports them in the
+Prometheus text format for ``GET /metrics``.
+"""
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, List, Sequence
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS: Sequence[float] = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+METRIC_PREFIX = "sonic_"
+
+_counters: Counter = Counter()
+_gauges: Dict[str, float] = {}
+# {name: {"buckets": Sequence[float], "counts": [int], "sum": float, "count": int}}
+_histograms: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+
+def increment(name: str, amount: float = 1) -> None:
+    """Add ``amount`` to the counter ``name``."""
+    with _lock:
+        _counters[name] += amount
+
+
+def get_counters() -> Dict[str, float]:
+    """Snapshot of every counter."""
+    with _lock:
+        return dict(_counters)
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Set the gauge ``name`` to its current ``value``."""
+    with _lock:
+        _gauges[name] = value
+
+
+def get_gauges() -> Dict[str, float]:
+    """Snapshot of every gauge."""
+    with _lock:
+        return dict(_gauges)
+
+
+def reset_counters() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def bucket_index(value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> int:
+    """Index of the first bucket whose upper bound is >= ``value``."""
+    return bisect.bisect_left(buckets, value)
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+    """Record ``value`` in the histogram ``name``."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {
+                "buckets": tuple(buckets), "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0,
+            }
+        histogram["counts"][bucket_index(value, histogram["buckets"])] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def get_histograms() -> Dict[str, Dict]:
+    """Snapshot of every histogram with per-bucket (not cumulative) counts."""
+    with _lock:
+        return {name: {**h, "counts": list(h["counts"])} for name, h in _histograms.items()}
+
+
+def _metric_name(name: str) -> str:
+    return METRIC_PREFIX + name.replace(".", "_").replace("-", "_")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, value in sorted(get_counters().items()):
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value:g}")
+    for name, value in sorted(get_gauges().items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:g}")
+    for name, histogram in sorted(get_histograms().items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip([*histogram["buckets"], float("inf")], histogram["counts"]):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f"{metric}_sum {histogram['sum']:g}")
+        lines.append(f"{metric}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
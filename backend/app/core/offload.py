@@ -0,0 +1,80 @@
+"""Dedicated, bounded thread pools for blocking work in async code.
+
+CPU-heavy calls such as bcrypt (~250 ms per hash) or PIL image processing
+would stall every request on the worker if run on the event loop.  They
+shouldn't take Starlette's shared threadpool either, or a burst of logins
+would starve the sync endpoints.  ``run_in_pool`` runs them on a named pool
+sized by ``pool_sizes()``.  Both libraries release the GIL while they work,
+so threads are enough; no process pool or pickling is needed.
+
+Context variables (the request deadline) carry into the pool.  Each pool
+exports ``offload.<pool>.pending`` (queued or running calls) as a gauge and
+``offload.<pool>.seconds`` (time to result, queueing included) as a
+histogram.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.core.config import settings
+from app.core.metrics import observe, set_gauge
+
+PASSWORD_POOL = "password"
+IMAGE_POOL = "image"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_pending: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def pool_sizes() -> Dict[str, int]:
+    """Worker threads per pool."""
+    return {
+        PASSWORD_POOL: settings.PASSWORD_HASH_WORKERS,
+        IMAGE_POOL: settings.IMAGE_PROCESSING_WORKERS,
+    }
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """The pool ``name``, created on first use."""
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(
+                max_workers=pool_sizes()[name], thread_name_prefix=f"offload-{name}"
+            )
+        return executor
+
+
+def _track(name: str, delta: int) -> None:
+    with _lock:
+        _pending[name] = _pending.get(name, 0) + delta
+        set_gauge(f"offload.{name}.pending", _pending[name])
+
+
+async def run_in_pool(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run ``func(*args, **kwargs)`` on the pool ``name`` and await its result."""
+    executor = get_executor(name)
+    context = contextvars.copy_context()
+    started = time.monotonic()
+    _track(name, 1)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+    finally:
+        _track(name, -1)
+        observe(f"offload.{name}.seconds", time.monotonic() - started)
+
+
+def shutdown_pools() -> None:
+    """Stop every pool's threads once their queued work is done."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False)
@@ -1,13 +1,157 @@
 import logging
+import math
+import threading
 import time
 import uuid
-from typing import Any, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.redis import report_redis_error
 
 logger = logging.getLogger(__name__)
 
 
-class GlobalRateLimiter:
-    """Global (shared) rate limiter using Redis sliding window counter.
+# Sliding-window log in one server-side step: prune entries older than the
+# window, count, and add this request only if it fits.  Running as a script
+# makes check-and-add atomic (no two requests can both see count < limit) and
+# costs one round trip.  Scores are the Redis server's clock in milliseconds,
+# so workers with skewed clocks still share one window.
+#
+# KEYS[1]: sorted set for the identifier
+# ARGV[1]: window in milliseconds, ARGV[2]: max requests, ARGV[3]: member
+# Returns {allowed (1/0), retry_after seconds}
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[3])
+    redis.call('PEXPIRE', key, window + 1000)
+    return {1, 0}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+if oldest[2] == nil then
+    return {0, math.ceil(window / 1000)}
+end
+local retry_after = math.floor((tonumber(oldest[2]) + window - now) / 1000) + 1
+if retry_after < 1 then
+    retry_after = 1
+end
+return {0, retry_after}
+"""
+
+
+# Approximate sliding window from two fixed-window counters, kept in one hash
+# per identifier ({window, count, previous}) so memory is O(1) per key no
+# matter the traffic.  The previous window's count is weighted by how much
+# of it still overlaps the sliding window:
+#
+#     estimate = previous * (1 - elapsed_fraction) + count
+#
+# This assumes requests were spread evenly over the previous window, so it
+# can be off by a fraction of that window's count when traffic was bursty.
+#
+# KEYS[1]: hash for the identifier
+# ARGV[1]: window in milliseconds, ARGV[2]: max requests (ARGV[3] unused)
+# Returns {allowed (1/0), retry_after seconds}
+APPROXIMATE_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+if limit <= 0 then
+    return {0, math.ceil(window / 1000)}
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local current = math.floor(now / window)
+
+local stored = redis.call('HMGET', key, 'window', 'count', 'previous')
+local stored_window = tonumber(stored[1])
+local count = tonumber(stored[2]) or 0
+local previous = tonumber(stored[3]) or 0
+if stored_window == nil then
+    count, previous = 0, 0
+elseif stored_window == current - 1 then
+    count, previous = 0, count
+elseif stored_window ~= current then
+    count, previous = 0, 0
+end
+
+local window_start = current * window
+local elapsed = (now - window_start) / window
+if previous * (1 - elapsed) + count < limit then
+    count = count + 1
+    redis.call('HSET', key, 'window', current, 'count', count, 'previous', previous)
+    redis.call('PEXPIRE', key, 2 * window)
+    return {1, 0}
+end
+
+-- Earliest time the estimate drops below the limit
+local retry_at
+if count < limit then
+    retry_at = window_start + window * (1 - (limit - count) / previous)
+else
+    retry_at = window_start + window + window * (1 - limit / count)
+end
+local retry_after = math.floor((retry_at - now) / 1000) + 1
+if retry_after < 1 then
+    retry_after = 1
+end
+return {0, retry_after}
+"""
+
+# Limiter modes
+SLIDING_LOG = "log"
+APPROXIMATE = "approximate"
+
+_SCRIPTS = {
+    SLIDING_LOG: SLIDING_WINDOW_SCRIPT,
+    APPROXIMATE: APPROXIMATE_WINDOW_SCRIPT,
+}
+
+
+class _SlidingWindow:
+    """Shared sliding-window check backed by one of the limiter scripts.
+
+    ``mode`` selects the algorithm:
+
+    - ``"log"``: exact sliding window; one sorted-set member per request in
+      the window.
+    - ``"approximate"``: two fixed-window counters with weighted
+      interpolation; constant memory per identifier.
+    """
+
+    def __init__(self, redis_client: Any, max_requests: int, window_seconds: int, mode: str = SLIDING_LOG):
+        if mode not in _SCRIPTS:
+            raise ValueError(f"Unknown rate limiter mode '{mode}'")
+        self.redis_client = redis_client
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self._script = None
+
+    def _check(self, key: str) -> Tuple[bool, int]:
+        if self.mode == APPROXIMATE:
+            # Hash instead of sorted set: keep keys apart so switching modes
+            # does not hit WRONGTYPE on live keys
+            key = f"{key}:approx"
+        if self._script is None:
+            # Sends EVALSHA, loading the script only if the server lacks it
+            self._script = self.redis_client.register_script(_SCRIPTS[self.mode])
+        allowed, retry_after = self._script(
+            keys=[key],
+            args=[int(self.window_seconds * 1000), self.max_requests, uuid.uuid4().hex],
+        )
+        return bool(int(allowed)), int(retry_after)
+
+
+class GlobalRateLimiter(_SlidingWindow):
+    """Global (shared) rate limiter using a Redis sliding window (see ``mode``).
 
     Unlike RateLimiter which tracks per-user, this uses a single shared key
     to enforce a global request budget (e.g. for third-party API quotas).
@@ -19,10 +163,9 @@ class GlobalRateLimiter:
         max_requests: int,
         window_seconds: int,
         key: str = "global_rate_limit",
+        mode: str = SLIDING_LOG,
     ):
-        self.redis_client = redis_client
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
+        super().__init__(redis_client, max_requests, window_seconds, mode)
         self.key = key
 
     def is_allowed(self) -> bool:
@@ -35,34 +178,16 @@ class GlobalRateLimiter:
             return True
 
         try:
-            now = time.time()
-            window_start = now - self.window_seconds
-
-            pipe = self.redis_client.pipeline()
-            pipe.zremrangebyscore(self.key, 0, window_start)
-            pipe.zcard(self.key)
-            results = pipe.execute()
-
-            current_count = results[1]
-
-            if current_count >= self.max_requests:
-                return False
-
-            member = f"{now}:{uuid.uuid4().hex[:8]}"
-            pipe2 = self.redis_client.pipeline()
-            pipe2.zadd(self.key, {member: now})
-            pipe2.expire(self.key, self.window_seconds + 1)
-            pipe2.execute()
-
-            return True
-
+            allowed, _ = self._check(self.key)
+            return allowed
         except Exception as e:
             logger.warning(f"Global rate limiter error, failing open: {e}")
+            report_redis_error(e)
             return True
 
 
-class RateLimiter:
-    """Per-user rate limiter using Redis sliding window counter (sorted sets)."""
+class RateLimiter(_SlidingWindow):
+    """Per-user rate limiter using a Redis sliding window (see ``mode``)."""
 
     def __init__(
         self,
@@ -70,10 +195,9 @@ class RateLimiter:
         max_requests: int,
         window_seconds: int,
         key_prefix: str = "rate_limit",
+        mode: str = SLIDING_LOG,
     ):
-        self.redis_client = redis_client
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
+        super().__init__(redis_client, max_requests, window_seconds, mode)
         self.key_prefix = key_prefix
 
     def _get_key(self, identifier: str) -> str:
@@ -93,37 +217,213 @@ class RateLimiter:
             return (True, 0)
 
         try:
-            now = time.time()
-            window_start = now - self.window_seconds
-            key = self._get_key(identifier)
-
-            pipe = self.redis_client.pipeline()
-            # Remove expired entries
-            pipe.zremrangebyscore(key, 0, window_start)
-            # Count current entries in window
-            pipe.zcard(key)
-            results = pipe.execute()
-
-            current_count = results[1]
-
-            if current_count >= self.max_requests:
-                # Get the oldest entry to calculate retry_after
-                oldest = self.redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest:
-                    oldest_time = oldest[0][1]
-                    retry_after = int(oldest_time + self.window_seconds - now) + 1
-                    return (False, max(retry_after, 1))
-                return (False, self.window_seconds)
-
-            # Add current request
-            member = f"{now}:{uuid.uuid4().hex[:8]}"
-            pipe2 = self.redis_client.pipeline()
-            pipe2.zadd(key, {member: now})
-            pipe2.expire(key, self.window_seconds + 1)
-            pipe2.execute()
+            return self._check(self._get_key(identifier))
+        except Exception as e:
+            logger.warning(f"Rate limiter error, failing open: {e}")
+            report_redis_error(e)
+            return (True, 0)
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "refilled_at", "pending", "blocked_until", "seen_at")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.refilled_at = now
+        self.pending = 0
+        self.blocked_until = 0.0
+        self.seen_at = now
 
+
+class HybridRateLimiter:
+    """Per-identifier limiter that answers from local token buckets.
+
+    Each worker keeps a token bucket per identifier and admits requests from
+    it without touching Redis.  Tokens consumed locally are pushed to shared
+    fixed-window counters (``<key_prefix>:<identifier>:<window>``) in one
+    pipelined batch every ``sync_interval`` seconds, or early when an
+    identifier's bucket runs dry.  The batch reply gives the global
+    approximate sliding-window count; each synced bucket is then refilled to
+    its share of what is left, and identifiers over the limit are blocked
+    until the count decays.
+
+    A batch only carries the identifiers that need it: those with tokens to
+    push, and those blocked or down to half their share, which are re-read
+    without a write.  Idle identifiers are skipped and picked up again once
+    a request gives them tokens to push.
+
+    A worker may admit at most ``local_share * max_requests`` requests per
+    identifier between syncs, plus refill, before it learns about the
+    others.  The overshoot over the global limit is therefore bounded by
+    roughly ``workers * local_share * max_requests``; ``local_share=0``
+    still allows one request per sync.
+
+    ``redis_factory`` is called on each sync rather than holding a client,
+    so a Redis outage only affects syncs.  Without Redis, requests fail open
+    (as with ``RateLimiter``).
+    """
+
+    def __init__(
+        self,
+        redis_factory: Callable[[], Any],
+        max_requests: int,
+        window_seconds: int,
+        key_prefix: str = "rate_limit:hybrid",
+        sync_interval: float = 1.0,
+        local_share: float = 0.2,
+    ):
+        self.redis_factory = redis_factory
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.key_prefix = key_prefix
+        self.sync_interval = sync_interval
+        self.capacity = max(1, math.ceil(max_requests * local_share))
+        self.refill_rate = max_requests / window_seconds
+        self._buckets: Dict[str, _LocalBucket] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = 0.0
+
+    def _get_key(self, identifier: str, window: int) -> str:
+        return f"{self.key_prefix}:{identifier}:{window}"
+
+    def _refill(self, bucket: _LocalBucket, now: float) -> None:
+        bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.refilled_at) * self.refill_rate)
+        bucket.refilled_at = now
+
+    def _needs_sync(self, bucket: _LocalBucket, now: float) -> bool:
+        if bucket.pending or now < bucket.blocked_until:
+            return True
+        tokens = bucket.tokens + (now - bucket.refilled_at) * self.refill_rate
+        return tokens < self.capacity / 2
+
+    def _take(self, identifier: str, now: float) -> Tuple[bool, int, bool]:
+        """Spend a local token; returns (allowed, retry_after, needs_sync)."""
+        with self._lock:
+            bucket = self._buckets.get(identifier)
+            if bucket is None:
+                bucket = self._buckets[identifier] = _LocalBucket(self.capacity, now)
+            bucket.seen_at = now
+            if now < bucket.blocked_until:
+                return (False, max(math.ceil(bucket.blocked_until - now), 1), False)
+            self._refill(bucket, now)
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.pending += 1
+                return (True, 0, False)
+            return (False, max(math.ceil((1 - bucket.tokens) / self.refill_rate), 1), True)
+
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Check if a request is allowed for the given identifier.
+
+        Returns the same ``(is_allowed, retry_after)`` tuple as
+        ``RateLimiter.is_allowed``.
+        """
+        now = time.time()
+        allowed, retry_after, needs_sync = self._take(identifier, now)
+        if allowed:
+            if now - self._synced_at >= self.sync_interval:
+                self.sync()
             return (True, 0)
+        if not needs_sync:
+            return (False, retry_after)
+        # Local share used up: lease a new one if the shared count has room
+        if not self.sync(force=True):
+            return (True, 0)
+        allowed, retry_after, _ = self._take(identifier, time.time())
+        return (allowed, retry_after)
+
+    def sync(self, force: bool = False) -> bool:
+        """Push locally consumed tokens to Redis and refresh every bucket.
+
+        Only one thread syncs at a time; others carry on with local
+        buckets.  Returns False when Redis is unavailable.
+        """
+        if not self._sync_lock.acquire(blocking=force):
+            return True
+        try:
+            return self._sync()
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self) -> bool:
+        now = time.time()
+        window_ms = self.window_seconds * 1000
+        current = int(now * 1000 // window_ms)
+        elapsed = (now * 1000 - current * window_ms) / window_ms
+
+        with self._lock:
+            self._synced_at = now
+            # Forget identifiers idle for a full window
+            for identifier in [i for i, b in self._buckets.items() if now - b.seen_at > self.window_seconds]:
+                if self._buckets[identifier].pending == 0:
+                    del self._buckets[identifier]
+            batch = {
+                identifier: bucket.pending
+                for identifier, bucket in self._buckets.items() if self._needs_sync(bucket, now)
+            }
+            for identifier in batch:
+                self._buckets[identifier].pending = 0
 
+        if not batch:
+            return True
+        redis_client = self.redis_factory()
+        if redis_client is None:
+            self._restore_pending(batch)
+            return False
+        identifiers = list(batch)
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for identifier in identifiers:
+                key = self._get_key(identifier, current)
+                if batch[identifier]:
+                    pipe.incrby(key, batch[identifier])
+                    pipe.expire(key, 2 * self.window_seconds)
+                else:
+                    # Nothing to push: just re-read the shared count
+                    pipe.get(key)
+                pipe.get(self._get_key(identifier, current - 1))
+            results = iter(pipe.execute())
         except Exception as e:
-            logger.warning(f"Rate limiter error, failing open: {e}")
-            return (True, 0)
+            logger.warning(f"Hybrid rate limiter sync failed, using local buckets: {e}")
+            report_redis_error(e)
+            self._restore_pending(batch)
+            return False
+
+        with self._lock:
+            for identifier in identifiers:
+                count = int(next(results) or 0)
+                if batch[identifier]:
+                    next(results)  # EXPIRE
+                previous = int(next(results) or 0)
+                bucket = self._buckets.get(identifier)
+                if bucket is None:
+                    continue
+                remaining = self.max_requests - (previous * (1 - elapsed) + count) - bucket.pending
+                bucket.refilled_at = now
+                if remaining >= 1:
+                    bucket.tokens = min(self.capacity, remaining)
+                    bucket.blocked_until = 0.0
+                else:
+                    bucket.tokens = 0
+                    bucket.blocked_until = now + self._retry_after(count, previous, elapsed)
+        return True
+
+    def _restore_pending(self, batch: Dict[str, int]) -> None:
+        """Count tokens of a failed sync again on the next one."""
+        with self._lock:
+            for identifier, pending in batch.items():
+                bucket = self._buckets.get(identifier)
+                if bucket is not None:
+                    bucket.pending += pending
+
+    def _retry_after(self, count: int, previous: int, elapsed: float) -> float:
+        """Seconds until the approximate window count drops below the limit."""
+        limit = self.max_requests
+        if limit <= 0:
+            return float(self.window_seconds)
+        if count < limit and previous:
+            fraction = 1 - (limit - count) / previous - elapsed
+        else:
+            fraction = 1 - elapsed + (1 - limit / max(count, 1))
+        return max(fraction * self.window_seconds, 1.0)
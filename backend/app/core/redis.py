@@ -1,5 +1,26 @@
+"""Pooled Redis access with health tracked off the request path.
+
+``get_redis()`` used to PING on every call, adding a round trip to each
+rate-limit and circuit-breaker check.  Now a single pooled client is
+shared by all callers, and whether Redis is usable is tracked separately:
+
+- A background thread (``start_redis_health_monitor``) PINGs every
+  ``REDIS_HEALTH_CHECK_INTERVAL`` seconds and flips the health flag.
+- While Redis is marked down, ``get_redis()`` returns None without touching
+  the network.  Reconnects are attempted with exponential backoff (capped at
+  ``REDIS_RECONNECT_BACKOFF_MAX``) by whichever caller arrives first after
+  the backoff expires, or by the monitor.
+- Callers that hit a connection error can call ``report_redis_error()`` to
+  mark Redis down immediately instead of waiting for the next check.
+
+``get_async_redis()`` returns a ``redis.asyncio`` client on its own pool for
+async code paths, gated by the same health flag.
+"""
 import logging
-from typing import Optional
+import random
+import threading
+import time
+from typing import Any, Optional
 
 import redis
 
@@ -7,35 +28,148 @@ from app.core.config import settings
 
 logger = logging.getLogger("redis")
 
+_pool: Optional[redis.ConnectionPool] = None
 _redis_client: Optional[redis.Redis] = None
+_async_client: Optional[Any] = None
+
+# Health state: None = not checked yet
+_healthy: Optional[bool] = None
+_failures = 0
+_next_attempt_at = 0.0
+_state_lock = threading.Lock()
+_probe_lock = threading.Lock()
+_monitor: Optional[threading.Thread] = None
+
+
+def _client() -> redis.Redis:
+    global _pool, _redis_client
+    if _redis_client is None:
+        _pool = redis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            socket_keepalive=True,
+            # Connections idle this long are PINGed by redis-py on checkout
+            health_check_interval=30,
+        )
+        _redis_client = redis.Redis(connection_pool=_pool)
+    return _redis_client
+
+
+def _backoff(failures: int) -> float:
+    """Delay before the next reconnect attempt, with jitter."""
+    delay = min(settings.REDIS_RECONNECT_BACKOFF_MAX, 0.5 * 2 ** max(failures - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _mark(healthy: bool, error: Optional[Exception] = None) -> None:
+    global _healthy, _failures, _next_attempt_at
+    with _state_lock:
+        if healthy:
+            if _healthy is False:
+                logger.info("Redis is reachable again")
+            _healthy, _failures = True, 0
+            return
+        _failures += 1
+        _next_attempt_at = time.monotonic() + _backoff(_failures)
+        if _healthy is not False:
+            logger.warning(f"Redis is unavailable: {error}")
+        _healthy = False
+
+
+def _probe() -> bool:
+    """PING Redis once and record the result."""
+    try:
+        _client().ping()
+    except Exception as e:
+        _mark(False, e)
+        return False
+    _mark(True)
+    return True
 
 
 def get_redis() -> Optional[redis.Redis]:
-    """Return a Redis client instance, or None if Redis is unavailable.
+    """Return the shared Redis client, or None if Redis is unavailable.
 
-    Uses a module-level singleton so the connection is reused across calls.
-    If Redis cannot be reached, logs a warning and returns None so the
-    application can continue to operate without Redis.
+    Makes no network call while Redis is known to be up (or known to be
+    down and still backing off), so it is safe to call on hot paths.  The
+    application keeps operating without Redis when None is returned.
     """
-    global _redis_client
+    if _healthy:
+        return _redis_client
+    if _healthy is False and time.monotonic() < _next_attempt_at:
+        return None
+    # First use (everyone waits for it) or a reconnect attempt is due (one
+    # caller tries, the rest carry on without Redis)
+    if not _probe_lock.acquire(blocking=_healthy is None):
+        return None
+    try:
+        if _healthy is None or (_healthy is False and time.monotonic() >= _next_attempt_at):
+            _probe()
+    finally:
+        _probe_lock.release()
+    return _redis_client if _healthy else None
 
-    if _redis_client is not None:
-        try:
-            _redis_client.ping()
-            return _redis_client
-        except Exception:
-            _redis_client = None
 
-    try:
-        client = redis.Redis.from_url(
+def report_redis_error(error: Exception) -> None:
+    """Mark Redis down after a connection error seen by a caller."""
+    if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+        _mark(False, error)
+
+
+def get_async_redis() -> Optional[Any]:
+    """Return a shared ``redis.asyncio`` client, or None if Redis is down.
+
+    The client has its own connection pool; it must be used from the
+    application's event loop.
+    """
+    global _async_client
+    if get_redis() is None:
+        return None
+    if _async_client is None:
+        import redis.asyncio
+
+        _async_client = redis.asyncio.Redis.from_url(
             settings.REDIS_URL,
             decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
             socket_connect_timeout=2,
             socket_timeout=2,
+            socket_keepalive=True,
+            health_check_interval=30,
         )
-        client.ping()
-        _redis_client = client
-        return _redis_client
-    except Exception as e:
-        logger.warning(f"Redis is unavailable: {e}")
-        return None
+    return _async_client
+
+
+def _monitor_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        if _healthy is False and time.monotonic() < _next_attempt_at:
+            continue
+        _probe()
+
+
+def start_redis_health_monitor() -> None:
+    """Start the background health check thread (once per process).
+
+    Disabled when ``REDIS_HEALTH_CHECK_INTERVAL`` is 0; health is then only
+    re-checked by callers after a failure.
+    """
+    global _monitor
+    interval = settings.REDIS_HEALTH_CHECK_INTERVAL
+    if interval <= 0 or _monitor is not None:
+        return
+    _monitor = threading.Thread(target=_monitor_loop, args=(interval,), name="redis-health", daemon=True)
+    _monitor.start()
+
+
+async def close_redis() -> None:
+    """Close the pools (application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _pool is not None:
+        _pool.disconnect()
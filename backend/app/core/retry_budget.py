@@ -0,0 +1,99 @@
+"""Cluster-wide retry budget.
+
+Retries help with isolated blips but multiply load during an outage: if
+every caller retries twice, a struggling dependency sees three times its
+normal traffic exactly when it can least take it.  A retry budget allows
+retries only while they stay a small fraction of the base traffic:
+
+    retries <= min_retries + ratio * requests      (per window)
+
+Requests and retries are counted in a Redis hash per fixed window,
+``retry_budget:<name>:<window>``, so the budget is shared by every worker.
+Without Redis each process keeps the same counts locally.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.metrics import increment
+from app.core.redis import report_redis_error
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """Allow retries up to *ratio* of the calls made in the current window."""
+
+    def __init__(
+        self,
+        name: str,
+        ratio: float,
+        min_retries: int,
+        window_seconds: int,
+        redis_factory: Callable[[], Any],
+    ):
+        self.name = name
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self._redis_factory = redis_factory
+        # Fallback without Redis: {window: [requests, retries]}
+        self._local: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def _window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def _key(self, window: int) -> str:
+        return f"retry_budget:{self.name}:{window}"
+
+    def _allows(self, requests: int, retries: int) -> bool:
+        return retries <= self.min_retries + self.ratio * requests
+
+    def _count_locally(self, window: int, field: int) -> List[int]:
+        with self._lock:
+            for stale in [w for w in self._local if w < window]:
+                del self._local[stale]
+            counts = self._local.setdefault(window, [0, 0])
+            counts[field] += 1
+            return list(counts)
+
+    def record_request(self) -> None:
+        """Count a first attempt (the base traffic retries are measured against)."""
+        window = self._window()
+        redis_client = self._redis_factory()
+        if redis_client is not None:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.hincrby(self._key(window), "requests", 1)
+                pipe.expire(self._key(window), 2 * self.window_seconds)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"RetryBudget({self.name}) Redis error, counting locally: {e}")
+                report_redis_error(e)
+        self._count_locally(window, 0)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False if the budget is used up."""
+        window = self._window()
+        redis_client = self._redis_factory()
+        counts: Optional[List[int]] = None
+        if redis_client is not None:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.hincrby(self._key(window), "retries", 1)
+                pipe.hget(self._key(window), "requests")
+                pipe.expire(self._key(window), 2 * self.window_seconds)
+                retries, requests, _ = pipe.execute()
+                counts = [int(requests or 0), int(retries)]
+            except Exception as e:
+                logger.warning(f"RetryBudget({self.name}) Redis error, counting locally: {e}")
+                report_redis_error(e)
+        if counts is None:
+            counts = self._count_locally(window, 1)
+        if self._allows(*counts):
+            return True
+        increment(f"retry_budget.{self.name}.exhausted")
+        return False
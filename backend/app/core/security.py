@@ -4,9 +4,9 @@ from jose import JWTError, jwt
 from app.core.config import settings
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.user_service import UserService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.services.user_service import AsyncUserService
 from typing import Dict, Optional
 import time
 
@@ -53,7 +53,7 @@ def _cache_user(email: str, user_data: object):
 
 async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user from JWT token stored in HTTP-only cookie"""
     credentials_exception = HTTPException(
@@ -79,9 +79,11 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    # Get user from database (no caching to avoid session issues)
-    user_service = UserService(db)
-    user = user_service.get_user_by_email(user_email)
+    # Get user from database (no caching to avoid session issues).  The
+    # query runs on the event loop; committing ends the read transaction so
+    # the connection goes back to the pool while the endpoint runs.
+    user = await AsyncUserService(db).get_user_by_email(user_email)
+    await db.commit()
     if user is None:
         raise credentials_exception
 
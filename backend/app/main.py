@@ -1,18 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import books, users, reviews, recommendations, auth, user_books, admin
+from app.api.v1.endpoints import books, users, reviews, recommendations, auth, user_books, admin, metrics
 from app.core.config import settings
 from app.core.logging_config import setup_logging
 from app.core.file_utils import UPLOAD_DIR
 from app.core.exceptions import RateLimitExceeded
+from app.core.circuit_breaker import start_circuit_breaker_listener
+from app.core.database import async_engine
+from app.core.deadline import RequestDeadlineMiddleware
+from app.core.load_shedding import LoadSheddingMiddleware
+from app.core.loop_monitor import start_loop_lag_monitor, stop_loop_lag_monitor
+from app.core.offload import shutdown_pools
+from app.core.redis import close_redis, start_redis_health_monitor
+from app.services.candidate_pools import start_candidate_pool_refresher
 import logging
 
 setup_logging()
 logger = logging.getLogger("sonic")
 
-app = FastAPI(title="SonicLibrary API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_redis_health_monitor()
+    start_circuit_breaker_listener()
+    start_candidate_pool_refresher()
+    start_loop_lag_monitor()
+    yield
+    await stop_loop_lag_monitor()
+    shutdown_pools()
+    await close_redis()
+    await async_engine.dispose()
+
+app = FastAPI(title="SonicLibrary API", lifespan=lifespan)
 
 _allowed_origins = [
     "http://localhost:3000",
@@ -21,6 +42,9 @@ _allowed_origins = [
 if settings.FRONTEND_URL:
     _allowed_origins.append(settings.FRONTEND_URL)
 
+# Shedding sits inside the deadline so queueing counts against the request's budget
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(RequestDeadlineMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_allowed_origins,
@@ -53,4 +77,5 @@ app.include_router(user_books.router, prefix="/user-books", tags=["User-Books"])
 app.include_router(reviews.router, prefix="/reviews", tags=["Reviews"])
 app.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
-app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
\ No newline at end of file
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
\ No newline at end of file
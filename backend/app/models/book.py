@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, ForeignKey, Integer, String
+from sqlalchemy import Table, Column, ForeignKey, Integer, String, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy import Enum as SqlEnum
 from app.models.base import Base
@@ -30,8 +30,23 @@ class Book(Base):
     isbn = Column(String(13), nullable=True, unique=True)
     image_url = Column(String, nullable=True)
     language = Column(String, nullable=True, default="pt-BR")
+    # Set once the book's content-similarity neighbors have been computed
+    content_indexed_at = Column(DateTime(timezone=True), nullable=True, index=True)
     genres = relationship("Genre", secondary=book_genres, backref="books")
 
     reviews = relationship("Review", back_populates="book")
 
-    users = relationship("UserBook", back_populates="book", cascade="all, delete-orphan")    
\ No newline at end of file
+    users = relationship("UserBook", back_populates="book", cascade="all, delete-orphan")
+
+
+class BookSimilarity(Base):
+    """Precomputed content-similarity neighbor of a book (top-k per book)."""
+    __tablename__ = "book_similarities"
+
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    similar_book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_book_similarity_score", "book_id", "score"),
+    )
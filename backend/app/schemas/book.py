@@ -49,3 +49,14 @@ class BookResponse(BookBase):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SimilarBookResponse(BookResponse):
+    score: float
+
+    @classmethod
+    def from_orm_with_score(cls, book_orm, score: float):
+        data = book_orm.__dict__.copy()
+        data['genres'] = [genre.name for genre in book_orm.genres]
+        data['score'] = round(score, 4)
+        return cls.model_validate(data)
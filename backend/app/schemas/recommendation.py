@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List
+
+
+class LLMRecommendation(BaseModel):
+    """One recommendation as returned by the LLM in JSON mode."""
+
+    id: str = Field(..., min_length=1, description="Exact candidate ID from the prompt")
+    title: str = Field(..., min_length=1)
+    authors: List[str] = []
+    description: str = ""
+    reasoning: str = ""
+
+    @field_validator("authors", mode="before")
+    @classmethod
+    def split_author_string(cls, v):
+        # Models occasionally return "A, B" instead of a list
+        if isinstance(v, str):
+            return [a.strip() for a in v.split(",") if a.strip()]
+        return v
+
+
+class LLMRecommendationList(BaseModel):
+    recommendations: List[LLMRecommendation]
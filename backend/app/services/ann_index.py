@@ -0,0 +1,513 @@
+"""Approximate nearest-neighbor index for book similarity at catalog scale.
+
+Books are embedded as dense, L2-normalized feature vectors by hashing their
+field-weighted TF-IDF terms (see ``content_similarity``) into ``dim`` signed
+buckets.  Random-hyperplane LSH assigns each vector an ``n_bits`` code in
+each of ``n_tables`` tables; a query probes its own bucket (and, with
+multi-probe, the buckets one bit flip away) in every table and re-ranks the
+candidates by exact cosine.
+
+On-disk layout (``settings.ANN_INDEX_DIR``)::
+
+    current             symlink to the live generation directory
+    gen-000002/         one directory per build, holding:
+    .lock               flock serializing inserts and generation swaps
+
+    meta.json           generation, dim, n_tables, n_bits, seed, base_count
+    planes.npy          float32 [n_tables * n_bits, dim] hyperplanes
+    idf.json            IDF snapshot used to embed books inserted later
+    ids.i64             int64   [N]             append-only
+    vectors.f32         float32 [N, dim]        append-only
+    codes.u64           uint64  [N, n_tables]   append-only
+    sorted_codes.u64    uint64  [n_tables, base_count]  per-table sorted codes
+    order.i32           int32   [n_tables, base_count]  row of each sorted code
+
+Every file is opened with ``numpy.memmap`` so all workers on a host share
+one copy through the page cache.  Rows past ``base_count`` were inserted
+after the last build and are scanned linearly until the next rebuild.
+
+A rebuild never touches the files workers have mapped: it writes a new
+generation directory and atomically repoints ``current`` at it.  Readers
+notice the new link target on their next call and reopen; the previous
+generation is kept so a reader caught mid-swap can finish.  Items inserted
+into the old generation while the rebuild ran are caught up into the new
+one under the index lock just before the swap.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.book import Book
+from app.services.content_similarity import TfidfCorpus, book_term_frequencies
+
+logger = logging.getLogger(__name__)
+
+_META = "meta.json"
+_PLANES = "planes.npy"
+_IDF = "idf.json"
+_IDS = "ids.i64"
+_VECTORS = "vectors.f32"
+_CODES = "codes.u64"
+_SORTED_CODES = "sorted_codes.u64"
+_ORDER = "order.i32"
+_LOCK = ".lock"
+_CURRENT = "current"
+_GENERATION_DIR = re.compile(r"^gen-(\d+)$")
+
+
+def _term_bucket(term: str, dim: int) -> Tuple[int, float]:
+    """Stable (bucket, sign) for a term; Python's hash() is salted per process."""
+    digest = int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "little")
+    return digest % dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+
+def hash_features(weights: Dict[str, float], dim: int) -> np.ndarray:
+    """Project sparse term weights onto a dense, L2-normalized vector."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for term, weight in weights.items():
+        bucket, sign = _term_bucket(term, dim)
+        vector[bucket] += sign * weight
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class _Generation:
+    """One build of the index: its metadata and memory-mapped files.
+
+    Only the append-only files grow after a build.  They are re-mapped into
+    a new ``rows`` tuple, so a query that takes ``rows`` once sees a
+    consistent prefix even while other workers insert.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        meta = json.loads((path / _META).read_text())
+        self.generation: int = meta["generation"]
+        self.dim: int = meta["dim"]
+        self.n_tables: int = meta["n_tables"]
+        self.n_bits: int = meta["n_bits"]
+        self.base_count: int = meta["base_count"]
+        self.planes = np.load(path / _PLANES, mmap_mode="r")
+        self.sorted_codes = self._memmap(_SORTED_CODES, np.uint64, (self.n_tables, self.base_count))
+        self.order = self._memmap(_ORDER, np.int32, (self.n_tables, self.base_count))
+        self._idf: Optional[Dict[str, float]] = None
+        self._bit_weights = (1 << np.arange(self.n_bits, dtype=np.uint64)).astype(np.uint64)
+        self.rows: Tuple[int, np.ndarray, np.ndarray, np.ndarray] = (-1, None, None, None)
+        self.refresh()
+
+    def _memmap(self, name: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        if not shape[0] or (len(shape) > 1 and not shape[1]):
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode="r", shape=shape)
+
+    def row_count_on_disk(self) -> int:
+        sizes = (
+            os.path.getsize(self.path / _IDS) // 8,
+            os.path.getsize(self.path / _VECTORS) // (4 * self.dim),
+            os.path.getsize(self.path / _CODES) // (8 * self.n_tables),
+        )
+        # A concurrent append may be half-written; only trust complete rows
+        return min(sizes)
+
+    def refresh(self) -> None:
+        """Re-map the append-only files if another worker inserted rows."""
+        count = self.row_count_on_disk()
+        if count == self.rows[0]:
+            return
+        self.rows = (
+            count,
+            self._memmap(_IDS, np.int64, (count,)),
+            self._memmap(_VECTORS, np.float32, (count, self.dim)),
+            self._memmap(_CODES, np.uint64, (count, self.n_tables)),
+        )
+
+    @property
+    def idf(self) -> Dict[str, float]:
+        if self._idf is None:
+            self._idf = json.loads((self.path / _IDF).read_text())
+        return self._idf
+
+    def embed(self, term_counts: Dict[str, float]) -> np.ndarray:
+        default_idf = max(self.idf.values(), default=1.0)
+        weights = {
+            term: (1.0 + math.log(tf)) * self.idf.get(term, default_idf)
+            for term, tf in term_counts.items() if tf > 0
+        }
+        return hash_features(weights, self.dim)
+
+    def append(self, item_id: int, vector: np.ndarray) -> None:
+        """Append one row; the caller holds the index flock."""
+        vector = np.ascontiguousarray(vector, dtype=np.float32).reshape(1, self.dim)
+        rows = (
+            (_IDS, np.array([item_id], dtype=np.int64)),
+            (_VECTORS, vector),
+            (_CODES, _signatures(self.planes, vector, self.n_tables, self.n_bits)),
+        )
+        # Drop any half-written row left behind by a crashed writer
+        count = self.row_count_on_disk()
+        for name, row in rows:
+            with open(self.path / name, "r+b") as f:
+                f.truncate(count * row.nbytes)
+                f.seek(0, os.SEEK_END)
+                f.write(row.tobytes())
+        self.refresh()
+
+    def _probe_codes(self, code: np.uint64, multiprobe: bool) -> List[np.uint64]:
+        probes = [code]
+        if multiprobe:
+            probes.extend(code ^ bit for bit in self._bit_weights)
+        return probes
+
+    def candidates(self, rows: Tuple, vector: np.ndarray, multiprobe: bool) -> np.ndarray:
+        count, _, _, codes = rows
+        query_codes = _signatures(self.planes, vector.reshape(1, self.dim), self.n_tables, self.n_bits)[0]
+        found: List[np.ndarray] = []
+        for table in range(self.n_tables):
+            probes = self._probe_codes(query_codes[table], multiprobe)
+            if self.base_count:
+                column = self.sorted_codes[table]
+                for code in probes:
+                    lo = np.searchsorted(column, code, side="left")
+                    hi = np.searchsorted(column, code, side="right")
+                    if hi > lo:
+                        found.append(np.asarray(self.order[table, lo:hi]))
+            if count > self.base_count:
+                delta = np.asarray(codes[self.base_count:, table])
+                hits = np.nonzero(np.isin(delta, np.array(probes, dtype=np.uint64)))[0]
+                if hits.size:
+                    found.append(hits + self.base_count)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found).astype(np.int64))
+
+
+class AnnIndex:
+    """Random-hyperplane LSH index backed by memory-mapped files.
+
+    ``root`` is the index directory; every call runs against whichever
+    generation ``current`` pointed to when it started.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._current: Optional[_Generation] = None
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        path: Path,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        idf: Dict[str, float],
+        n_tables: int = settings.ANN_TABLES,
+        n_bits: int = settings.ANN_BITS,
+        seed: int = 42,
+        catch_up: Optional[Callable[[], Iterable[Tuple[int, Dict[str, float]]]]] = None,
+    ) -> "AnnIndex":
+        """Write a new generation for ``vectors`` (rows aligned with ``ids``) and make it current.
+
+        ``catch_up`` is called under the index lock just before the swap and
+        returns ``(item_id, term_counts)`` for items created since the
+        snapshot ``vectors`` was taken from; they are added to the new
+        generation, since inserts up to then went to the old one.
+        """
+        if n_bits > 63:
+            raise ValueError("n_bits must be at most 63")
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        with _exclusive(root):
+            generation = max(_generations(root), default=0) + 1
+            path = root / f"gen-{generation:06d}"
+            path.mkdir()
+        dim = vectors.shape[1]
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((n_tables * n_bits, dim)).astype(np.float32)
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        codes = _signatures(planes, vectors, n_tables, n_bits)
+
+        order = np.argsort(codes, axis=0, kind="stable").T.astype(np.int32)  # [L, N]
+        sorted_codes = np.take_along_axis(codes.T, order.astype(np.int64), axis=1)
+
+        np.save(path / _PLANES, planes)
+        ids.tofile(path / _IDS)
+        vectors.tofile(path / _VECTORS)
+        np.ascontiguousarray(codes).tofile(path / _CODES)
+        np.ascontiguousarray(sorted_codes).tofile(path / _SORTED_CODES)
+        np.ascontiguousarray(order).tofile(path / _ORDER)
+        (path / _IDF).write_text(json.dumps(idf))
+        (path / _META).write_text(json.dumps({
+            "generation": generation,
+            "dim": dim,
+            "n_tables": n_tables,
+            "n_bits": n_bits,
+            "seed": seed,
+            "base_count": int(len(ids)),
+        }))
+        _publish(root, generation, catch_up)
+        return cls(root)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _refresh(self) -> _Generation:
+        """The current generation, reopened if a rebuild swapped it."""
+        target = os.readlink(self.root / _CURRENT)
+        current = self._current
+        if current is None or current.path.name != target:
+            with self._lock:
+                if self._current is None or self._current.path.name != target:
+                    self._current = _Generation(self.root / target)
+                current = self._current
+        current.refresh()
+        return current
+
+    @property
+    def path(self) -> Path:
+        return self._refresh().path
+
+    @property
+    def generation(self) -> int:
+        return self._refresh().generation
+
+    @property
+    def dim(self) -> int:
+        return self._refresh().dim
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._refresh().rows[1]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._refresh().rows[2]
+
+    @property
+    def idf(self) -> Dict[str, float]:
+        return self._refresh().idf
+
+    def __len__(self) -> int:
+        return self._refresh().rows[0]
+
+    def embed(self, term_counts: Dict[str, float]) -> np.ndarray:
+        """Embed raw term frequencies with the IDF snapshot of the last build."""
+        return self._refresh().embed(term_counts)
+
+    def insert(self, item_id: int, vector: np.ndarray) -> None:
+        """Append one vector to the current generation.  Safe across processes via an exclusive flock."""
+        with _exclusive(self.root):
+            # Generations only swap under the same lock, so this one stays current
+            self._refresh().append(item_id, vector)
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def candidates(self, vector: np.ndarray, multiprobe: bool = True) -> np.ndarray:
+        """Row numbers sharing a (probed) bucket with ``vector`` in any table."""
+        current = self._refresh()
+        return current.candidates(current.rows, vector, multiprobe)
+
+    def query(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        exclude: Iterable[int] = (),
+        multiprobe: bool = True,
+    ) -> List[Tuple[int, float]]:
+        """Approximate top-k ``(item_id, cosine)`` for a normalized vector."""
+        vector = np.asarray(vector, dtype=np.float32)
+        current = self._refresh()
+        rows = current.rows
+        found = current.candidates(rows, vector, multiprobe)
+        if not found.size:
+            return []
+        scores = np.asarray(rows[2][found]) @ vector
+        ids = np.asarray(rows[1][found])
+        excluded = np.isin(ids, np.fromiter(exclude, dtype=np.int64))
+        scores[excluded] = -np.inf
+        results: Dict[int, float] = {}
+        for i in np.argsort(-scores):
+            if len(results) == k or not np.isfinite(scores[i]):
+                break
+            # An item inserted twice (re-indexed, or caught up by a rebuild) counts once
+            results.setdefault(int(ids[i]), float(scores[i]))
+        return list(results.items())
+
+    def vector_for(self, item_id: int) -> Optional[np.ndarray]:
+        """Stored vector of an indexed item (latest insert wins)."""
+        _, ids, vectors, _ = self._refresh().rows
+        matches = np.nonzero(np.asarray(ids) == item_id)[0]
+        return np.asarray(vectors[matches[-1]]) if matches.size else None
+
+
+def _signatures(planes: np.ndarray, vectors: np.ndarray, n_tables: int, n_bits: int) -> np.ndarray:
+    """LSH codes: one ``n_bits`` sign pattern per table, packed into uint64."""
+    bits = (vectors @ np.asarray(planes).T) > 0  # [N, L * b]
+    bits = bits.reshape(len(vectors), n_tables, n_bits).astype(np.uint64)
+    weights = (1 << np.arange(n_bits, dtype=np.uint64)).astype(np.uint64)
+    return (bits * weights).sum(axis=2, dtype=np.uint64)
+
+
+@contextmanager
+def _exclusive(root: Path):
+    """Hold the index-wide flock (inserts and generation swaps)."""
+    with open(root / _LOCK, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _generations(root: Path) -> List[int]:
+    """Numbers of the generation directories under ``root``, built or in progress."""
+    matches = (_GENERATION_DIR.match(entry.name) for entry in root.iterdir())
+    return [int(match.group(1)) for match in matches if match]
+
+
+def _current_generation(root: Path) -> int:
+    try:
+        match = _GENERATION_DIR.match(os.readlink(root / _CURRENT))
+    except FileNotFoundError:
+        return 0
+    return int(match.group(1)) if match else 0
+
+
+def _publish(
+    root: Path,
+    generation: int,
+    catch_up: Optional[Callable[[], Iterable[Tuple[int, Dict[str, float]]]]] = None,
+) -> None:
+    """Atomically point ``current`` at ``generation`` and prune older ones.
+
+    ``catch_up`` items are appended first, under the lock that inserts also
+    take, so no insert lands in the old generation after they were read.
+    The previous generation is kept for readers that resolved the old link
+    just before the swap.  A build finishing after a newer one is discarded.
+    """
+    name = f"gen-{generation:06d}"
+    with _exclusive(root):
+        if _current_generation(root) >= generation:
+            logger.info(f"ANN index generation {generation} superseded, discarding")
+            shutil.rmtree(root / name, ignore_errors=True)
+            return
+        if catch_up is not None:
+            new = _Generation(root / name)
+            caught_up = 0
+            for item_id, term_counts in catch_up():
+                new.append(item_id, new.embed(term_counts))
+                caught_up += 1
+            if caught_up:
+                logger.info(f"ANN index generation {generation}: caught up {caught_up} items added during the build")
+        link = root / f".{_CURRENT}-{os.getpid()}"
+        if link.is_symlink():
+            link.unlink()
+        os.symlink(name, link)
+        os.replace(link, root / _CURRENT)
+        for old in _generations(root):
+            if old < generation - 1:
+                shutil.rmtree(root / f"gen-{old:06d}", ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+# Catalog integration
+# ----------------------------------------------------------------------
+
+_index: Optional[AnnIndex] = None
+_index_lock = threading.Lock()
+
+
+def build_ann_index(db: Session, path: Optional[str] = None) -> AnnIndex:
+    """Embed every book in the catalog and write a fresh index."""
+    global _index
+    books = db.query(Book).options(selectinload(Book.genres)).all()
+    corpus = TfidfCorpus({book.id: book_term_frequencies(book) for book in books})
+    # Only snapshot terms seen at least twice; rarer ones default to max IDF
+    idf = {term: corpus.idf(term) for term, df in corpus.document_frequency.items() if df >= 2}
+
+    dim = settings.ANN_DIM
+    ids = np.array([book.id for book in books], dtype=np.int64)
+    vectors = np.zeros((len(books), dim), dtype=np.float32)
+    for row, book in enumerate(books):
+        vectors[row] = hash_features(corpus.vectors[book.id], dim)
+
+    # Books created after this snapshot were inserted into the old generation
+    watermark = int(ids.max()) if len(ids) else 0
+
+    def books_since_snapshot() -> List[Tuple[int, Dict[str, float]]]:
+        # A fresh statement: READ COMMITTED sees books committed since
+        created = db.query(Book).options(selectinload(Book.genres)).filter(Book.id > watermark).order_by(Book.id)
+        return [(book.id, book_term_frequencies(book)) for book in created]
+
+    index = AnnIndex.build(Path(path or settings.ANN_INDEX_DIR), ids, vectors, idf, catch_up=books_since_snapshot)
+    with _index_lock:
+        _index = index
+    logger.info(f"ANN index built with {len(books)} books at {index.path}")
+    return index
+
+
+def get_ann_index() -> Optional[AnnIndex]:
+    """Open the shared on-disk index, or return None if it was never built."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None and (Path(settings.ANN_INDEX_DIR) / _CURRENT).exists():
+                _index = AnnIndex(Path(settings.ANN_INDEX_DIR))
+    return _index
+
+
+def index_book(book: Book) -> None:
+    """Insert a newly created book into the ANN index (best effort)."""
+    index = get_ann_index()
+    if index is None:
+        return
+    try:
+        index.insert(book.id, index.embed(book_term_frequencies(book)))
+    except Exception as e:
+        logger.warning(f"ANN insert failed for book {book.id}: {e}")
+
+
+def find_similar_book_ids(book: Book, k: int = 10) -> List[Tuple[int, float]]:
+    """Approximate content neighbors of a book, or [] if no index exists."""
+    index = get_ann_index()
+    if index is None:
+        return []
+    vector = index.vector_for(book.id)
+    if vector is None:
+        vector = index.embed(book_term_frequencies(book))
+    return index.query(vector, k=k, exclude=[book.id])
+
+
+def get_approximate_similar_books(db: Session, book: Book, limit: int = 10) -> List[Tuple[Book, float]]:
+    """Like ``content_similarity.get_similar_books`` but served from the ANN index."""
+    approximate = find_similar_book_ids(book, k=limit)
+    if not approximate:
+        return []
+    books = {
+        b.id: b for b in db.query(Book).options(selectinload(Book.genres)).filter(
+            Book.id.in_([other_id for other_id, _ in approximate])
+        )
+    }
+    return [(books[other_id], score) for other_id, score in approximate if other_id in books]
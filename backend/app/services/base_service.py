@@ -1,4 +1,7 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 from typing import Type, TypeVar, Generic
 from datetime import datetime, UTC
 import logging
@@ -72,3 +75,37 @@ class BaseService(Generic[T]):
         self.db.commit()
         self.db.refresh(db_obj)
         return db_obj
+
+
+class AsyncBaseService(Generic[T]):
+    """``BaseService`` for an ``AsyncSession``, used by ``async def`` endpoints.
+
+    Relationships are never lazy-loaded on an AsyncSession, so queries must
+    eager-load everything the caller touches.
+    """
+
+    def __init__(self, db: AsyncSession, model: Type[T]):
+        self.db = db
+        self.model = model
+
+    async def get_by_id(self, obj_id: int):
+        return await self.db.scalar(select(self.model).where(self.model.id == obj_id))
+
+    async def count(self, query: Select) -> int:
+        """Number of rows ``query`` would return, ignoring its loader options."""
+        return await self.db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    async def paginate(self, query: Select, page: int = 1, page_size: int = 20) -> tuple[list, int]:
+        """Return one page of ``query`` and the total row count.
+
+        ``page_size`` is clamped to ``settings.MAX_PAGE_SIZE``, as in
+        ``BaseService.get_paginated``.
+        """
+        from app.core.config import settings
+
+        page_size = max(1, min(page_size, settings.MAX_PAGE_SIZE))
+        total_count = await self.count(query)
+        result = await self.db.execute(query.offset((page - 1) * page_size).limit(page_size))
+        if len(query.column_descriptions) == 1:
+            return list(result.unique().scalars().all()), total_count
+        return list(result.all()), total_count
@@ -1,7 +1,7 @@
 from app.models.book import Book, Genre
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from sqlalchemy.orm import joinedload, selectinload
-from app.services.base_service import BaseService
+from app.services.base_service import AsyncBaseService, BaseService
 from typing import Tuple, List, Optional
 
 class BookService(BaseService[Book]):
@@ -124,6 +124,9 @@ class BookService(BaseService[Book]):
                 self.db.commit()
                 self.db.refresh(book)
 
+            from app.services.ann_index import index_book  # deferred: pulls in numpy
+
+            index_book(book)
             return book
         except Exception as e:
             # Log the error with traceback
@@ -131,3 +134,45 @@ class BookService(BaseService[Book]):
             print("Error in BookService.create:", e)
             print(traceback.format_exc())
             raise
+
+
+class AsyncBookService(AsyncBaseService[Book]):
+    """Read paths of ``BookService`` for ``async def`` endpoints."""
+
+    def __init__(self, db):
+        super().__init__(db, Book)
+
+    async def filter_books_paginated(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        search: Optional[str] = None,
+        genre: Optional[str] = None
+    ) -> Tuple[List[Book], int, int, int]:
+        """
+        Get paginated books with filtering.
+
+        Returns:
+            Tuple of (books, total_count, total_pages, current_page)
+        """
+        query = select(self.model).options(selectinload(self.model.genres))
+
+        if search:
+            query = query.where(
+                or_(
+                    self.model.title.ilike(f"%{search}%"),
+                    self.model.author.ilike(f"%{search}%")
+                )
+            )
+
+        if genre:
+            query = query.join(self.model.genres).where(Genre.name == genre)
+
+        books, total_count = await self.paginate(query, page=page, page_size=page_size)
+        total_pages = (total_count + page_size - 1) // page_size
+        return books, total_count, total_pages, page
+
+    async def get_by_id(self, obj_id: int):
+        return await self.db.scalar(
+            select(self.model).options(selectinload(Book.genres)).where(self.model.id == obj_id)
+        )
@@ -0,0 +1,341 @@
+"""Per-genre candidate pools for LLM recommendations.
+
+Instead of querying Google Books on every recommendation cache miss, the
+candidates shown to the LLM are drawn from precomputed pools: the best-rated
+local books of each genre plus Google Books results for the most common
+genres, refreshed periodically.  Pools are stored in Redis so every worker
+shares one refresh; without Redis each worker keeps its own in-process copy.
+
+Serving candidates does no outbound HTTP: it is a Redis MGET (or a dict
+lookup within ``CANDIDATE_POOL_LOCAL_TTL``) followed by set lookups against
+the books the user has already read.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.book import Book, Genre, book_genres
+from app.models.review import Review
+
+logger = logging.getLogger(__name__)
+
+# Queried on Google and used when a user's books have no genres
+DEFAULT_POOL_GENRES = ["fiction", "literature", "bestseller"]
+
+POOL_KEY_PREFIX = "candidate_pool:"
+REFRESH_LOCK_KEY = "candidate_pool:refresh_lock"
+
+Candidate = Dict[str, Any]
+
+# In-process pool cache: {genre: {"data": [Candidate], "timestamp": float}}
+_pool_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _genre_key(genre: str) -> str:
+    return genre.strip().lower()
+
+
+def _local_candidate(book: Book, avg_rating: Optional[float], ratings_count: int, genre: str) -> Candidate:
+    return {
+        "book_id": book.id,
+        "external_id": book.external_id or f"book:{book.id}",
+        "title": book.title,
+        "authors": [book.author] if book.author else [],
+        "description": book.description,
+        "categories": [genre],
+        "averageRating": round(float(avg_rating), 2) if avg_rating is not None else None,
+        "ratingsCount": ratings_count,
+        "pageCount": None,
+    }
+
+
+def _ratings_subquery(db: Session):
+    """Average rating and rating count per local book, from ``reviews``."""
+    return (
+        db.query(
+            Review.book_id.label("book_id"),
+            func.avg(Review.rate).label("avg_rating"),
+            func.count(Review.id).label("ratings_count"),
+        )
+        .filter(Review.book_id.isnot(None))
+        .group_by(Review.book_id)
+        .subquery()
+    )
+
+
+def build_local_pools(db: Session, pool_size: int = settings.CANDIDATE_POOL_SIZE) -> Dict[str, List[Candidate]]:
+    """Top-rated local books of every genre, at most ``pool_size`` each."""
+    ratings = _ratings_subquery(db)
+    rank = func.row_number().over(
+        partition_by=Genre.id,
+        order_by=(
+            func.coalesce(ratings.c.avg_rating, 0).desc(),
+            func.coalesce(ratings.c.ratings_count, 0).desc(),
+            Book.id.desc(),
+        ),
+    ).label("rank")
+    ranked = (
+        db.query(
+            Genre.name.label("genre"),
+            Book.id.label("book_id"),
+            ratings.c.avg_rating,
+            func.coalesce(ratings.c.ratings_count, 0).label("ratings_count"),
+            rank,
+        )
+        .join(book_genres, book_genres.c.genre_id == Genre.id)
+        .join(Book, Book.id == book_genres.c.book_id)
+        .outerjoin(ratings, ratings.c.book_id == Book.id)
+        .subquery()
+    )
+    rows = (
+        db.query(ranked.c.genre, Book, ranked.c.avg_rating, ranked.c.ratings_count)
+        .join(Book, Book.id == ranked.c.book_id)
+        .filter(ranked.c.rank <= pool_size)
+        .order_by(ranked.c.genre, ranked.c.rank)
+        .all()
+    )
+
+    pools: Dict[str, List[Candidate]] = {}
+    for genre, book, avg_rating, ratings_count in rows:
+        pools.setdefault(_genre_key(genre), []).append(_local_candidate(book, avg_rating, ratings_count, genre))
+    return pools
+
+
+def top_genres(db: Session, limit: int) -> List[str]:
+    """Genre names ordered by how many local books carry them."""
+    rows = (
+        db.query(Genre.name)
+        .join(book_genres, book_genres.c.genre_id == Genre.id)
+        .group_by(Genre.id, Genre.name)
+        .order_by(func.count(book_genres.c.book_id).desc())
+        .limit(limit)
+        .all()
+    )
+    return [name for (name,) in rows]
+
+
+def refresh_candidate_pools(db: Session) -> Dict[str, int]:
+    """Rebuild every pool from the catalog and Google Books; return pool sizes.
+
+    Google is queried once per genre for ``DEFAULT_POOL_GENRES`` and the
+    ``CANDIDATE_POOL_GOOGLE_GENRES`` most common local genres.  A genre whose
+    Google query fails (circuit open, rate limited) keeps only its local
+    books until the next refresh.
+    """
+    # Imported here: recommendation_service imports this module
+    from app.services.recommendation_service import get_google_books_by_genre
+
+    pools = build_local_pools(db)
+    google_genres = list(dict.fromkeys(
+        DEFAULT_POOL_GENRES + top_genres(db, settings.CANDIDATE_POOL_GOOGLE_GENRES)
+    ))
+    for genre in google_genres:
+        google_books = get_google_books_by_genre([genre], max_results=settings.CANDIDATE_POOL_SIZE)
+        pool = pools.setdefault(_genre_key(genre), [])
+        seen = {c["external_id"] for c in pool}
+        pool.extend(b for b in google_books if b.get("external_id") and b["external_id"] not in seen)
+
+    store_pools(pools)
+    sizes = {genre: len(pool) for genre, pool in pools.items()}
+    logger.info(f"Candidate pools refreshed: {len(sizes)} genres, {sum(sizes.values())} candidates")
+    return sizes
+
+
+def store_pools(pools: Dict[str, List[Candidate]]) -> None:
+    """Publish pools to Redis (shared) and the in-process cache."""
+    now = time.time()
+    for genre, pool in pools.items():
+        _pool_cache[genre] = {"data": pool, "timestamp": now}
+
+    redis_client = get_redis()
+    if redis_client is None:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for genre, pool in pools.items():
+            # Pools outlive a couple of missed refreshes, then expire
+            pipe.set(f"{POOL_KEY_PREFIX}{genre}", json.dumps(pool), ex=settings.CANDIDATE_POOL_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to store candidate pools in Redis: {e}")
+
+
+def get_pools(genres: Iterable[str]) -> Dict[str, List[Candidate]]:
+    """Fetch pools for ``genres`` from the in-process cache, then Redis."""
+    wanted = list(dict.fromkeys(_genre_key(g) for g in genres))
+    pools: Dict[str, List[Candidate]] = {}
+    missing: List[str] = []
+    now = time.time()
+    for genre in wanted:
+        cached = _pool_cache.get(genre)
+        if cached and now - cached["timestamp"] < settings.CANDIDATE_POOL_LOCAL_TTL:
+            pools[genre] = cached["data"]
+        else:
+            missing.append(genre)
+
+    if missing:
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                for genre, raw in zip(missing, redis_client.mget([f"{POOL_KEY_PREFIX}{g}" for g in missing])):
+                    if raw:
+                        pools[genre] = json.loads(raw)
+                        _pool_cache[genre] = {"data": pools[genre], "timestamp": now}
+            except Exception as e:
+                logger.warning(f"Failed to read candidate pools from Redis: {e}")
+        # Without Redis (or on a Redis miss) fall back to a stale local copy
+        for genre in missing:
+            if genre not in pools and genre in _pool_cache:
+                pools[genre] = _pool_cache[genre]["data"]
+    return pools
+
+
+def get_candidates(
+    genres: Iterable[str],
+    read_book_ids: Set[int],
+    read_external_ids: Set[str],
+    limit: int = 15,
+) -> List[Candidate]:
+    """Unread candidates for a user, interleaved across their genres.
+
+    Taking candidates round-robin keeps one dominant genre from filling the
+    whole prompt.
+    """
+    genres = list(genres) or DEFAULT_POOL_GENRES
+    pools = get_pools(genres)
+    if not pools:
+        pools = get_pools(DEFAULT_POOL_GENRES)
+
+    iterators = [iter(pool) for pool in pools.values()]
+    candidates: List[Candidate] = []
+    seen: Set[str] = set()
+    while iterators and len(candidates) < limit:
+        for it in list(iterators):
+            candidate = next(it, None)
+            if candidate is None:
+                iterators.remove(it)
+                continue
+            external_id = candidate.get("external_id")
+            if (
+                external_id in seen
+                or external_id in read_external_ids
+                or candidate.get("book_id") in read_book_ids
+            ):
+                continue
+            seen.add(external_id)
+            candidates.append(candidate)
+            if len(candidates) >= limit:
+                break
+    return candidates
+
+
+def get_user_genres(db: Session, book_ids: Iterable[int]) -> List[str]:
+    """Genres of the given local books, most frequent first."""
+    book_ids = [book_id for book_id in book_ids if book_id]
+    if not book_ids:
+        return []
+    rows = (
+        db.query(Genre.name)
+        .join(book_genres, book_genres.c.genre_id == Genre.id)
+        .filter(book_genres.c.book_id.in_(book_ids))
+        .group_by(Genre.id, Genre.name)
+        .order_by(func.count(book_genres.c.book_id).desc())
+        .all()
+    )
+    return [name for (name,) in rows]
+
+
+def top_rated_in_genres(
+    db: Session,
+    genres: Iterable[str],
+    exclude_book_ids: Set[int],
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """Best-rated local books in ``genres`` as recommendations, no LLM involved.
+
+    The fallback when the LLM misses its deadline: one aggregate query over
+    ``reviews``, returning the same shape as the other recommenders.  Without
+    genres the whole catalog is ranked.
+    """
+    ratings = _ratings_subquery(db)
+    query = (
+        db.query(Book, ratings.c.avg_rating)
+        .join(ratings, ratings.c.book_id == Book.id)
+        .options(selectinload(Book.genres))
+    )
+    genre_names = [g.lower() for g in genres]
+    if genre_names:
+        query = query.filter(Book.genres.any(func.lower(Genre.name).in_(genre_names)))
+    if exclude_book_ids:
+        query = query.filter(Book.id.notin_(exclude_book_ids))
+    rows = query.order_by(
+        ratings.c.avg_rating.desc(), ratings.c.ratings_count.desc(), Book.id.desc()
+    ).limit(limit).all()
+
+    return [
+        {
+            "book_id": book.id,
+            "external_id": book.external_id,
+            "title": book.title,
+            "authors": [book.author] if book.author else [],
+            "description": book.description,
+            "genres": [g.name for g in book.genres],
+            "reasoning": f"Rated {float(avg_rating):.1f}/5 by readers of the genres you enjoy.",
+            "score": round(float(avg_rating), 2),
+        }
+        for book, avg_rating in rows
+    ]
+
+
+# ----------------------------------------------------------------------
+# Periodic refresh
+# ----------------------------------------------------------------------
+
+_refresher: Optional[threading.Thread] = None
+
+
+def _acquire_refresh_lock(interval: int) -> bool:
+    """Only one worker per interval refreshes when pools are shared in Redis."""
+    redis_client = get_redis()
+    if redis_client is None:
+        return True
+    try:
+        return bool(redis_client.set(REFRESH_LOCK_KEY, "1", nx=True, ex=max(interval - 1, 1)))
+    except Exception:
+        return True
+
+
+def _refresh_loop(interval: int) -> None:
+    from app.core.database import SessionLocal
+
+    while True:
+        if _acquire_refresh_lock(interval):
+            db = SessionLocal()
+            try:
+                refresh_candidate_pools(db)
+            except Exception as e:
+                logger.error(f"Candidate pool refresh failed: {e}")
+            finally:
+                db.close()
+        time.sleep(interval)
+
+
+def start_candidate_pool_refresher() -> None:
+    """Start the background refresh thread (once per process).
+
+    Disabled when ``CANDIDATE_POOL_REFRESH_SECONDS`` is 0, e.g. in tests or
+    when pools are refreshed by ``scripts/refresh_candidate_pools.py`` cron.
+    """
+    global _refresher
+    interval = settings.CANDIDATE_POOL_REFRESH_SECONDS
+    if interval <= 0 or _refresher is not None:
+        return
+    _refresher = threading.Thread(target=_refresh_loop, args=(interval,), name="candidate-pool-refresh", daemon=True)
+    _refresher.start()
@@ -0,0 +1,251 @@
+"""Local item-item collaborative filtering recommender.
+
+Builds a sparse item-item cosine similarity matrix from the ``reviews`` and
+``user_books`` tables and keeps the top-k neighbors per book.  Serving a
+recommendation is then a handful of dict lookups with no external calls.
+
+Items are keyed as ``book:<id>`` for local books and ``ext:<external_id>``
+for Google Books volumes that are not in the local catalog.
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.review import Review
+from app.models.user_book import StatusEnum, UserBook
+
+logger = logging.getLogger(__name__)
+
+# Implicit weight of a shelved book, relative to a 5-star review (1.0)
+SHELF_WEIGHTS: Dict[str, float] = {
+    StatusEnum.READ.value: 0.6,
+    StatusEnum.READING.value: 0.5,
+    StatusEnum.TO_READ.value: 0.3,
+}
+
+Interaction = Tuple[int, str, float]  # (user_id, item_key, weight)
+Neighbors = Dict[str, List[Tuple[str, float]]]
+
+# In-process model cache: {"neighbors": Neighbors, "built_at": float}
+_model_cache: Dict[str, Any] = {}
+# Held for the duration of a build, so a process builds one model at a time
+_build_lock = threading.Lock()
+
+
+def item_key(book_id: Optional[int], external_book_id: Optional[str]) -> Optional[str]:
+    """Return the item key for a review/user_book row."""
+    if book_id:
+        return f"book:{book_id}"
+    if external_book_id:
+        return f"ext:{external_book_id}"
+    return None
+
+
+def review_weight(rate: int) -> float:
+    """Map a 1-5 star rating to an interaction weight in (0, 1]."""
+    return rate / 5.0
+
+
+def load_interactions(db: Session, user_id: Optional[int] = None) -> List[Interaction]:
+    """Load weighted (user, item) interactions from reviews and user_books.
+
+    A user's weight for an item is the max of their review weight and shelf
+    weight.  External ids of books that exist locally are folded onto the
+    ``book:<id>`` key so both representations share one item.
+    """
+    reviews_q = db.query(Review.user_id, Review.book_id, Review.external_book_id, Review.rate)
+    shelf_q = db.query(UserBook.user_id, UserBook.book_id, UserBook.external_book_id, UserBook.status)
+    if user_id is not None:
+        reviews_q = reviews_q.filter(Review.user_id == user_id)
+        shelf_q = shelf_q.filter(UserBook.user_id == user_id)
+
+    rows: List[Tuple[int, Optional[str], float]] = []
+    for uid, book_id, ext_id, rate in reviews_q:
+        rows.append((uid, item_key(book_id, ext_id), review_weight(rate)))
+    for uid, book_id, ext_id, status in shelf_q:
+        status_value = status.value if hasattr(status, "value") else str(status)
+        rows.append((uid, item_key(book_id, ext_id), SHELF_WEIGHTS.get(status_value, 0.3)))
+
+    external_ids = {key[4:] for _, key, _ in rows if key and key.startswith("ext:")}
+    external_to_local = {
+        f"ext:{ext}": f"book:{book_id}"
+        for book_id, ext in db.query(Book.id, Book.external_id).filter(Book.external_id.in_(external_ids))
+    } if external_ids else {}
+
+    weights: Dict[Tuple[int, str], float] = {}
+    for uid, key, weight in rows:
+        if key is None:
+            continue
+        key = external_to_local.get(key, key)
+        if weight > weights.get((uid, key), 0.0):
+            weights[(uid, key)] = weight
+
+    return [(uid, key, w) for (uid, key), w in weights.items()]
+
+
+def build_item_neighbors(
+    interactions: Iterable[Interaction],
+    top_k: int = settings.CF_TOP_K_NEIGHBORS,
+    max_profile_items: int = settings.CF_MAX_PROFILE_ITEMS,
+) -> Neighbors:
+    """Build the top-k cosine neighbors of every item.
+
+    Co-occurrence is accumulated per user profile, so the cost is
+    ``sum(len(profile) ** 2)`` rather than ``items ** 2``.  Profiles longer
+    than ``max_profile_items`` are truncated to their heaviest items to
+    bound the cost of power users.
+    """
+    profiles: Dict[int, Dict[str, float]] = defaultdict(dict)
+    for uid, key, weight in interactions:
+        profiles[uid][key] = weight
+
+    norms: Dict[str, float] = defaultdict(float)
+    dots: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    for profile in profiles.values():
+        items = heapq.nlargest(max_profile_items, profile.items(), key=lambda kv: kv[1])
+        for key, weight in items:
+            norms[key] += weight * weight
+        for i, (key_a, w_a) in enumerate(items):
+            row_a = dots[key_a]
+            for key_b, w_b in items[i + 1:]:
+                product = w_a * w_b
+                row_a[key_b] += product
+                dots[key_b][key_a] += product
+
+    neighbors: Neighbors = {}
+    for key_a, row in dots.items():
+        if not row:
+            continue
+        norm_a = math.sqrt(norms[key_a])
+        scored = (
+            (key_b, dot / (norm_a * math.sqrt(norms[key_b])))
+            for key_b, dot in row.items()
+        )
+        neighbors[key_a] = heapq.nlargest(top_k, scored, key=lambda kv: kv[1])
+    return neighbors
+
+
+def _build_model(db: Session) -> Neighbors:
+    started = time.perf_counter()
+    neighbors = build_item_neighbors(load_interactions(db))
+    _model_cache["neighbors"] = neighbors
+    _model_cache["built_at"] = time.time()
+    logger.info(
+        f"Item-item model built: {len(neighbors)} items in {time.perf_counter() - started:.3f}s"
+    )
+    return neighbors
+
+
+def _rebuild_in_background() -> None:
+    """Rebuild with a session of its own; runs with ``_build_lock`` held."""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _build_model(db)
+    except Exception as e:
+        logger.error(f"Item-item model rebuild failed, keeping the previous one: {e}")
+    finally:
+        db.close()
+        _build_lock.release()
+
+
+def get_item_neighbors(db: Session, force_rebuild: bool = False) -> Neighbors:
+    """Return the cached neighbor lists.
+
+    The first call (or ``force_rebuild``) builds the model on the caller's
+    thread, and concurrent callers wait for that one build.  Once the model
+    is older than ``CF_MODEL_TTL``, one caller starts a rebuild on a
+    background thread and every caller keeps the stale model until it lands.
+    """
+    neighbors = _model_cache.get("neighbors")
+    if neighbors is not None and not force_rebuild:
+        stale = time.time() - _model_cache.get("built_at", 0.0) >= settings.CF_MODEL_TTL
+        if stale and _build_lock.acquire(blocking=False):
+            threading.Thread(target=_rebuild_in_background, name="cf-model-rebuild", daemon=True).start()
+        return neighbors
+
+    with _build_lock:
+        if not force_rebuild and "neighbors" in _model_cache:
+            return _model_cache["neighbors"]
+        return _build_model(db)
+
+
+def score_items(
+    neighbors: Neighbors,
+    profile: Dict[str, float],
+    exclude: Set[str],
+    limit: int,
+) -> List[Tuple[str, float, str]]:
+    """Score candidate items for a profile.
+
+    Returns ``(item_key, score, because_of)`` tuples, where ``because_of`` is
+    the profile item that contributed most to the score.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    best_source: Dict[str, Tuple[float, str]] = {}
+    for source, weight in profile.items():
+        for candidate, similarity in neighbors.get(source, ()):
+            if candidate in exclude:
+                continue
+            contribution = weight * similarity
+            scores[candidate] += contribution
+            if contribution > best_source.get(candidate, (0.0, ""))[0]:
+                best_source[candidate] = (contribution, source)
+
+    top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+    return [(key, score, best_source[key][1]) for key, score in top]
+
+
+def recommend_for_user(db: Session, user_id: int, limit: int = 5) -> List[Dict[str, Any]]:
+    """Recommend books for a user from the item-item model.
+
+    Books the user has already reviewed or shelved are never returned.
+    """
+    profile = {key: w for _, key, w in load_interactions(db, user_id=user_id)}
+    if not profile:
+        return []
+
+    neighbors = get_item_neighbors(db)
+    ranked = score_items(neighbors, profile, exclude=set(profile), limit=limit)
+    if not ranked:
+        return []
+
+    local_ids = {
+        int(key[5:])
+        for key in [k for k, _, _ in ranked] + [src for _, _, src in ranked]
+        if key.startswith("book:")
+    }
+    books = {
+        b.id: b
+        for b in db.query(Book).options(selectinload(Book.genres)).filter(Book.id.in_(local_ids))
+    } if local_ids else {}
+
+    recommendations = []
+    for key, score, source in ranked:
+        book = books.get(int(key[5:])) if key.startswith("book:") else None
+        source_book = books.get(int(source[5:])) if source.startswith("book:") else None
+        if source_book:
+            reasoning = f"Readers who enjoyed {source_book.title} also enjoyed this book."
+        else:
+            reasoning = "Popular with readers who share your taste."
+        recommendations.append({
+            "book_id": book.id if book else None,
+            "external_id": book.external_id if book else key[4:],
+            "title": book.title if book else None,
+            "authors": [book.author] if book and book.author else [],
+            "description": book.description if book else None,
+            "genres": [g.name for g in book.genres] if book else [],
+            "reasoning": reasoning,
+            "score": round(score, 4),
+        })
+    return recommendations
@@ -0,0 +1,268 @@
+"""TF-IDF content-similarity index over the local book catalog.
+
+Each book is vectorized from its title, genre names and description into a
+sparse, L2-normalized TF-IDF vector.  The top-k cosine neighbors of every
+book are computed in chunks against an inverted index (a chunked sparse
+``X @ X.T``) and stored in ``book_similarities`` so that readers fetch a
+book's neighbors in O(k).
+
+Rebuilds are incremental by default: only books whose
+``content_indexed_at`` is NULL are scored against the catalog, and existing
+neighbor lists are patched when a new book enters their top-k.
+"""
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, UTC
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.book import Book, BookSimilarity
+
+logger = logging.getLogger(__name__)
+
+SparseVector = Dict[str, float]
+
+_TOKEN_RE = re.compile(r"[a-z0-9À-ɏ]{2,}")
+
+STOP_WORDS = frozenset("""
+    a an and are as at be been but by for from has have he her his in into is it its
+    of on or she that the their them they this to was were which who will with you your
+    book books novel story one new about after all also can more most other over than
+    when where what how out up de da do das dos e em o os um uma para com por que se no na
+""".split())
+
+# Below this catalog size no high-frequency terms are pruned from the index
+MIN_DOCS_FOR_DF_PRUNING = 50
+
+# Title and genre terms describe a book more reliably than its blurb.
+FIELD_WEIGHTS = {"title": 2.0, "genre": 2.0, "description": 1.0}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens with stop words removed."""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def book_term_frequencies(book: Book) -> Counter:
+    """Field-weighted raw term frequencies for a book."""
+    counts: Counter = Counter()
+    for token in tokenize(book.title):
+        counts[token] += FIELD_WEIGHTS["title"]
+    for genre in book.genres or []:
+        for token in tokenize(genre.name):
+            counts[token] += FIELD_WEIGHTS["genre"]
+        counts[f"genre:{genre.name.lower()}"] += FIELD_WEIGHTS["genre"]
+    for token in tokenize(book.description):
+        counts[token] += FIELD_WEIGHTS["description"]
+    return counts
+
+
+class TfidfCorpus:
+    """Document frequencies and TF-IDF vectors for a set of books."""
+
+    def __init__(self, term_frequencies: Dict[int, Counter]):
+        self.term_frequencies = term_frequencies
+        self.n_docs = len(term_frequencies)
+        self.document_frequency: Counter = Counter()
+        for counts in term_frequencies.values():
+            self.document_frequency.update(counts.keys())
+        self.vectors: Dict[int, SparseVector] = {
+            book_id: self.vectorize(counts) for book_id, counts in term_frequencies.items()
+        }
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.n_docs) / (1 + self.document_frequency[term])) + 1.0
+
+    def vectorize(self, counts: Counter) -> SparseVector:
+        """Sublinear TF times smoothed IDF, L2-normalized."""
+        vector = {term: (1.0 + math.log(tf)) * self.idf(term) for term, tf in counts.items() if tf > 0}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if not norm:
+            return {}
+        return {term: w / norm for term, w in vector.items()}
+
+    def inverted_index(self, max_df_ratio: float) -> Dict[str, List[Tuple[int, float]]]:
+        """Term -> postings, skipping terms present in most documents.
+
+        Terms above ``max_df_ratio`` contribute little to cosine ranking but
+        dominate the cost of the sparse product, so they are pruned.  Small
+        catalogs are not pruned, since there every shared term matters.
+        """
+        if self.n_docs < MIN_DOCS_FOR_DF_PRUNING:
+            max_df = self.n_docs
+        else:
+            max_df = int(self.n_docs * max_df_ratio)
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for book_id, vector in self.vectors.items():
+            for term, weight in vector.items():
+                if self.document_frequency[term] <= max_df:
+                    postings[term].append((book_id, weight))
+        return postings
+
+
+def top_k_neighbors(
+    corpus: TfidfCorpus,
+    query_ids: Sequence[int],
+    top_k: int = settings.CONTENT_SIMILARITY_TOP_K,
+    chunk_size: int = settings.CONTENT_SIMILARITY_CHUNK_SIZE,
+    min_score: float = settings.CONTENT_SIMILARITY_MIN_SCORE,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """Compute the top-k cosine neighbors of ``query_ids`` against the corpus.
+
+    Rows are processed ``chunk_size`` at a time so the dense score buffer for
+    a chunk stays bounded regardless of catalog size.
+    """
+    postings = corpus.inverted_index(settings.CONTENT_SIMILARITY_MAX_DF)
+    neighbors: Dict[int, List[Tuple[int, float]]] = {}
+
+    for start in range(0, len(query_ids), chunk_size):
+        chunk = query_ids[start:start + chunk_size]
+
+        # Transpose the chunk so each posting list is walked once per chunk
+        chunk_terms: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for book_id in chunk:
+            for term, weight in corpus.vectors.get(book_id, {}).items():
+                chunk_terms[term].append((book_id, weight))
+
+        scores: Dict[int, Dict[int, float]] = {book_id: defaultdict(float) for book_id in chunk}
+        for term, rows in chunk_terms.items():
+            for other_id, other_weight in postings.get(term, ()):
+                for book_id, weight in rows:
+                    if other_id != book_id:
+                        scores[book_id][other_id] += weight * other_weight
+
+        for book_id in chunk:
+            neighbors[book_id] = heapq.nlargest(
+                top_k,
+                ((other_id, s) for other_id, s in scores[book_id].items() if s >= min_score),
+                key=lambda kv: kv[1],
+            )
+    return neighbors
+
+
+def _load_corpus(db: Session) -> Tuple[TfidfCorpus, List[int]]:
+    """Vectorize every book; return the corpus and the ids not yet indexed."""
+    books = db.query(Book).options(selectinload(Book.genres)).all()
+    corpus = TfidfCorpus({book.id: book_term_frequencies(book) for book in books})
+    unindexed = [book.id for book in books if book.content_indexed_at is None]
+    return corpus, unindexed
+
+
+def _insert_neighbors(db: Session, neighbors: Dict[int, List[Tuple[int, float]]]) -> None:
+    rows = [
+        {"book_id": book_id, "similar_book_id": other_id, "score": score}
+        for book_id, pairs in neighbors.items()
+        for other_id, score in pairs
+    ]
+    for start in range(0, len(rows), 1000):
+        db.execute(insert(BookSimilarity), rows[start:start + 1000])
+
+
+def _mark_indexed(db: Session, book_ids: Iterable[int]) -> None:
+    book_ids = list(book_ids)
+    now = datetime.now(UTC)
+    for start in range(0, len(book_ids), 1000):
+        db.query(Book).filter(Book.id.in_(book_ids[start:start + 1000])).update(
+            {Book.content_indexed_at: now}, synchronize_session=False
+        )
+
+
+def rebuild_content_index(db: Session, full: bool = False) -> int:
+    """Rebuild the content-similarity neighbor lists.
+
+    With ``full`` every list is recomputed.  Otherwise only unindexed books
+    are scored, and each existing book whose top-k a new book enters gets
+    that entry merged into its list.  Returns the number of books scored.
+    """
+    corpus, unindexed = _load_corpus(db)
+    query_ids = list(corpus.vectors) if full else unindexed
+    if not query_ids:
+        return 0
+
+    top_k = settings.CONTENT_SIMILARITY_TOP_K
+    neighbors = top_k_neighbors(corpus, query_ids, top_k=top_k)
+
+    if full:
+        db.execute(delete(BookSimilarity))
+    else:
+        db.execute(delete(BookSimilarity).where(BookSimilarity.book_id.in_(query_ids)))
+        _merge_into_existing_lists(db, neighbors, set(query_ids), top_k)
+
+    _insert_neighbors(db, neighbors)
+    _mark_indexed(db, query_ids)
+    db.commit()
+    logger.info(f"Content similarity index updated for {len(query_ids)} books (full={full})")
+    return len(query_ids)
+
+
+def _merge_into_existing_lists(
+    db: Session,
+    new_neighbors: Dict[int, List[Tuple[int, float]]],
+    new_ids: set,
+    top_k: int,
+) -> None:
+    """Offer each new book to the neighbor lists of already-indexed books.
+
+    Cosine similarity is symmetric, so the new book's own top-k tells us
+    which existing books it is close to.
+    """
+    offers: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for new_id, pairs in new_neighbors.items():
+        for other_id, score in pairs:
+            if other_id not in new_ids:
+                offers[other_id].append((new_id, score))
+    if not offers:
+        return
+
+    current: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for row in db.query(BookSimilarity).filter(BookSimilarity.book_id.in_(list(offers))):
+        current[row.book_id].append((row.similar_book_id, row.score))
+
+    db.execute(delete(BookSimilarity).where(BookSimilarity.book_id.in_(list(offers))))
+    merged = {
+        book_id: heapq.nlargest(top_k, current[book_id] + offered, key=lambda kv: kv[1])
+        for book_id, offered in offers.items()
+    }
+    _insert_neighbors(db, merged)
+
+
+def get_similar_books(db: Session, book_id: int, limit: int = 10) -> List[Tuple[Book, float]]:
+    """Return the stored content neighbors of a book, most similar first."""
+    rows = (
+        db.query(Book, BookSimilarity.score)
+        .join(BookSimilarity, BookSimilarity.similar_book_id == Book.id)
+        .options(selectinload(Book.genres))
+        .filter(BookSimilarity.book_id == book_id)
+        .order_by(BookSimilarity.score.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(book, score) for book, score in rows]
+
+
+def get_pairwise_scores(db: Session, book_ids: Iterable[int]) -> Dict[Tuple[int, int], float]:
+    """Stored similarity scores between pairs drawn from ``book_ids``.
+
+    Keys are ``(min_id, max_id)`` so either direction of a stored neighbor
+    maps to the same pair.
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return {}
+    scores: Dict[Tuple[int, int], float] = {}
+    rows = db.query(BookSimilarity).filter(
+        BookSimilarity.book_id.in_(book_ids),
+        BookSimilarity.similar_book_id.in_(book_ids),
+    )
+    for row in rows:
+        pair = (min(row.book_id, row.similar_book_id), max(row.book_id, row.similar_book_id))
+        scores[pair] = max(scores.get(pair, 0.0), row.score)
+    return scores
@@ -0,0 +1,114 @@
+"""HTTP access to the Google Books API with retries.
+
+``get_json`` retries transient failures of these idempotent GETs:
+timeouts, connection errors, 429 and 5xx.  Retries use exponential backoff
+with full jitter and honour ``Retry-After``.  Two limits keep them from
+piling onto an outage:
+
+- a per-call deadline (``GOOGLE_BOOKS_DEADLINE_SECONDS``, or the time
+  left before the request deadline if sooner) caps the total time across
+  attempts, including the waits between them;
+- a cluster-wide retry budget (``app.core.retry_budget``) allows retries
+  only up to ``GOOGLE_BOOKS_RETRY_BUDGET_RATIO`` of the base traffic.
+
+Callers keep their circuit breaker and bulkhead around the whole call, so
+a request that fails after its retries counts as one failure.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from app.core.config import settings
+from app.core.deadline import check_deadline, remaining
+from app.core.redis import get_redis
+from app.core.retry_budget import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Upper bound on a single attempt; the call's deadline may cut it shorter
+REQUEST_TIMEOUT = 10
+
+_retry_budget: Optional[RetryBudget] = None
+_retry_budget_lock = threading.Lock()
+
+
+def _get_retry_budget() -> RetryBudget:
+    global _retry_budget
+    if _retry_budget is None:
+        with _retry_budget_lock:
+            if _retry_budget is None:
+                _retry_budget = RetryBudget(
+                    "google_books",
+                    ratio=settings.GOOGLE_BOOKS_RETRY_BUDGET_RATIO,
+                    min_retries=settings.GOOGLE_BOOKS_RETRY_MIN_PER_WINDOW,
+                    window_seconds=10,
+                    redis_factory=get_redis,
+                )
+    return _retry_budget
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+    ceiling = min(settings.GOOGLE_BOOKS_RETRY_MAX_DELAY, settings.GOOGLE_BOOKS_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def _retry_after(response: requests.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", 0)))
+    except ValueError:  # HTTP-date form; fall back to our own backoff
+        return 0.0
+
+
+def get_json(url: str, params: Dict[str, Any], deadline_seconds: Optional[float] = None) -> Any:
+    """GET ``url`` and return the decoded JSON body, retrying transient errors.
+
+    Raises the last ``requests.RequestException`` once the attempts, the
+    deadline or the retry budget run out; non-retryable errors (4xx other
+    than 429, bad JSON) are raised straight away.
+    """
+    check_deadline()
+    if deadline_seconds is None:
+        deadline_seconds = settings.GOOGLE_BOOKS_DEADLINE_SECONDS
+    request_left = remaining()
+    if request_left is not None:
+        deadline_seconds = min(deadline_seconds, request_left)
+    deadline = time.monotonic() + deadline_seconds
+    budget = _get_retry_budget()
+    budget.record_request()
+
+    attempt = 0
+    while True:
+        attempt += 1
+        timeout = min(REQUEST_TIMEOUT, deadline - time.monotonic())
+        wait = 0.0
+        try:
+            if timeout <= 0:
+                raise requests.Timeout(f"Google Books deadline of {deadline_seconds:.1f}s passed")
+            resp = requests.get(url, params=params, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in RETRYABLE_STATUSES:
+                raise
+            error = e
+            wait = _retry_after(e.response)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            error = e
+
+        if attempt >= settings.GOOGLE_BOOKS_MAX_ATTEMPTS:
+            raise error
+        delay = max(wait, backoff_delay(attempt))
+        if time.monotonic() + delay >= deadline:
+            raise error
+        if not budget.try_spend():
+            logger.warning(f"Google Books retry budget exhausted, not retrying: {error}")
+            raise error
+        logger.info(f"Google Books attempt {attempt} failed ({error}), retrying in {delay:.2f}s")
+        time.sleep(delay)
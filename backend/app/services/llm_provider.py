@@ -0,0 +1,215 @@
+"""Chat model providers for the recommendation service.
+
+The LangChain/OpenAI client is expensive to import and needs
+``OPENAI_API_KEY``, so it is only constructed on the first LLM call instead
+of when ``recommendation_service`` is imported.  ``LLM_PROVIDER`` selects
+the implementation:
+
+- ``openai``: ``ChatOpenAI``, the default.  Without ``OPENAI_API_KEY`` its
+  calls fail, so callers fall back as for any other LLM outage.
+- ``fake``: a deterministic offline model for local runs and tests; it
+  answers in the formats the recommendation prompts ask for, using the
+  candidate books found in the prompt.  It is only used when
+  ``LLM_PROVIDER=fake`` is set explicitly or under the test suite.
+
+Calls made with a ``timeout`` run on a small worker pool and raise
+``LLMTimeoutError`` once it elapses; the timeout is also passed down to the
+HTTP client so the abandoned request is aborted rather than left running.
+"""
+import json
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMConfigurationError(RuntimeError):
+    """The configured provider cannot be constructed."""
+
+
+class LLMTimeoutError(TimeoutError):
+    """The LLM did not answer before the caller's deadline.
+
+    ``running_call`` is the abandoned call when it had already started and
+    is still running on a worker thread, so a bulkhead slot can be held
+    until it ends.
+    """
+
+    running_call: Optional[Future] = None
+
+
+class LLMBusyError(LLMTimeoutError):
+    """The call was not made: too many LLM calls already in flight.
+
+    A subclass of ``LLMTimeoutError`` so callers fall back the same way.
+    """
+
+
+class LLMResponse:
+    """Provider-neutral chat response (mirrors LangChain's ``AIMessage``)."""
+
+    def __init__(self, content: str, usage_metadata: Optional[Dict[str, int]] = None):
+        self.content = content
+        self.usage_metadata = usage_metadata or {}
+
+
+class LLMProvider(ABC):
+    """A chat model that turns a formatted prompt into a response."""
+
+    name: str
+
+    @abstractmethod
+    def invoke(self, prompt: Any, json_mode: bool = False, timeout: Optional[float] = None) -> Any:
+        """Run the model on a LangChain ``PromptValue`` (or message list).
+
+        With ``json_mode`` the model is constrained to emit a JSON object;
+        ``timeout`` bounds the underlying HTTP request in seconds.
+        Returns an object with ``content`` and, when the backend reports
+        it, ``usage_metadata`` with ``input_tokens``, ``output_tokens`` and
+        ``total_tokens``.
+        """
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, model: str = settings.LLM_MODEL, temperature: float = settings.LLM_TEMPERATURE):
+        self.model = model
+        self.temperature = temperature
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not settings.OPENAI_API_KEY:
+                        raise LLMConfigurationError("OPENAI_API_KEY not set in environment")
+                    from langchain_openai import ChatOpenAI
+
+                    # No SDK retries: each attempt would get the full timeout
+                    # and blow the caller's deadline
+                    self._client = ChatOpenAI(
+                        temperature=self.temperature,
+                        model=self.model,
+                        api_key=settings.OPENAI_API_KEY,
+                        max_retries=0,
+                    )
+        return self._client
+
+    def invoke(self, prompt: Any, json_mode: bool = False, timeout: Optional[float] = None) -> Any:
+        client = self._get_client()
+        options: Dict[str, Any] = {}
+        if json_mode:
+            options["response_format"] = {"type": "json_object"}
+        if timeout is not None:
+            options["timeout"] = timeout
+        if options:
+            client = client.bind(**options)
+        return client.invoke(prompt)
+
+
+class FakeLLMProvider(LLMProvider):
+    """Offline stand-in that answers the recommendation prompts plausibly."""
+
+    name = "fake"
+
+    _CANDIDATE_RE = re.compile(r"^ID:\s*(\S+)\s*\nTitle:\s*(.*)\nAuthors:\s*(.*)$", re.MULTILINE)
+    _NUMBERED_RE = re.compile(r"^(\d+)\.\s+(.+)$", re.MULTILINE)
+
+    def invoke(self, prompt: Any, json_mode: bool = False, timeout: Optional[float] = None) -> LLMResponse:
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        candidates = self._CANDIDATE_RE.findall(text)
+        if json_mode:
+            content = json.dumps({"recommendations": [
+                {
+                    "id": book_id,
+                    "title": title.strip(),
+                    "authors": [a.strip() for a in authors.split(",") if a.strip()],
+                    "description": title.strip(),
+                    "reasoning": "Matches the genres you rate highly.",
+                }
+                for book_id, title, authors in candidates[:5]
+            ]})
+        elif candidates:
+            content = "\n\n".join(
+                f"ID: {book_id}\nTitle: {title.strip()}\nAuthors: {authors.strip()}\n"
+                f"Description: {title.strip()}\nWhy recommended: Matches the genres you rate highly."
+                for book_id, title, authors in candidates[:5]
+            )
+        else:
+            numbered = self._NUMBERED_RE.findall(text)
+            content = "\n".join(f"{n}: Similar to books you rated highly." for n, _ in numbered)
+        input_tokens, output_tokens = len(text) // 4, len(content) // 4
+        return LLMResponse(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+
+_PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    FakeLLMProvider.name: FakeLLMProvider,
+}
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_llm_provider() -> LLMProvider:
+    """Return the configured provider, creating it on first use."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                name = settings.LLM_PROVIDER
+                if name not in _PROVIDERS:
+                    raise LLMConfigurationError(f"Unknown LLM_PROVIDER '{name}'")
+                if name == FakeLLMProvider.name:
+                    logger.warning("Using the fake LLM provider; recommendations are not AI generated")
+                elif name == OpenAIProvider.name and not settings.OPENAI_API_KEY:
+                    logger.error("OPENAI_API_KEY not set; LLM calls will fail and fall back to local recommendations")
+                _provider = _PROVIDERS[name]()
+    return _provider
+
+
+def set_llm_provider(provider: Optional[LLMProvider]) -> None:
+    """Override the provider (tests, scripts); None restores the default."""
+    global _provider
+    _provider = provider
+
+
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_WORKERS, thread_name_prefix="llm")
+
+
+class LazyLLM:
+    """Callable handle used by the services in place of a chat model.
+
+    Calling it forwards to ``get_llm_provider()``, so nothing is imported
+    or constructed until the first actual LLM call.
+    """
+
+    def __call__(self, prompt: Any, json_mode: bool = False, timeout: Optional[float] = None) -> Any:
+        provider = get_llm_provider()
+        if timeout is None:
+            return provider.invoke(prompt, json_mode=json_mode)
+        if timeout <= 0:
+            raise LLMTimeoutError("LLM deadline already passed")
+
+        future = _executor.submit(provider.invoke, prompt, json_mode=json_mode, timeout=timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drops the call if it is still queued; a running call is ended
+            # by the HTTP timeout passed to the provider
+            error = LLMTimeoutError(f"LLM call exceeded {timeout:.1f}s deadline")
+            if not future.cancel():
+                error.running_call = future
+            raise error from None
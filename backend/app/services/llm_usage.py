@@ -0,0 +1,145 @@
+"""Token, cost and latency accounting for LLM recommendation calls.
+
+Every event is recorded twice:
+
+- in the process-local metrics (``app.core.metrics``), scraped from
+  ``GET /metrics``;
+- in a Redis hash per UTC day, ``llm_usage:<YYYY-MM-DD>``, summed across
+  workers and kept for ``LLM_USAGE_RETENTION_DAYS`` days, which is what
+  ``GET /api/v1/admin/metrics/llm`` reports.
+
+Redis failures are logged and otherwise ignored; accounting never breaks a
+recommendation request.
+"""
+import logging
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import LATENCY_BUCKETS, bucket_index, increment, observe
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+DAILY_KEY_PREFIX = "llm_usage:"
+
+# Outcomes of an LLM call
+CALL_OK = "ok"
+CALL_TIMEOUT = "timeout"
+CALL_ERROR = "error"
+
+
+def _daily_key(day: datetime) -> str:
+    return f"{DAILY_KEY_PREFIX}{day.strftime('%Y-%m-%d')}"
+
+
+def _record(values: Dict[str, float]) -> None:
+    """Add ``values`` to the in-process counters and today's Redis hash."""
+    for name, amount in values.items():
+        increment(f"llm.{name}", amount)
+
+    redis_client = get_redis()
+    if redis_client is None:
+        return
+    key = _daily_key(datetime.now(UTC))
+    try:
+        pipe = redis_client.pipeline()
+        for name, amount in values.items():
+            if isinstance(amount, int):
+                pipe.hincrby(key, name, amount)
+            else:
+                pipe.hincrbyfloat(key, name, amount)
+        pipe.expire(key, settings.LLM_USAGE_RETENTION_DAYS * 86400)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record LLM usage in Redis: {e}")
+
+
+def record_cache_hit(source: str = "cache") -> None:
+    """A recommendation served without an LLM call (``cache`` or ``reuse``)."""
+    _record({f"{source}_hits": 1})
+
+
+def record_cache_miss() -> None:
+    _record({"cache_misses": 1})
+
+
+def record_breaker_rejection() -> None:
+    """A call skipped because the ``openai`` circuit is open."""
+    _record({"breaker_rejections": 1})
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost from the configured per-1k-token prices."""
+    return (
+        prompt_tokens * settings.LLM_PROMPT_COST_PER_1K
+        + completion_tokens * settings.LLM_COMPLETION_COST_PER_1K
+    ) / 1000
+
+
+def record_call(latency: float, response: Optional[Any] = None, outcome: str = CALL_OK) -> None:
+    """Record one LLM call: latency, outcome and, when reported, token usage."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = int(usage.get("input_tokens", 0))
+    completion_tokens = int(usage.get("output_tokens", 0))
+
+    observe("llm.latency_seconds", latency)
+    values: Dict[str, float] = {
+        "calls": 1,
+        f"calls_{outcome}": 1,
+        "latency_seconds_sum": float(latency),
+        f"latency_bucket_{bucket_index(latency)}": 1,
+    }
+    if prompt_tokens or completion_tokens:
+        values.update({
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": estimate_cost(prompt_tokens, completion_tokens),
+        })
+    _record(values)
+
+
+def _summarize(day: str, raw: Dict[str, str]) -> Dict[str, Any]:
+    def number(name: str) -> float:
+        return float(raw.get(name, 0))
+
+    calls = int(number("calls"))
+    hits = int(number("cache_hits") + number("reuse_hits"))
+    lookups = hits + int(number("cache_misses"))
+    bounds = [*LATENCY_BUCKETS, float("inf")]
+    return {
+        "date": day,
+        "calls": calls,
+        "calls_ok": int(number(f"calls_{CALL_OK}")),
+        "timeouts": int(number(f"calls_{CALL_TIMEOUT}")),
+        "errors": int(number(f"calls_{CALL_ERROR}")),
+        "prompt_tokens": int(number("prompt_tokens")),
+        "completion_tokens": int(number("completion_tokens")),
+        "cost_usd": round(number("cost_usd"), 4),
+        "avg_latency_seconds": round(number("latency_seconds_sum") / calls, 3) if calls else None,
+        "latency_histogram": {
+            ("+Inf" if bound == float("inf") else f"{bound:g}"): int(number(f"latency_bucket_{i}"))
+            for i, bound in enumerate(bounds)
+        },
+        "cache_hits": int(number("cache_hits")),
+        "reuse_hits": int(number("reuse_hits")),
+        "cache_misses": int(number("cache_misses")),
+        "cache_hit_rate": round(hits / lookups, 3) if lookups else None,
+        "breaker_rejections": int(number("breaker_rejections")),
+    }
+
+
+def get_daily_usage(days: int = 7) -> Optional[List[Dict[str, Any]]]:
+    """Per-day usage for the last ``days`` days, newest first; None without Redis."""
+    redis_client = get_redis()
+    if redis_client is None:
+        return None
+    today = datetime.now(UTC)
+    dates = [today - timedelta(days=offset) for offset in range(days)]
+    pipe = redis_client.pipeline()
+    for day in dates:
+        pipe.hgetall(_daily_key(day))
+    return [
+        _summarize(day.strftime("%Y-%m-%d"), raw or {})
+        for day, raw in zip(dates, pipe.execute())
+    ]
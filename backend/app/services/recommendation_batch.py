@@ -0,0 +1,271 @@
+"""Nightly batch generation of LLM recommendations for active users.
+
+Walks the users with ``Review`` or ``UserBook`` activity in the last
+``REC_BATCH_ACTIVE_DAYS`` days in ascending id order and generates their
+recommendations ahead of time, so the first visit after a library change is
+a cache hit instead of a full LLM round trip.
+
+- At most ``concurrency`` LLM calls are in flight; user data is loaded on
+  the calling thread, workers only talk to the LLM.
+- The ``openai`` circuit breaker is checked before every submission.  While
+  it is open the run pauses, and gives up after ``REC_BATCH_MAX_BREAKER_WAIT``
+  seconds (the checkpoint lets the next run pick up from there).
+- No new user is started once this run has spent ``token_budget`` tokens
+  (a resumed run gets a fresh budget); calls already in flight may overshoot it by up to ``concurrency`` calls.
+- Progress is checkpointed in Redis as a low-water mark (every user id at or
+  below it is done) plus the done ids above it, so a crashed run resumes
+  where it stopped.
+"""
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deadline import deadline_scope
+from app.core.redis import get_redis
+from app.models.review import Review
+from app.models.user_book import UserBook
+from app.schemas.review import ReviewResponse
+from app.services.candidate_pools import get_user_genres
+from app.services.llm_provider import LLMBusyError
+from app.services.recommendation_service import (
+    _get_openai_circuit_breaker,
+    generate_book_recommendations_with_usage,
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "recommendation_batch:checkpoint"
+LOCK_KEY = "recommendation_batch:lock"
+
+# Seconds between circuit breaker polls while the circuit is open
+BREAKER_POLL_INTERVAL = 5
+
+
+class BatchAlreadyRunning(Exception):
+    """Another batch run holds the lock."""
+
+
+def active_user_ids(db: Session, since: datetime) -> List[int]:
+    """Ids of users who reviewed or shelved a book since ``since``, ascending."""
+    reviewers = db.query(Review.user_id).filter(
+        or_(Review.created_at >= since, Review.updated_at >= since)
+    )
+    shelvers = db.query(UserBook.user_id).filter(UserBook.updated_at >= since)
+    return sorted({user_id for (user_id,) in reviewers.union(shelvers).all()})
+
+
+def _load_user_inputs(db: Session, user_id: int) -> Tuple[List[ReviewResponse], List[str]]:
+    reviews = db.query(Review).filter(Review.user_id == user_id).all()
+    user_genres = get_user_genres(db, [r.book_id for r in reviews if r.rate >= 3])
+    return [ReviewResponse.model_validate(r) for r in reviews], user_genres
+
+
+class Checkpoint:
+    """Resumable run progress stored in a Redis hash."""
+
+    def __init__(self, redis_client: Any):
+        self.redis_client = redis_client
+        self.run_id = uuid.uuid4().hex
+        self.since: Optional[datetime] = None
+        self.low_water = 0
+        self.done: Set[int] = set()
+        self.tokens = 0
+        self.users_done = 0
+        self.users_failed = 0
+        self.status = "running"
+        self._cursor = 0
+
+    @classmethod
+    def load_or_start(cls, redis_client: Any, since: datetime) -> "Checkpoint":
+        """Resume an unfinished run, or start a new one for ``since``."""
+        checkpoint = cls(redis_client)
+        data = redis_client.hgetall(CHECKPOINT_KEY) or {}
+        if data and data.get("status") != "completed":
+            checkpoint.run_id = data["run_id"]
+            checkpoint.since = datetime.fromisoformat(data["since"])
+            checkpoint.low_water = int(data.get("low_water", 0))
+            checkpoint.done = set(json.loads(data.get("done", "[]")))
+            checkpoint.tokens = int(data.get("tokens", 0))
+            checkpoint.users_done = int(data.get("users_done", 0))
+            checkpoint.users_failed = int(data.get("users_failed", 0))
+            logger.info(f"Resuming recommendation batch {checkpoint.run_id} after user {checkpoint.low_water}")
+        else:
+            checkpoint.since = since
+        return checkpoint
+
+    def is_done(self, user_id: int) -> bool:
+        return user_id <= self.low_water or user_id in self.done
+
+    def mark_done(self, user_id: int, pending: List[int]) -> None:
+        """Record a finished user and advance the low-water mark.
+
+        ``pending`` is the run's ascending work list; the mark moves over
+        its prefix of finished users.
+        """
+        self.done.add(user_id)
+        while self._cursor < len(pending) and pending[self._cursor] in self.done:
+            self.low_water = pending[self._cursor]
+            self.done.discard(self.low_water)
+            self._cursor += 1
+
+    def save(self) -> None:
+        try:
+            self.redis_client.hset(CHECKPOINT_KEY, mapping={
+                "run_id": self.run_id,
+                "since": self.since.isoformat(),
+                "low_water": str(self.low_water),
+                "done": json.dumps(sorted(self.done)),
+                "tokens": str(self.tokens),
+                "users_done": str(self.users_done),
+                "users_failed": str(self.users_failed),
+                "status": self.status,
+                "updated_at": datetime.now(UTC).isoformat(),
+            })
+        except Exception as e:
+            logger.warning(f"Failed to save recommendation batch checkpoint: {e}")
+
+
+def get_batch_status() -> Optional[Dict[str, Any]]:
+    """The last checkpoint written by a batch run, or None."""
+    redis_client = get_redis()
+    if redis_client is None:
+        return None
+    data = redis_client.hgetall(CHECKPOINT_KEY)
+    if not data:
+        return None
+    status = dict(data)
+    status.pop("done", None)
+    return status
+
+
+def is_batch_running() -> bool:
+    redis_client = get_redis()
+    return bool(redis_client is not None and redis_client.exists(LOCK_KEY))
+
+
+def run_batch_in_background() -> None:
+    """Entry point for scheduled/admin-triggered runs with their own session."""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        # Runs after the triggering request's response; its deadline must not apply
+        with deadline_scope(None):
+            run_batch(db)
+    except BatchAlreadyRunning:
+        logger.info("Recommendation batch already running, skipping trigger")
+    except Exception as e:
+        logger.error(f"Recommendation batch failed: {e}")
+    finally:
+        db.close()
+
+
+def _wait_for_breaker(max_wait: float) -> bool:
+    """Block while the openai circuit is open; False if it stays open."""
+    deadline = time.monotonic() + max_wait
+    # Read-only: the probe lease is taken by the generate call itself
+    while not _get_openai_circuit_breaker().state_permits():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(BREAKER_POLL_INTERVAL)
+    return True
+
+
+def run_batch(
+    db: Session,
+    concurrency: int = settings.REC_BATCH_CONCURRENCY,
+    token_budget: int = settings.REC_BATCH_TOKEN_BUDGET,
+    active_days: int = settings.REC_BATCH_ACTIVE_DAYS,
+    max_breaker_wait: float = settings.REC_BATCH_MAX_BREAKER_WAIT,
+    checkpoint_every: int = 20,
+) -> Dict[str, Any]:
+    """Generate and cache recommendations for recently active users.
+
+    Returns the run report: users processed/failed, tokens spent,
+    throughput and the reason the run stopped.
+    """
+    redis_client = get_redis()
+    if redis_client is None:
+        # Results written only to this process' memory would be useless
+        raise RuntimeError("Redis is required for the recommendation batch")
+    if not redis_client.set(LOCK_KEY, "1", nx=True, ex=settings.REC_BATCH_LOCK_TTL):
+        raise BatchAlreadyRunning("A recommendation batch is already running")
+
+    since = datetime.now(UTC) - timedelta(days=active_days)
+    checkpoint = Checkpoint.load_or_start(redis_client, since)
+    started = time.monotonic()
+    tokens_at_start, users_at_start = checkpoint.tokens, checkpoint.users_done
+    pending = [uid for uid in active_user_ids(db, checkpoint.since) if not checkpoint.is_done(uid)]
+    logger.info(f"Recommendation batch {checkpoint.run_id}: {len(pending)} users pending")
+    stop_reason = "completed"
+
+    def _collect(futures: Dict[Future, int]) -> None:
+        """Wait for at least one in-flight user and record the results."""
+        finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+        for future in finished:
+            user_id = futures.pop(future)
+            try:
+                result, tokens = future.result()
+            except LLMBusyError:
+                # Interactive requests hold the OpenAI slots: retry in a later run
+                continue
+            except Exception as e:
+                logger.error(f"Recommendation batch failed for user {user_id}: {e}")
+                checkpoint.users_failed += 1
+            else:
+                checkpoint.tokens += tokens
+                if result is None:
+                    # Circuit opened mid-run: leave the user for a later run
+                    continue
+                checkpoint.users_done += 1
+            checkpoint.mark_done(user_id, pending)
+            if (checkpoint.users_done + checkpoint.users_failed) % checkpoint_every == 0:
+                checkpoint.save()
+
+    in_flight: Dict[Future, int] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rec-batch") as executor:
+            for user_id in pending:
+                while len(in_flight) >= concurrency:
+                    _collect(in_flight)
+                if checkpoint.tokens - tokens_at_start >= token_budget:
+                    stop_reason = "token_budget"
+                    break
+                if not _wait_for_breaker(max_breaker_wait):
+                    stop_reason = "circuit_open"
+                    break
+                reviews, user_genres = _load_user_inputs(db, user_id)
+                future = executor.submit(
+                    generate_book_recommendations_with_usage,
+                    reviews, user_genres, settings.REC_BATCH_CACHE_TTL,
+                )
+                in_flight[future] = user_id
+            while in_flight:
+                _collect(in_flight)
+    finally:
+        checkpoint.status = "completed" if stop_reason == "completed" else "paused"
+        checkpoint.save()
+        redis_client.delete(LOCK_KEY)
+
+    minutes = max(time.monotonic() - started, 1e-9) / 60
+    users = checkpoint.users_done - users_at_start
+    tokens = checkpoint.tokens - tokens_at_start
+    report = {
+        "run_id": checkpoint.run_id,
+        "stop_reason": stop_reason,
+        "users_done": checkpoint.users_done,
+        "users_failed": checkpoint.users_failed,
+        "tokens": checkpoint.tokens,
+        "users_per_minute": round(users / minutes, 2),
+        "tokens_per_minute": round(tokens / minutes, 2),
+    }
+    logger.info(f"Recommendation batch {checkpoint.run_id} finished: {report}")
+    return report
@@ -0,0 +1,182 @@
+"""Reuse of LLM recommendations across users with similar reading profiles.
+
+Many users like the same handful of bestsellers, so their prompts differ
+only in review wording and the exact-match cache never hits.  Each user's
+positively rated books are summarized by a MinHash signature; signatures are
+split into LSH bands and every band is indexed in Redis as
+``rec_reuse:band:<band>:<hash>`` -> set of user ids.  A new request looks up
+the users sharing any band, checks the exact Jaccard similarity of their
+stored profiles, and reuses the best match's recommendations after dropping
+books the requester has already read.
+
+With ``REC_REUSE_BANDS`` bands of ``REC_REUSE_ROWS`` rows, a pair with
+similarity ``s`` becomes a candidate with probability ``1 - (1 - s^r)^b``.
+"""
+import hashlib
+import json
+import logging
+import random
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.collaborative_filtering import item_key
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+BAND_KEY_PREFIX = "rec_reuse:band:"
+PROFILE_KEY_PREFIX = "rec_reuse:user:"
+
+# Users sampled per band bucket; popular buckets can hold thousands
+MAX_CANDIDATES_PER_BAND = 20
+
+_rng = random.Random(1)
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(settings.REC_REUSE_BANDS * settings.REC_REUSE_ROWS)
+]
+
+
+def profile_items(user_reviews: Iterable) -> Set[str]:
+    """Item keys of the books a user rated 3 stars or more."""
+    items = set()
+    for review in user_reviews:
+        if review.rate >= 3:
+            key = item_key(review.book_id, getattr(review, "external_book_id", None))
+            if key:
+                items.add(key)
+    return items
+
+
+def _item_hash(item: str) -> int:
+    return int.from_bytes(hashlib.blake2b(item.encode(), digest_size=4).digest(), "little")
+
+
+def minhash_signature(items: Set[str]) -> List[int]:
+    """MinHash signature with one universal hash per permutation."""
+    hashes = [_item_hash(item) for item in items]
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_keys(signature: List[int]) -> List[str]:
+    rows = settings.REC_REUSE_ROWS
+    keys = []
+    for band in range(settings.REC_REUSE_BANDS):
+        chunk = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.md5(",".join(map(str, chunk)).encode()).hexdigest()[:16]
+        keys.append(f"{BAND_KEY_PREFIX}{band}:{digest}")
+    return keys
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def recommendation_ids(recommendation: Dict[str, Any]) -> Set[str]:
+    """Every ID form a recommendation can be matched on."""
+    ids = set()
+    if recommendation.get("book_id"):
+        ids.add(f"book:{recommendation['book_id']}")
+    if recommendation.get("external_id"):
+        ids.add(recommendation["external_id"])
+    return ids
+
+
+def filter_read_recommendations(
+    recommendations: List[Dict[str, Any]], read_ids: Set[str]
+) -> List[Dict[str, Any]]:
+    """Drop recommendations for books the user has already read."""
+    return [rec for rec in recommendations if not recommendation_ids(rec) & read_ids]
+
+
+def _read_ids(user_reviews: Iterable) -> Set[str]:
+    """Every ID form a recommendation for an already-read book may carry."""
+    read = set()
+    for review in user_reviews:
+        if review.book_id:
+            read.add(f"book:{review.book_id}")
+        external_id = getattr(review, "external_book_id", None)
+        if external_id:
+            read.add(external_id)
+    return read
+
+
+def find_reusable_recommendations(user_id: int, user_reviews: List) -> Optional[List[Dict[str, Any]]]:
+    """Recommendations generated for a similar user, filtered for this one.
+
+    Returns None when Redis is unavailable, no stored profile reaches
+    ``REC_REUSE_JACCARD_THRESHOLD``, or too few recommendations survive
+    filtering.
+    """
+    items = profile_items(user_reviews)
+    if len(items) < settings.REC_REUSE_MIN_PROFILE_ITEMS:
+        return None
+    redis_client = get_redis()
+    if redis_client is None:
+        return None
+
+    try:
+        pipe = redis_client.pipeline()
+        for key in band_keys(minhash_signature(items)):
+            pipe.srandmember(key, MAX_CANDIDATES_PER_BAND)
+        candidates = {member for members in pipe.execute() for member in members or ()}
+        candidates.discard(str(user_id))
+        if not candidates:
+            return None
+
+        candidate_ids = sorted(candidates)
+        pipe = redis_client.pipeline()
+        for candidate in candidate_ids:
+            pipe.hgetall(f"{PROFILE_KEY_PREFIX}{candidate}")
+        profiles = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Recommendation reuse lookup failed: {e}")
+        return None
+
+    best: Optional[Tuple[float, str]] = None
+    for candidate, profile in zip(candidate_ids, profiles):
+        if not profile or "items" not in profile:
+            continue
+        similarity = jaccard(items, set(json.loads(profile["items"])))
+        if similarity >= settings.REC_REUSE_JACCARD_THRESHOLD and (best is None or similarity > best[0]):
+            best = (similarity, profile["recommendations"])
+    if best is None:
+        return None
+
+    kept = filter_read_recommendations(json.loads(best[1]), _read_ids(user_reviews))
+    if len(kept) < settings.REC_REUSE_MIN_RESULTS:
+        return None
+    logger.info(f"Reusing recommendations for user {user_id} (jaccard={best[0]:.2f}, kept={len(kept)})")
+    return kept
+
+
+def store_recommendations(user_id: int, user_reviews: List, recommendations: List[Dict[str, Any]]) -> None:
+    """Index a user's profile and freshly generated recommendations."""
+    items = profile_items(user_reviews)
+    if len(items) < settings.REC_REUSE_MIN_PROFILE_ITEMS:
+        return
+    redis_client = get_redis()
+    if redis_client is None:
+        return
+
+    ttl = settings.REC_REUSE_TTL
+    profile_key = f"{PROFILE_KEY_PREFIX}{user_id}"
+    try:
+        pipe = redis_client.pipeline()
+        pipe.delete(profile_key)
+        pipe.hset(profile_key, mapping={"items": json.dumps(sorted(items)), "recommendations": json.dumps(recommendations)})
+        pipe.expire(profile_key, ttl)
+        for key in band_keys(minhash_signature(items)):
+            pipe.sadd(key, str(user_id))
+            pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to index recommendations for reuse: {e}")
@@ -1,18 +1,25 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
 from app.schemas.review import ReviewResponse
 from app.core.config import settings
 from app.core.redis import get_redis
 from app.core.rate_limiter import GlobalRateLimiter
-from app.core.circuit_breaker import CircuitBreaker
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.bulkhead import get_google_books_bulkhead, get_openai_bulkhead
+from app.core import deadline as request_deadline
+from app.services.content_similarity import get_pairwise_scores
+from app.services.candidate_pools import get_candidates, get_user_genres, top_rated_in_genres
+from app.services.recommendation_reuse import find_reusable_recommendations, store_recommendations
+from app.services.llm_provider import LazyLLM, LLMBusyError, LLMTimeoutError
+from app.services import google_books
+from app.services import llm_usage
+from app.schemas.recommendation import LLMRecommendationList
+from app.core.metrics import increment
+from pydantic import ValidationError
 import os
 import logging
-import requests
 import time
 import hashlib
 import json
 from typing import Dict, Any, Optional, List, Tuple
-from dotenv import load_dotenv
 from sqlalchemy.orm import Session, selectinload
 from app.models.book import Book
 from app.models.review import Review
@@ -21,19 +28,13 @@ import re
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
-openai_key = os.getenv("OPENAI_API_KEY")
-if openai_key:
-    os.environ["OPENAI_API_KEY"] = openai_key
-else:
-    raise ValueError("OPENAI_API_KEY not set in environment")
-
-llm = ChatOpenAI(temperature=0.3, model="gpt-3.5-turbo")
+# Chat model handle; the provider (and LangChain) is loaded on first call
+llm = LazyLLM()
 
 # Simple in-memory cache for recommendations
 _recommendations_cache: Dict[str, Dict[str, Any]] = {}
 CACHE_TTL = 3600  # 1 hour cache
+RECOMMENDATIONS_CACHE_PREFIX = "recommendations:v2:"
 
 def _get_google_books_global_limiter() -> GlobalRateLimiter:
     """Return a GlobalRateLimiter for Google Books API calls."""
@@ -43,26 +44,27 @@ def _get_google_books_global_limiter() -> GlobalRateLimiter:
         max_requests=settings.GOOGLE_BOOKS_GLOBAL_RATE_LIMIT,
         window_seconds=60,
         key="global_rate_limit:google_books",
+        mode=settings.GOOGLE_BOOKS_RATE_LIMIT_MODE,
     )
 
 
 def _get_google_books_circuit_breaker() -> CircuitBreaker:
-    """Return a CircuitBreaker instance for Google Books API."""
-    return CircuitBreaker(
-        name="google_books",
+    """Return the shared CircuitBreaker for Google Books API."""
+    return get_circuit_breaker(
+        "google_books",
         failure_threshold=settings.CB_GOOGLE_FAILURE_THRESHOLD,
         recovery_timeout=settings.CB_GOOGLE_RECOVERY_TIMEOUT,
-        redis_client=get_redis(),
+        slow_call_duration=settings.CB_GOOGLE_SLOW_CALL_SECONDS,
     )
 
 
 def _get_openai_circuit_breaker() -> CircuitBreaker:
-    """Return a CircuitBreaker instance for OpenAI API."""
-    return CircuitBreaker(
-        name="openai",
+    """Return the shared CircuitBreaker for OpenAI API."""
+    return get_circuit_breaker(
+        "openai",
         failure_threshold=settings.CB_OPENAI_FAILURE_THRESHOLD,
         recovery_timeout=settings.CB_OPENAI_RECOVERY_TIMEOUT,
-        redis_client=get_redis(),
+        slow_call_duration=settings.CB_OPENAI_SLOW_CALL_SECONDS,
     )
 
 
@@ -70,7 +72,7 @@ def get_google_books_by_genre(genres: List[str], max_results: int = 20) -> List[
     """Fetch books from Google Books API based on genres."""
     # Check circuit breaker
     cb = _get_google_books_circuit_breaker()
-    if not cb.is_call_permitted():
+    if not cb.state_permits():
         logger.warning("Google Books circuit breaker open, returning empty list")
         return []
 
@@ -94,10 +96,20 @@ def get_google_books_by_genre(genres: List[str], max_results: int = 20) -> List[
     if GOOGLE_BOOKS_API_KEY:
         params["key"] = GOOGLE_BOOKS_API_KEY
 
+    if not cb.acquire_probe():
+        logger.warning("Google Books circuit breaker probe in progress, returning empty list")
+        return []
+    bulkhead = get_google_books_bulkhead()
+    if not bulkhead.try_acquire():
+        cb.release_probe()
+        logger.warning("Too many Google Books calls in flight, returning empty list")
+        return []
+
+    started = time.monotonic()
     try:
-        resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        with bulkhead.held():
+            data = google_books.get_json(GOOGLE_BOOKS_API_URL, params)
+        elapsed = time.monotonic() - started
 
         books = []
         for item in data.get("items", []):
@@ -114,40 +126,197 @@ def get_google_books_by_genre(genres: List[str], max_results: int = 20) -> List[
                 "pageCount": info.get("pageCount"),
                 "language": info.get("language")
             })
-        cb.record_success()
+        cb.record_success(elapsed)
         return books
     except Exception:
-        cb.record_failure()
+        cb.record_failure(time.monotonic() - started)
         return []
+    finally:
+        cb.release_probe()
 
 def create_cache_key(user_reviews: List[ReviewResponse]) -> str:
     """Create a cache key based on user reviews."""
     reviews_data = [{"book_id": r.book_id, "rate": r.rate, "content": r.content} for r in user_reviews]
+    # Order-independent: reviews come back from the DB in no particular order
+    reviews_data.sort(key=lambda r: json.dumps(r, sort_keys=True))
     reviews_json = json.dumps(reviews_data, sort_keys=True)
     return hashlib.md5(reviews_json.encode()).hexdigest()
 
-def get_cached_recommendations(cache_key: str) -> Optional[str]:
-    """Get recommendations from cache if available and not expired."""
+def get_cached_recommendations(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Get parsed recommendations from cache if available and not expired.
+
+    Checks the in-process cache first, then the Redis copy shared by all
+    workers (and filled by the nightly batch runner).  Entries were
+    validated before they were cached, so they are not parsed again.
+    """
     cached_data = _recommendations_cache.get(cache_key)
     
     if cached_data:
         current_time = time.time()
-        if current_time - cached_data["timestamp"] < CACHE_TTL:
+        if current_time < cached_data["expires_at"]:
             return cached_data["data"]
         else:
             del _recommendations_cache[cache_key]
+
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            raw = redis_client.get(f"{RECOMMENDATIONS_CACHE_PREFIX}{cache_key}")
+            if raw:
+                data = json.loads(raw)
+                _recommendations_cache[cache_key] = {"data": data, "expires_at": time.time() + CACHE_TTL}
+                return data
+        except Exception as e:
+            logger.warning(f"Recommendation cache read failed: {e}")
     
     return None
 
-def set_cached_recommendations(cache_key: str, data: str):
-    """Cache recommendations with timestamp."""
+def set_cached_recommendations(cache_key: str, data: List[Dict[str, Any]], ttl: int = CACHE_TTL):
+    """Cache parsed recommendations in-process and in Redis for ``ttl`` seconds."""
     _recommendations_cache[cache_key] = {
         "data": data,
-        "timestamp": time.time()
+        "expires_at": time.time() + min(ttl, CACHE_TTL)
     }
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(f"{RECOMMENDATIONS_CACHE_PREFIX}{cache_key}", json.dumps(data), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Recommendation cache write failed: {e}")
+
+# ------------------------------------------------------------------
+# Graph style classes
+# ------------------------------------------------------------------
+# Nodes and edges are built referencing a style class key.  The legacy
+# response inlines the full style dicts on every element; the compact
+# response sends each class once in a legend.
+
+NODE_STYLE_CLASSES: Dict[str, Dict[str, Any]] = {
+    "book": {
+        "style": {
+            "background": "#001f3f",
+            "border": "2px solid #00aaff",
+            "borderRadius": "8px",
+            "padding": "12px",
+            "minWidth": "160px",
+            "color": "#e0f0ff"
+        }
+    },
+    "ai-recommendation": {
+        "style": {
+            "background": "#4a0e4e",
+            "border": "2px solid #e879f9",
+            "borderRadius": "8px",
+            "padding": "12px",
+            "minWidth": "160px",
+            "color": "#f8bbff"
+        }
+    },
+}
 
-def create_book_recommendation_graph(db: Session, user_id: int) -> Dict[str, Any]:
-    """Create a recommendation graph with direct book-to-book edges."""
+
+def _edge_style_class(color: str, stroke_width: int, label_alpha: float) -> Dict[str, Any]:
+    """Build the style/labelStyle/labelBgStyle triple for an edge class."""
+    color_rgba = f"rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, {label_alpha})"
+    return {
+        "style": {"stroke": color, "strokeWidth": stroke_width},
+        "labelStyle": {
+            "fill": "#ffffff",
+            "fontWeight": 700,
+            "fontSize": "13px",
+            "background": color_rgba,
+            "padding": "2px 4px",
+            "borderRadius": "4px"
+        },
+        "labelBgStyle": {"fill": color_rgba, "fillOpacity": 0.9}
+    }
+
+
+# label -> (style class key, color, strength)
+SIMILARITY_EDGE_KINDS: Dict[str, Tuple[str, str, int]] = {
+    "Same Author": ("same-author", "#00aaff", 3),
+    "Same Genres": ("same-genres", "#fc9957", 3),
+    "Similar Genre": ("similar-genre", "#60a5fa", 2),
+    "Similar Category": ("similar-category", "#60a5fa", 1),
+    "Same Universe": ("same-universe", "#fa8537", 3),
+    "Similar Style": ("similar-style", "#3F8EF3", 2),
+}
+
+EDGE_STYLE_CLASSES: Dict[str, Dict[str, Any]] = {
+    key: _edge_style_class(color, strength, 0.8)
+    for key, color, strength in SIMILARITY_EDGE_KINDS.values()
+}
+EDGE_STYLE_CLASSES["ai-recommended"] = _edge_style_class("#e879f9", 3, 0.9)
+
+
+def _expand_graph_styles(graph: Dict[str, Any]) -> Dict[str, Any]:
+    """Inline the style class of every node and edge (legacy response shape)."""
+    nodes = []
+    for node in graph["nodes"]:
+        node = dict(node)
+        style_class = node.pop("class")
+        nodes.append({**node, **NODE_STYLE_CLASSES[style_class]})
+    edges = []
+    for edge in graph["edges"]:
+        edge = dict(edge)
+        style_class = edge.pop("class")
+        edges.append({**edge, **EDGE_STYLE_CLASSES[style_class]})
+    return {**graph, "nodes": nodes, "edges": edges}
+
+
+def _compact_graph(graph: Dict[str, Any], columnar: bool = False) -> Dict[str, Any]:
+    """Return the compact wire format of a graph built with style class keys.
+
+    Style classes actually used are sent once under ``legend``.  With
+    ``columnar`` the node positions are moved into parallel ``x``/``y``
+    arrays aligned with the ``nodes`` list, and edges become parallel
+    ``source``/``target``/``class`` arrays: endpoints are indexes into
+    ``nodes``, each edge class's label moves to its legend entry and edge
+    ids are left for the client to derive from the endpoints.
+    """
+    node_classes = {n["class"] for n in graph["nodes"]}
+    edge_classes = {e["class"] for e in graph["edges"]}
+    compact: Dict[str, Any] = {
+        **graph,
+        "format": "compact",
+        "legend": {
+            "nodes": {k: NODE_STYLE_CLASSES[k] for k in sorted(node_classes)},
+            "edges": {k: EDGE_STYLE_CLASSES[k] for k in sorted(edge_classes)},
+        },
+    }
+    if columnar:
+        compact["nodes"] = [
+            {k: v for k, v in node.items() if k != "position"} for node in graph["nodes"]
+        ]
+        compact["positions"] = {
+            "x": [n["position"]["x"] for n in graph["nodes"]],
+            "y": [n["position"]["y"] for n in graph["nodes"]],
+        }
+        node_index = {node["id"]: i for i, node in enumerate(graph["nodes"])}
+        labels = {e["class"]: e["label"] for e in graph["edges"]}
+        compact["legend"]["edges"] = {
+            k: {**style, "label": labels[k]} for k, style in compact["legend"]["edges"].items()
+        }
+        compact["edges"] = {
+            "source": [node_index[e["source"]] for e in graph["edges"]],
+            "target": [node_index[e["target"]] for e in graph["edges"]],
+            "class": [e["class"] for e in graph["edges"]],
+        }
+    return compact
+
+
+def create_book_recommendation_graph(
+    db: Session,
+    user_id: int,
+    compact: bool = False,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """Create a recommendation graph with direct book-to-book edges.
+
+    By default every node and edge carries its full style dicts.  With
+    ``compact`` the style classes are sent once in a legend and elements
+    reference them by key (see ``_compact_graph``).
+    """
     print(f"🔍 Creating graph for user_id: {user_id}")
     
     # Get user's reviews and books
@@ -203,19 +372,13 @@ def create_book_recommendation_graph(db: Session, user_id: int) -> Dict[str, Any
                 "rating": rating,
                 "genre": ", ".join([g.name for g in book.genres]) if book.genres else "General"
             },
-            "style": {
-                "background": "#001f3f",
-                "border": "2px solid #00aaff",
-                "borderRadius": "8px",
-                "padding": "12px",
-                "minWidth": "160px",
-                "color": "#e0f0ff"
-            }
+            "class": "book"
         }
         nodes.append(node)
     
     # Create direct book-to-book edges for similarities
-    edges.extend(_create_direct_similarity_edges(books, user_reviews, user_id))
+    content_scores = get_pairwise_scores(db, [book.id for book in books])
+    edges.extend(_create_direct_similarity_edges(books, user_reviews, user_id, content_scores))
     
     # Get additional recommendations from AI
     print("🤖 Getting AI recommendations...")
@@ -240,14 +403,7 @@ def create_book_recommendation_graph(db: Session, user_id: int) -> Dict[str, Any
                 "reasoning": rec.get("reasoning", "AI recommended based on your reading preferences"),
                 "is_recommendation": True
             },
-            "style": {
-                "background": "#4a0e4e",
-                "border": "2px solid #e879f9",
-                "borderRadius": "8px",
-                "padding": "12px",
-                "minWidth": "160px",
-                "color": "#f8bbff"
-            }
+            "class": "ai-recommendation"
         }
         nodes.append(node)
         
@@ -260,25 +416,29 @@ def create_book_recommendation_graph(db: Session, user_id: int) -> Dict[str, Any
                     "source": f"book-{book.id}-{user_id}",
                     "target": f"ai-rec-{i}",
                     "label": "AI Recommended",
-                    "style": {"stroke": "#e879f9", "strokeWidth": 3},
-                    "labelStyle": {
-                        "fill": "#ffffff",
-                        "fontWeight": 700,
-                        "fontSize": "13px",
-                        "background": "rgba(232, 121, 249, 0.9)",
-                        "padding": "2px 4px",
-                        "borderRadius": "4px"
-                    },
-                    "labelBgStyle": {"fill": "rgba(232, 121, 249, 0.9)", "fillOpacity": 0.9}
+                    "class": "ai-recommended"
                 }
                 edges.append(edge)
                 break  # Only connect one high-rated book per AI recommendation
     
-    return {"nodes": nodes, "edges": edges, "message": "Graph generated successfully"}
+    graph = {"nodes": nodes, "edges": edges, "message": "Graph generated successfully"}
+    if compact:
+        return _compact_graph(graph, columnar=columnar)
+    return _expand_graph_styles(graph)
+
+def _create_direct_similarity_edges(
+    books: List[Book],
+    user_reviews: List[Review],
+    user_id: int,
+    content_scores: Optional[Dict[Tuple[int, int], float]] = None,
+) -> List[Dict[str, Any]]:
+    """Create direct book-to-book edges based on similarities.
 
-def _create_direct_similarity_edges(books: List[Book], user_reviews: List[Review], user_id: int) -> List[Dict[str, Any]]:
-    """Create direct book-to-book edges based on similarities."""
+    ``content_scores`` holds precomputed TF-IDF similarities keyed by
+    ``(min_id, max_id)`` (see ``content_similarity.get_pairwise_scores``).
+    """
     edges = []
+    content_scores = content_scores or {}
     
     for i, book1 in enumerate(books):
         for book2 in books[i+1:]:
@@ -352,19 +512,10 @@ def _create_direct_similarity_edges(books: List[Book], user_reviews: List[Review
                    _is_obvious_series(book1.title, book2.title):
                     similarities.append(("Same Universe", "#fa8537", 3))
             
-            # Similar style - only if genres are compatible and descriptions are very similar
-            if (book1.description and book2.description and 
-                _check_similar_style(book1.description, book2.description) and
-                book1_genres and book2_genres):
-                # Additional genre compatibility check for style connections
-                is_style_compatible = True
-                for genre1 in book1_genres:
-                    for genre2 in book2_genres:
-                        if genre1 in incompatible_genres and genre2 in incompatible_genres[genre1]:
-                            is_style_compatible = False
-                            break
-                if is_style_compatible:
-                    similarities.append(("Similar Style", "#3F8EF3", 2))
+            # Similar style - precomputed content similarity, only if genres are compatible
+            content_score = content_scores.get((min(book1.id, book2.id), max(book1.id, book2.id)), 0.0)
+            if not is_incompatible and content_score >= settings.CONTENT_SIMILARITY_STYLE_THRESHOLD:
+                similarities.append(("Similar Style", "#3F8EF3", 2))
             
             # Create edge for strongest similarity
             if similarities:
@@ -378,25 +529,13 @@ def _create_direct_similarity_edges(books: List[Book], user_reviews: List[Review
                 print(f"   Book2 genres: {[g.name for g in book2.genres] if book2.genres else 'None'}")
                 print(f"   All similarities found: {[s[0] for s in similarities]}")
                 
-                # Convert hex color to rgba format like the working mock data
-                color_rgba = f"rgba({int(strongest[1][1:3], 16)}, {int(strongest[1][3:5], 16)}, {int(strongest[1][5:7], 16)}, 0.8)"
-                
                 # Use consistent node ID format with user_id
                 edge = {
                     "id": f"edge-{book1.id}-{book2.id}-{user_id}",
                     "source": f"book-{book1.id}-{user_id}",
                     "target": f"book-{book2.id}-{user_id}",
                     "label": strongest[0],
-                    "style": {"stroke": strongest[1], "strokeWidth": strongest[2]},
-                    "labelStyle": {
-                        "fill": "#ffffff",
-                        "fontWeight": 700,
-                        "fontSize": "13px",
-                        "background": color_rgba,
-                        "padding": "2px 4px",
-                        "borderRadius": "4px"
-                    },
-                    "labelBgStyle": {"fill": color_rgba, "fillOpacity": 0.9}
+                    "class": SIMILARITY_EDGE_KINDS[strongest[0]][0]
                 }
                 edges.append(edge)
     
@@ -659,88 +798,152 @@ def _get_ai_book_recommendations(user_reviews: List[Review], db: Session) -> Lis
         ))
     
     # Get AI recommendations using existing function
-    ai_result = generate_book_recommendations(review_responses)
-    
-    # Parse AI recommendations to extract book data
-    recommendations = _parse_ai_recommendations(ai_result)
-    
-    return recommendations
+    user_genres = get_user_genres(db, [r.book_id for r in user_reviews if r.rate >= 3])
+    try:
+        recommendations = generate_book_recommendations(review_responses, user_genres) or []
+    except LLMTimeoutError:
+        read_book_ids = {r.book_id for r in user_reviews if r.book_id}
+        recommendations = top_rated_in_genres(db, user_genres, read_book_ids)
+
+    # Graph node format
+    return [
+        {
+            "external_id": rec["external_id"] or f"book:{rec['book_id']}",
+            "title": rec["title"],
+            "author": ", ".join(rec["authors"]),
+            "description": rec["description"],
+            "reasoning": rec["reasoning"],
+            "genre": "AI Recommended",
+            "rating": None,
+        }
+        for rec in recommendations
+    ]
+
+def token_usage(message: Any) -> int:
+    """Total tokens reported by an LLM response, or 0 when not reported."""
+    usage = getattr(message, "usage_metadata", None)
+    if isinstance(usage, dict):
+        return int(usage.get("total_tokens", 0))
+    return 0
+
+
+def _strip_code_fence(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```"):
+        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content)
+    return content
 
-def _parse_ai_recommendations(ai_result: str) -> List[Dict[str, Any]]:
-    """Parse AI recommendation text to extract book data."""
+
+def parse_llm_recommendations(content: str, candidates: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Validate a JSON-mode response once and map it onto the candidates.
+
+    Returns None, and counts the response as malformed, when it does not
+    match ``LLMRecommendationList``.  Recommendations whose ID is not one of
+    the prompt's candidates are dropped.
+    """
+    try:
+        parsed = LLMRecommendationList.model_validate_json(_strip_code_fence(content))
+    except ValidationError as e:
+        increment("llm.malformed_responses")
+        logger.warning(f"Malformed LLM recommendation response: {e.error_count()} errors")
+        return None
+
+    by_id = {c["external_id"]: c for c in candidates}
     recommendations = []
-    
-    # Split by ID: pattern to separate books
-    book_sections = re.split(r'ID:\s*', ai_result)
-    
-    for section in book_sections[1:]:  # Skip first empty section
-        try:
-            lines = section.strip().split('\n')
-            if len(lines) < 4:
-                continue
-                
-            external_id = lines[0].strip()
-            title = lines[1].replace('Title:', '').strip() if lines[1].startswith('Title:') else lines[1].strip()
-            authors = lines[2].replace('Authors:', '').strip() if lines[2].startswith('Authors:') else lines[2].strip()
-            
-            # Find description and reason
-            description_line = next((line for line in lines if line.startswith('Description:')), '')
-            description = description_line.replace('Description:', '').strip() if description_line else ''
-            
-            # Find the "Why recommended" reasoning
-            reason_line = next((line for line in lines if line.startswith('Why recommended:')), '')
-            reasoning = reason_line.replace('Why recommended:', '').strip() if reason_line else ''
-            
-            # If no explicit reasoning found, look for it in surrounding text
-            if not reasoning:
-                for line in lines:
-                    if 'recommend' in line.lower() and not line.startswith(('ID:', 'Title:', 'Authors:', 'Description:')):
-                        reasoning = line.strip()
-                        break
-            
-            recommendation = {
-                "external_id": external_id,
-                "title": title,
-                "author": authors,
-                "description": description,
-                "reasoning": reasoning,
-                "genre": "AI Recommended",
-                "rating": None
-            }
-            recommendations.append(recommendation)
-            
-        except Exception:
+    for rec in parsed.recommendations:
+        candidate = by_id.get(rec.id)
+        if candidate is None:
+            increment("llm.unknown_recommendation_ids")
             continue
-    
+        recommendations.append({
+            "book_id": candidate.get("book_id"),
+            "external_id": None if rec.id.startswith("book:") else rec.id,
+            "title": rec.title,
+            "authors": rec.authors or candidate.get("authors") or [],
+            "description": rec.description or candidate.get("description") or "",
+            "genres": candidate.get("categories") or [],
+            "reasoning": rec.reasoning,
+            "score": None,
+        })
     return recommendations
 
-def generate_book_recommendations(user_reviews: List[ReviewResponse]) -> Optional[str]:
-    """Generate book recommendations. Returns None when OpenAI circuit is open."""
-    # Check OpenAI circuit breaker first
+
+def generate_book_recommendations(
+    user_reviews: List[ReviewResponse],
+    user_genres: Optional[List[str]] = None,
+    deadline: Optional[float] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Generate book recommendations. Returns None when OpenAI circuit is open.
+
+    Recommendations are dicts in the same shape as the local recommender's
+    (``book_id``, ``external_id``, ``title``, ``authors``, ``description``,
+    ``genres``, ``reasoning``, ``score``).  An empty list means there was
+    nothing to recommend or the model's response was unusable.
+
+    Candidates come from the precomputed per-genre pools (see
+    ``candidate_pools``) for ``user_genres``, so building the prompt makes no
+    outbound HTTP call; the only external call is the LLM itself.
+
+    ``deadline`` is a ``time.monotonic()`` timestamp (default: now plus
+    ``LLM_DEADLINE_SECONDS``), capped by the request deadline if there is one.  If the LLM has not answered by then the call
+    is cancelled, counted as a slow call on the ``openai`` breaker, and
+    ``LLMTimeoutError`` is raised so the caller can fall back to
+    ``top_rated_in_genres``.  ``LLMBusyError`` (a subclass) is raised
+    without calling the LLM when the ``openai`` bulkhead is full.
+    """
+    return generate_book_recommendations_with_usage(user_reviews, user_genres, deadline=deadline)[0]
+
+
+def generate_book_recommendations_with_usage(
+    user_reviews: List[ReviewResponse],
+    user_genres: Optional[List[str]] = None,
+    cache_ttl: int = CACHE_TTL,
+    deadline: Optional[float] = None,
+) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+    """Like ``generate_book_recommendations`` but also return the tokens spent.
+
+    Cache hits and reused recommendations cost 0 tokens.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + settings.LLM_DEADLINE_SECONDS
+    deadline = request_deadline.cap(deadline)
+
+    # Check OpenAI circuit breaker first (read-only: the cache, reuse and
+    # empty paths below make no call, so the probe lease is taken later)
     openai_cb = _get_openai_circuit_breaker()
-    if not openai_cb.is_call_permitted():
+    if not openai_cb.state_permits():
         logger.warning("OpenAI circuit breaker open, skipping recommendation generation")
-        return None
+        llm_usage.record_breaker_rejection()
+        return None, 0
 
     # Check cache first
     cache_key = create_cache_key(user_reviews)
     cached_result = get_cached_recommendations(cache_key)
     if cached_result:
-        return cached_result
+        llm_usage.record_cache_hit()
+        return cached_result, 0
 
     # Filter for positive ratings only (3+ stars)
     positive_reviews = [r for r in user_reviews if r.rate >= 3]
 
     if not positive_reviews:
-        return "No positive reviews found. Please rate some books you enjoyed to get better recommendations."
+        return [], 0
+
+    # Reuse recommendations generated for a user with a near-identical profile
+    user_id = user_reviews[0].user_id
+    reused = find_reusable_recommendations(user_id, user_reviews)
+    if reused:
+        set_cached_recommendations(cache_key, reused, cache_ttl)
+        llm_usage.record_cache_hit("reuse")
+        return reused, 0
+    llm_usage.record_cache_miss()
 
-    # Extract genres from positive reviews to search Google Books
-    all_genres = []
-    for review in positive_reviews:
-        all_genres.extend(["fiction", "literature", "bestseller"])
+    # Candidates the user has not reviewed yet, from their genres' pools
+    read_book_ids = {r.book_id for r in user_reviews if r.book_id}
+    read_external_ids = {r.external_book_id for r in user_reviews if getattr(r, "external_book_id", None)}
+    candidates = get_candidates(user_genres or [], read_book_ids, read_external_ids, limit=15)
 
-    # Get books from Google Books API
-    google_books = get_google_books_by_genre(list(set(all_genres)), max_results=30)
+    from langchain_core.prompts import ChatPromptTemplate
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are an expert book recommendation engine. Analyze the user's
@@ -755,19 +958,13 @@ Guidelines:
         ("user", """User's Positive Reviews (3+ stars):
 {positive_reviews}
 
-Available Books from Google Books:
-{google_books}
+Available Books:
+{candidates}
 
 Based on their positive reviews, recommend 5 books from the available collection and explain why each book matches their preferences.
 
-IMPORTANT: For each recommendation, you MUST use this exact format:
-ID: [use the exact external_id from the book list above, like "7-BTAgAAQBAJ"]
-Title: [book title]
-Authors: [authors]
-Description: [brief description]
-Why recommended: [your reasoning]
-
-Make sure to use the exact external_id value (the alphanumeric string with hyphens) from the Google Books data provided above.""")
+Respond with a single JSON object of exactly this shape:
+{{"recommendations": [{{"id": "<exact ID from the book list above, e.g. 7-BTAgAAQBAJ or book:42>", "title": "<book title>", "authors": ["<author>"], "description": "<brief description>", "reasoning": "<why it matches the user's preferences>"}}]}}""")
     ])
 
     # Format positive reviews with more context
@@ -776,26 +973,128 @@ Make sure to use the exact external_id value (the alphanumeric string with hyphe
         for r in positive_reviews
     ])
 
-    # Format Google Books data
+    # Format candidate books
     books_text = "\n".join([
-        f"ID: {book['external_id']}\nTitle: {book['title']}\nAuthors: {', '.join(book.get('authors', []))}\nCategories: {', '.join(book.get('categories', []))}\nDescription: {book.get('description', 'No description available')[:200]}...\nAverage Rating: {book.get('averageRating', 'N/A')}\nPage Count: {book.get('pageCount', 'N/A')}\n---"
-        for book in google_books[:15]  # Limit to avoid token limits
+        f"ID: {book['external_id']}\nTitle: {book['title']}\nAuthors: {', '.join(book.get('authors') or [])}\nCategories: {', '.join(book.get('categories') or [])}\nDescription: {(book.get('description') or 'No description available')[:200]}...\nAverage Rating: {book.get('averageRating') or 'N/A'}\nPage Count: {book.get('pageCount') or 'N/A'}\n---"
+        for book in candidates
     ])
 
+    request_deadline.check_deadline()
+    if not openai_cb.acquire_probe():
+        logger.warning("OpenAI circuit breaker probe in progress, skipping recommendation generation")
+        llm_usage.record_breaker_rejection()
+        return None, 0
+    bulkhead = get_openai_bulkhead()
+    if not bulkhead.try_acquire():
+        openai_cb.release_probe()
+        raise LLMBusyError("Too many OpenAI calls in flight")
+
+    started = time.monotonic()
     try:
-        chain = prompt | llm
-        result = chain.invoke({
-            "positive_reviews": reviews_text,
-            "google_books": books_text
-        }).content
+        with bulkhead.held():
+            response = llm(prompt.format_prompt(
+                positive_reviews=reviews_text,
+                candidates=books_text,
+            ), json_mode=True, timeout=deadline - started)
+        openai_cb.record_success(time.monotonic() - started)
+    except LLMTimeoutError as e:
+        llm_usage.record_call(time.monotonic() - started, outcome=llm_usage.CALL_TIMEOUT)
+        openai_cb.record_slow_call(time.monotonic() - started)
+        logger.warning(f"OpenAI recommendation call cancelled: {e}")
+        raise
+    except Exception as e:
+        llm_usage.record_call(time.monotonic() - started, outcome=llm_usage.CALL_ERROR)
+        openai_cb.record_failure(time.monotonic() - started)
+        logger.error(f"OpenAI API call failed: {e}")
+        raise
+    finally:
+        openai_cb.release_probe()
+    llm_usage.record_call(time.monotonic() - started, response)
+
+    # Parsed once here; the cache and the reuse index hold the objects
+    recommendations = parse_llm_recommendations(response.content, candidates) or []
+    if recommendations:
+        set_cached_recommendations(cache_key, recommendations, cache_ttl)
+        store_recommendations(user_id, user_reviews, recommendations)
+
+    return recommendations, token_usage(response)
 
-        openai_cb.record_success()
 
-        # Cache the result
-        set_cached_recommendations(cache_key, result)
+def explain_recommendations(
+    user_reviews: List[ReviewResponse],
+    recommendations: List[Dict[str, Any]],
+) -> Optional[List[Dict[str, Any]]]:
+    """Enrich locally generated recommendations with LLM-written reasoning.
 
-        return result
+    Returns a copy of ``recommendations`` whose ``reasoning`` is replaced by
+    the LLM explanation where one was produced, or None when the OpenAI
+    circuit is open or the call fails.
+    """
+    if not recommendations:
+        return recommendations
+
+    openai_cb = _get_openai_circuit_breaker()
+    if not openai_cb.state_permits():
+        logger.warning("OpenAI circuit breaker open, skipping recommendation explanations")
+        llm_usage.record_breaker_rejection()
+        return None
+
+    positive_reviews = [r for r in user_reviews if r.rate >= 3]
+    reviews_text = "\n".join([
+        f"Book ID {r.book_id}: \"{r.content}\" (Rating: {r.rate}/5 stars)"
+        for r in positive_reviews
+    ])
+    books_text = "\n".join([
+        f"{i + 1}. {rec.get('title') or rec.get('external_id')} by {', '.join(rec.get('authors') or []) or 'Unknown'}"
+        for i, rec in enumerate(recommendations)
+    ])
+
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You explain book recommendations in one short, specific sentence each."),
+        ("user", """User's Positive Reviews (3+ stars):
+{positive_reviews}
+
+Recommended books:
+{books}
+
+For each recommended book, write exactly one line in the form
+<number>: <why this book matches the user's preferences>"""),
+    ])
+
+    request_deadline.check_deadline()
+    if not openai_cb.acquire_probe():
+        logger.warning("OpenAI circuit breaker probe in progress, skipping recommendation explanations")
+        llm_usage.record_breaker_rejection()
+        return None
+    bulkhead = get_openai_bulkhead()
+    if not bulkhead.try_acquire():
+        openai_cb.release_probe()
+        logger.warning("Too many OpenAI calls in flight, skipping recommendation explanations")
+        return None
+
+    started = time.monotonic()
+    try:
+        with bulkhead.held():
+            response = llm(
+                prompt.format_prompt(positive_reviews=reviews_text, books=books_text),
+                timeout=request_deadline.remaining(),
+            )
+        openai_cb.record_success(time.monotonic() - started)
     except Exception as e:
-        openai_cb.record_failure()
-        logger.error(f"OpenAI API call failed: {e}")
-        raise
+        llm_usage.record_call(time.monotonic() - started, outcome=llm_usage.CALL_ERROR)
+        openai_cb.record_failure(time.monotonic() - started)
+        logger.error(f"OpenAI explanation call failed: {e}")
+        return None
+    finally:
+        openai_cb.release_probe()
+    llm_usage.record_call(time.monotonic() - started, response)
+    result = response.content
+
+    explained = [dict(rec) for rec in recommendations]
+    for match in re.finditer(r"^\s*(\d+)[:.)]\s*(.+)$", result, flags=re.MULTILINE):
+        index = int(match.group(1)) - 1
+        if 0 <= index < len(explained):
+            explained[index]["reasoning"] = match.group(2).strip()
+    return explained
@@ -1,8 +1,9 @@
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from typing import Tuple, List
 from app.models.review import Review
 from app.models.user import User
-from app.services.base_service import BaseService
+from app.services.base_service import AsyncBaseService, BaseService
 
 
 class ReviewService(BaseService[Review]):
@@ -111,3 +112,31 @@ class ReviewService(BaseService[Review]):
         offset = (page - 1) * page_size
         rows = base_query.offset(offset).limit(page_size).all()
         return rows, total_count
+
+
+class AsyncReviewService(AsyncBaseService[Review]):
+    """Read paths of ``ReviewService`` for ``async def`` endpoints."""
+
+    def __init__(self, db):
+        super().__init__(db, Review)
+
+    def _with_user(self):
+        return select(
+            self.model,
+            User.name.label("user_name"),
+            User.profile_picture.label("user_profile_picture"),
+        ).join(User, self.model.user_id == User.id)
+
+    async def get_by_book_with_user_paginated(
+        self, book_id: int, page: int = 1, page_size: int = 20
+    ) -> Tuple[list, int]:
+        """Paginated reviews for a local book, joined with user info."""
+        query = self._with_user().where(self.model.book_id == book_id)
+        return await self.paginate(query, page=page, page_size=page_size)
+
+    async def get_by_external_book_with_user_paginated(
+        self, external_book_id: str, page: int = 1, page_size: int = 20
+    ) -> Tuple[list, int]:
+        """Paginated reviews for an external book, joined with user info."""
+        query = self._with_user().where(self.model.external_book_id == external_book_id)
+        return await self.paginate(query, page=page, page_size=page_size)
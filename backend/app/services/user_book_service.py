@@ -1,8 +1,9 @@
 from app.models.user_book import UserBook
-from app.services.base_service import BaseService
+from app.models.book import Book
+from app.services.base_service import AsyncBaseService, BaseService
 from app.models.user_book import StatusEnum
-from sqlalchemy import or_
-from sqlalchemy.orm import joinedload
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload, selectinload
 from typing import Tuple, List, Optional
 
 class UserBookService(BaseService[UserBook]):
@@ -152,3 +153,38 @@ class UserBookService(BaseService[UserBook]):
 
     def create(self, obj_in: dict):
         return super().create(obj_in)
+
+
+class AsyncUserBookService(AsyncBaseService[UserBook]):
+    """Read paths of ``UserBookService`` for ``async def`` endpoints."""
+
+    def __init__(self, db):
+        super().__init__(db, UserBook)
+
+    async def get_books_by_user_paginated(
+        self,
+        user_id: int,
+        page: int = 1,
+        page_size: int = 10,
+        status: Optional[str] = None
+    ) -> Tuple[List[UserBook], int, int, int]:
+        """
+        Get paginated books for a user, with each book and its genres loaded.
+
+        Returns:
+            Tuple of (books, total_count, total_pages, current_page)
+        """
+        from app.core.config import settings
+
+        page_size = max(1, min(page_size, settings.MAX_PAGE_SIZE))
+        query = (
+            select(self.model)
+            .options(joinedload(self.model.book).selectinload(Book.genres))
+            .where(self.model.user_id == user_id)
+        )
+        if status:
+            query = query.where(self.model.status == status)
+
+        books, total_count = await self.paginate(query, page=page, page_size=page_size)
+        total_pages = (total_count + page_size - 1) // page_size
+        return books, total_count, total_pages, page
@@ -1,11 +1,14 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import timedelta
+from typing import Optional
 from email_validator import validate_email, EmailNotValidError
 import logging
 
 from app.models.user import User
-from app.services.base_service import BaseService
+from app.services.base_service import AsyncBaseService, BaseService
 from app.schemas.user import UserCreate, UserUpdate, UserProfileUpdate
 from app.core.config import settings, is_testing
 
@@ -16,8 +19,12 @@ class UserService(BaseService[User]):
     def __init__(self, db: Session):
         super().__init__(db, User)
 
-    def create(self, user_data: UserCreate):
-        """Validates email, hashes password, and creates a new user."""
+    def create(self, user_data: UserCreate, hashed_password: Optional[str] = None):
+        """Validates email, hashes password, and creates a new user.
+
+        Pass ``hashed_password`` when the password was already hashed
+        elsewhere (e.g. on the password pool) to skip hashing here.
+        """
 
         try:
             # Skip email validation in tests
@@ -30,9 +37,10 @@ class UserService(BaseService[User]):
             if self.get_user_by_email(normalized_email):
                 raise HTTPException(status_code=400, detail="Email is already registered")
 
-            from app.core.security import hash_password
+            if hashed_password is None:
+                from app.core.security import hash_password
 
-            hashed_password = hash_password(user_data.password)
+                hashed_password = hash_password(user_data.password)
             db_user = User(
                 name=user_data.name,
                 email=normalized_email,
@@ -132,4 +140,19 @@ class UserService(BaseService[User]):
         
         self.db.commit()
         self.db.refresh(user)
-        return user
\ No newline at end of file
+        return user
+
+
+class AsyncUserService(AsyncBaseService[User]):
+    """Read paths of ``UserService`` for ``async def`` endpoints and dependencies."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, User)
+
+    async def get_user_by_email(self, email: str) -> User:
+        """Retrieves a user by their email address."""
+        return await self.db.scalar(select(User).where(User.email == email))
+
+    async def get_user_by_id(self, user_id: int) -> User:
+        """Retrieves a user by their ID."""
+        return await self.get_by_id(user_id)
@@ -0,0 +1,109 @@
+"""Startup profiler: per-module import time and time-to-first-request.
+
+Runs the app in fresh interpreters so nothing is already imported:
+
+1. ``python -X importtime -c "import app.main"`` is parsed into a table of
+   the slowest modules by cumulative import time.
+2. A second interpreter imports ``app.main``, runs the lifespan startup and
+   serves one request through the ASGI stack, timing each phase.
+
+Usage:
+    python -m app.startup_profile [--top 25] [--path /docs] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+_FIRST_REQUEST_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "startup_seconds": ready - imported,
+    "first_request_seconds": served - ready,
+    "time_to_first_request_seconds": served - started,
+    "status": status,
+}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=dict(os.environ), capture_output=True, text=True
+    )
+
+
+def profile_imports(top: int) -> List[Dict]:
+    """Slowest modules imported by ``app.main``, by cumulative time."""
+    result = _run(["-X", "importtime", "-c", "import app.main"])
+    if result.returncode != 0:
+        raise RuntimeError(f"importing app.main failed:\n{result.stderr}")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    # Top-level imports only, so cumulative times are not double counted
+    # across a package and its submodules
+    return sorted(
+        (m for m in modules if "." not in m["module"] or m["module"].startswith("app.")),
+        key=lambda m: m["cumulative_ms"],
+        reverse=True,
+    )[:top]
+
+
+def profile_first_request(path: str) -> Dict:
+    result = _run(["-c", _FIRST_REQUEST_PROBE, path])
+    if result.returncode != 0:
+        raise RuntimeError(f"first request probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to list")
+    parser.add_argument("--path", default="/docs", help="Route for the first request")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args()
+
+    modules = profile_imports(args.top)
+    timing = profile_first_request(args.path)
+
+    if args.json:
+        print(json.dumps({"modules": modules, "timing": timing}, indent=2))
+        return
+
+    print(f"{'module':<50} {'self ms':>10} {'cumul. ms':>10}")
+    for m in modules:
+        print(f"{m['module']:<50} {m['self_ms']:>10.1f} {m['cumulative_ms']:>10.1f}")
+    print()
+    print(f"import app.main:        {timing['import_seconds'] * 1000:8.1f} ms")
+    print(f"lifespan startup:       {timing['startup_seconds'] * 1000:8.1f} ms")
+    print(f"first request ({args.path}): {timing['first_request_seconds'] * 1000:8.1f} ms (HTTP {timing['status']})")
+    print(f"time to first request:  {timing['time_to_first_request_seconds'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
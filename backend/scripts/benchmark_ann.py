@@ -0,0 +1,100 @@
+"""
+Benchmark the LSH ANN index against brute-force cosine search.
+
+Builds indexes over synthetic clustered unit vectors (or the real catalog
+with --catalog) for several (tables, bits) configurations and reports
+recall@k against exact search together with mean and p95 query latency.
+
+Usage:
+    python scripts/benchmark_ann.py [--n 100000] [--dim 256] [--queries 200] [--k 10]
+    python scripts/benchmark_ann.py --catalog
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ann_index import AnnIndex
+
+CONFIGS = [(4, 10), (8, 12), (12, 14), (16, 16)]
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 500, 10), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.arange(n, dtype=np.int64), vectors.astype(np.float32)
+
+
+def catalog_vectors():
+    from app.core.database import SessionLocal
+    from app.services.ann_index import build_ann_index
+
+    db = SessionLocal()
+    try:
+        with tempfile.TemporaryDirectory() as path:
+            index = build_ann_index(db, path)
+            return np.array(index.ids), np.array(index.vectors)
+    finally:
+        db.close()
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic catalog size")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--catalog", action="store_true", help="Use the books table instead of synthetic data")
+    args = parser.parse_args()
+
+    ids, vectors = catalog_vectors() if args.catalog else synthetic_vectors(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    print(f"Catalog: {len(ids)} vectors x {vectors.shape[1]} dims, {len(query_rows)} queries, k={args.k}")
+
+    exact, brute_times = {}, []
+    for row in query_rows:
+        started = time.perf_counter()
+        scores = vectors @ vectors[row]
+        scores[row] = -np.inf
+        top = np.argpartition(-scores, args.k)[:args.k]
+        brute_times.append(time.perf_counter() - started)
+        exact[row] = set(ids[top].tolist())
+    print(f"{'brute force':<22} recall=1.000  mean={np.mean(brute_times) * 1000:7.2f}ms  "
+          f"p95={percentile_ms(brute_times, 95):7.2f}ms")
+
+    with tempfile.TemporaryDirectory() as path:
+        for n_tables, n_bits in CONFIGS:
+            started = time.perf_counter()
+            index = AnnIndex.build(Path(path) / f"{n_tables}x{n_bits}", ids, vectors, idf={},
+                                   n_tables=n_tables, n_bits=n_bits)
+            build_seconds = time.perf_counter() - started
+            for multiprobe in (False, True):
+                hits, times, candidates = 0, [], []
+                for row in query_rows:
+                    started = time.perf_counter()
+                    found = index.query(vectors[row], k=args.k, exclude=[int(ids[row])], multiprobe=multiprobe)
+                    times.append(time.perf_counter() - started)
+                    hits += len(exact[row] & {item_id for item_id, _ in found})
+                    candidates.append(len(index.candidates(vectors[row], multiprobe=multiprobe)))
+                label = f"lsh {n_tables}x{n_bits}{' +probe' if multiprobe else ''}"
+                print(f"{label:<22} recall={hits / (len(query_rows) * args.k):.3f}  "
+                      f"mean={np.mean(times) * 1000:7.2f}ms  p95={percentile_ms(times, 95):7.2f}ms  "
+                      f"candidates={np.mean(candidates):8.0f}  build={build_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
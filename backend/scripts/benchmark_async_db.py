@@ -0,0 +1,139 @@
+"""
+Load-test the threaded (sync Session) and async (AsyncSession) database
+paths of the book list endpoint under concurrency.
+
+Both paths are served by a throwaway FastAPI app through httpx's ASGI
+transport, so they behave as in production: the sync endpoint runs in
+Starlette's threadpool (40 threads), the async one on the event loop.
+--concurrency clients each send --requests requests to one path at a time.
+--query-delay adds a pg_sleep to every request to stand in for a slower
+query or a remote database.
+
+Raw throughput is bounded by database connections on both paths; the
+difference is what the load does to everything else.  Sync endpoints that
+wait on the database hold threadpool threads, so other sync endpoints
+queue behind them.  Async endpoints hold no thread while they wait.  A
+probe client therefore calls a trivial sync endpoint throughout each run.
+The report gives throughput and p50/p95 latency per path, and the probe's
+p95 latency under that load.  Use a database with a few books in it.
+
+Usage:
+    python scripts/benchmark_async_db.py [--concurrency 200] [--requests 5]
+        [--query-delay 0.05] [--page-size 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import async_engine, get_async_db, get_db
+from app.services.book_service import AsyncBookService, BookService
+
+
+def build_app(args) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/threaded")
+    def threaded(db=Depends(get_db)):
+        if args.query_delay:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": args.query_delay})
+        books, total, _, _ = BookService(db).filter_books_paginated(page=1, page_size=args.page_size)
+        return {"count": len(books), "total": total}
+
+    @app.get("/async")
+    async def asynchronous(db=Depends(get_async_db)):
+        if args.query_delay:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": args.query_delay})
+        books, total, _, _ = await AsyncBookService(db).filter_books_paginated(page=1, page_size=args.page_size)
+        return {"count": len(books), "total": total}
+
+    @app.get("/cheap")
+    def cheap():
+        return {"ok": True}
+
+    return app
+
+
+async def run_path(client: httpx.AsyncClient, path: str, args) -> dict:
+    latencies = []
+    probe_latencies = []
+    errors = 0
+    done = asyncio.Event()
+
+    async def worker():
+        nonlocal errors
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/cheap")
+            probe_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    probing = asyncio.ensure_future(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probing
+    latencies.sort()
+    probe_latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "probe_p95_ms": probe_latencies[max(0, int(len(probe_latencies) * 0.95) - 1)] * 1000,
+    }
+
+
+async def main_async(args):
+    transport = httpx.ASGITransport(app=build_app(args))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        # Warm both pools so connection setup isn't measured
+        await asyncio.gather(*(client.get(path) for path in ("/threaded", "/async") for _ in range(20)))
+        print(
+            f"{args.concurrency} clients x {args.requests} requests, "
+            f"page size {args.page_size}, query delay {args.query_delay * 1000:.0f}ms\n"
+        )
+        print(
+            f"{'path':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'probe p95 ms':>13}"
+        )
+        for path in ("/threaded", "/async"):
+            r = await run_path(client, path, args)
+            print(
+                f"{r['path']:<10} {r['requests']:>9} {r['errors']:>7} {r['requests_per_second']:>9.0f} "
+                f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['probe_p95_ms']:>13.1f}"
+            )
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client")
+    parser.add_argument("--query-delay", type=float, default=0.05, help="Seconds of pg_sleep per request")
+    parser.add_argument("--page-size", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
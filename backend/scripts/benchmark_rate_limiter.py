@@ -0,0 +1,114 @@
+"""
+Benchmark the exact (sorted-set log) and approximate (two counters) rate
+limiter modes against a real Redis.
+
+For each mode, --identifiers clients each make --requests checks (a
+search-limit-like workload).  The report covers:
+- Redis memory used by the limiter keys (MEMORY USAGE over every key);
+- Redis server CPU time (INFO cpu delta);
+- client-side throughput.
+
+Keys are written under a throwaway prefix and deleted afterwards. Use a
+scratch database.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py [--redis-url redis://localhost:6379/15]
+        [--identifiers 10000] [--requests 20] [--limit 30] [--window 60]
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import redis
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.rate_limiter import APPROXIMATE, SLIDING_LOG, RateLimiter
+
+
+def server_cpu_seconds(client: redis.Redis) -> float:
+    info = client.info("cpu")
+    return float(info["used_cpu_sys"]) + float(info["used_cpu_user"])
+
+
+def key_memory_bytes(client: redis.Redis, pattern: str) -> int:
+    total = 0
+    keys = list(client.scan_iter(match=pattern, count=1000))
+    for start in range(0, len(keys), 1000):
+        pipe = client.pipeline(transaction=False)
+        for key in keys[start:start + 1000]:
+            pipe.memory_usage(key)
+        total += sum(size or 0 for size in pipe.execute())
+    return total
+
+
+def run_mode(client: redis.Redis, mode: str, args) -> dict:
+    prefix = f"bench_rate_limit:{uuid.uuid4().hex[:8]}"
+    limiter = RateLimiter(
+        redis_client=client, max_requests=args.limit, window_seconds=args.window, key_prefix=prefix, mode=mode
+    )
+    identifiers = [f"10.0.{i // 256}.{i % 256}" for i in range(args.identifiers)]
+
+    def client_worker(chunk):
+        allowed = 0
+        for _ in range(args.requests):
+            for identifier in chunk:
+                allowed += limiter.is_allowed(identifier)[0]
+        return allowed
+
+    chunks = [identifiers[i::args.threads] for i in range(args.threads)]
+    cpu_before = server_cpu_seconds(client)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        allowed = sum(executor.map(client_worker, chunks))
+    elapsed = time.perf_counter() - started
+    cpu = server_cpu_seconds(client) - cpu_before
+
+    memory = key_memory_bytes(client, f"{prefix}:*")
+    for start in range(0, len(identifiers), 1000):
+        keys = [limiter._get_key(i) + (":approx" if mode == APPROXIMATE else "") for i in identifiers[start:start + 1000]]
+        client.delete(*keys)
+
+    checks = args.identifiers * args.requests
+    return {
+        "mode": mode,
+        "checks": checks,
+        "allowed": allowed,
+        "memory_bytes": memory,
+        "bytes_per_identifier": memory / args.identifiers,
+        "server_cpu_seconds": cpu,
+        "server_cpu_us_per_check": cpu / checks * 1e6,
+        "checks_per_second": checks / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--identifiers", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20, help="Checks per identifier")
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    client.ping()
+
+    print(f"{args.identifiers} identifiers x {args.requests} checks, limit {args.limit}/{args.window}s\n")
+    print(f"{'mode':<12} {'allowed':>9} {'memory':>10} {'B/id':>8} {'cpu us/chk':>11} {'checks/s':>10}")
+    for mode in (SLIDING_LOG, APPROXIMATE):
+        r = run_mode(client, mode, args)
+        print(
+            f"{r['mode']:<12} {r['allowed']:>9} {r['memory_bytes'] / 1024 / 1024:>8.1f}MB "
+            f"{r['bytes_per_identifier']:>8.0f} {r['server_cpu_us_per_check']:>11.1f} {r['checks_per_second']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
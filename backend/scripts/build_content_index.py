@@ -0,0 +1,48 @@
+"""
+Build or update the TF-IDF content-similarity index (book_similarities).
+
+By default only books that have not been indexed yet are scored and merged
+into the existing neighbor lists.  Use --full to recompute every list, e.g.
+after a large catalog import shifts document frequencies.
+
+With --ann the approximate nearest-neighbor index (settings.ANN_INDEX_DIR)
+is rebuilt from scratch as well.
+
+Usage:
+    python scripts/build_content_index.py [--full] [--ann]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.ann_index import build_ann_index
+from app.services.content_similarity import rebuild_content_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Recompute every neighbor list")
+    parser.add_argument("--ann", action="store_true", help="Also rebuild the ANN index")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        scored = rebuild_content_index(db, full=args.full)
+        print(f"✓ Indexed {scored} books in {time.perf_counter() - started:.2f}s")
+        if args.ann:
+            started = time.perf_counter()
+            index = build_ann_index(db)
+            print(f"✓ Built ANN index with {len(index)} books at {index.path} in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
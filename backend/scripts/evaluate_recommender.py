@@ -0,0 +1,106 @@
+"""
+Offline evaluation of the item-item collaborative filtering recommender.
+
+For every user with at least ``--min-positive`` positively rated books, a
+fraction of those reviews is held out.  The model is built from the remaining
+interactions and precision@k / recall@k are measured on the held-out books.
+
+Usage:
+    python scripts/evaluate_recommender.py --k 5 --holdout 0.2 --seed 42
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.collaborative_filtering import (
+    build_item_neighbors,
+    load_interactions,
+    review_weight,
+    score_items,
+)
+
+
+def split_interactions(interactions, holdout, min_positive, seed):
+    """Hold out a fraction of each eligible user's positive interactions."""
+    rng = random.Random(seed)
+    positive_threshold = review_weight(4)
+
+    by_user = defaultdict(list)
+    for interaction in interactions:
+        by_user[interaction[0]].append(interaction)
+
+    train, held_out = [], {}
+    for user_id, rows in by_user.items():
+        positives = [r for r in rows if r[2] >= positive_threshold]
+        if len(positives) < min_positive:
+            train.extend(rows)
+            continue
+        n_holdout = max(1, int(len(positives) * holdout))
+        test_rows = set(rng.sample(positives, n_holdout))
+        held_out[user_id] = {r[1] for r in test_rows}
+        train.extend(r for r in rows if r not in test_rows)
+    return train, held_out
+
+
+def evaluate(interactions, k, holdout, min_positive, seed):
+    train, held_out = split_interactions(interactions, holdout, min_positive, seed)
+
+    started = time.perf_counter()
+    neighbors = build_item_neighbors(train)
+    build_seconds = time.perf_counter() - started
+
+    profiles = defaultdict(dict)
+    for user_id, key, weight in train:
+        profiles[user_id][key] = weight
+
+    precisions, recalls, latencies = [], [], []
+    for user_id, relevant in held_out.items():
+        profile = profiles.get(user_id, {})
+        started = time.perf_counter()
+        ranked = score_items(neighbors, profile, exclude=set(profile), limit=k)
+        latencies.append(time.perf_counter() - started)
+        hits = len({key for key, _, _ in ranked} & relevant)
+        precisions.append(hits / k)
+        recalls.append(hits / len(relevant))
+
+    n = len(held_out)
+    return {
+        "users_evaluated": n,
+        "items_in_model": len(neighbors),
+        "build_seconds": build_seconds,
+        f"precision@{k}": sum(precisions) / n if n else 0.0,
+        f"recall@{k}": sum(recalls) / n if n else 0.0,
+        "avg_serve_ms": 1000 * sum(latencies) / n if n else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5, help="Number of recommendations per user")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of positive reviews to hold out")
+    parser.add_argument("--min-positive", type=int, default=3, help="Minimum positive reviews for a user to be evaluated")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        interactions = load_interactions(db)
+    finally:
+        db.close()
+
+    results = evaluate(interactions, args.k, args.holdout, args.min_positive, args.seed)
+    print(f"Loaded {len(interactions)} interactions")
+    for name, value in results.items():
+        print(f"  {name:>16}: {value:.4f}" if isinstance(value, float) else f"  {name:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
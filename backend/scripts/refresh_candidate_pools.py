@@ -0,0 +1,37 @@
+"""
+Refresh the per-genre recommendation candidate pools.
+
+Rebuilds each genre's pool from the top-rated local books and Google Books
+results and publishes it to Redis.  The API also refreshes pools in a
+background thread every CANDIDATE_POOL_REFRESH_SECONDS; run this from cron
+instead when that is set to 0.
+
+Usage:
+    python scripts/refresh_candidate_pools.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.candidate_pools import refresh_candidate_pools
+
+
+def main():
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        sizes = refresh_candidate_pools(db)
+        print(f"✓ Refreshed {len(sizes)} pools ({sum(sizes.values())} candidates) in {time.perf_counter() - started:.2f}s")
+        for genre, size in sorted(sizes.items(), key=lambda kv: -kv[1]):
+            print(f"  {genre:<30} {size}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
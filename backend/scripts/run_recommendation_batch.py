@@ -0,0 +1,52 @@
+"""
+Generate LLM recommendations for recently active users ahead of time.
+
+Meant to run nightly from cron (or trigger POST /api/v1/admin/recommendations/batch).
+Results are written to the shared recommendation cache in Redis.  Progress
+is checkpointed, so re-running after a crash or a paused run (token budget,
+open circuit) continues where it stopped.
+
+Usage:
+    python scripts/run_recommendation_batch.py [--concurrency 4] [--token-budget 500000] [--active-days 30]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.recommendation_batch import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.REC_BATCH_CONCURRENCY)
+    parser.add_argument("--token-budget", type=int, default=settings.REC_BATCH_TOKEN_BUDGET)
+    parser.add_argument("--active-days", type=int, default=settings.REC_BATCH_ACTIVE_DAYS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = run_batch(
+            db,
+            concurrency=args.concurrency,
+            token_budget=args.token_budget,
+            active_days=args.active_days,
+        )
+    finally:
+        db.close()
+
+    print(f"✓ Batch {report['run_id']} stopped: {report['stop_reason']}")
+    print(f"  users done:   {report['users_done']} ({report['users_failed']} failed)")
+    print(f"  tokens:       {report['tokens']}")
+    print(f"  users/min:    {report['users_per_minute']}")
+    print(f"  tokens/min:   {report['tokens_per_minute']}")
+    sys.exit(0 if report["stop_reason"] == "completed" else 2)
+
+
+if __name__ == "__main__":
+    main()
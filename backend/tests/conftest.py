@@ -1,6 +1,8 @@
 import pytest
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from alembic.config import Config
 from alembic import command
 import sys
@@ -14,7 +16,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # Import settings after ensuring the environment is set up
 from app.core.config import settings
-from app.core.database import Base
+from app.core.database import AsyncRequestSession, Base, async_url
 
 # Get the current DATABASE_URL from environment or settings
 DATABASE_URL = os.environ.get("DATABASE_URL", settings.DATABASE_URL)
@@ -55,6 +57,9 @@ print(f"[DEBUG] Test DATABASE_URL: {TEST_DATABASE_URL}")
 # Create test database engine
 test_engine = create_engine(TEST_DATABASE_URL, pool_pre_ping=True)
 
+# Async endpoints; NullPool because every TestClient runs its own event loop
+test_async_engine = create_async_engine(async_url(TEST_DATABASE_URL), poolclass=NullPool)
+
 print(f"[DEBUG] Test engine created with URL: {TEST_DATABASE_URL}")
 
 @pytest.fixture(scope="session")
@@ -140,7 +145,7 @@ def client(apply_migrations) -> Generator:
     """Create a test client."""
     from fastapi.testclient import TestClient
     from app.main import app
-    from app.core.database import get_db
+    from app.core.database import get_async_db, get_db
 
     # Override the database dependency
     def override_get_db():
@@ -154,7 +159,16 @@ def client(apply_migrations) -> Generator:
         finally:
             db.close()
 
+    TestingAsyncSessionLocal = async_sessionmaker(
+        test_async_engine, sync_session_class=AsyncRequestSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -173,7 +187,7 @@ def clean_database():
             connection.execute(text("SET session_replication_role = replica;"))
             
             # Delete all data from tables in reverse dependency order
-            tables = ['reviews', 'user_books', 'book_genres', 'books', 'genres', 'users']
+            tables = ['reviews', 'user_books', 'book_similarities', 'book_genres', 'books', 'genres', 'users']
             for table in tables:
                 try:
                     connection.execute(text(f"DELETE FROM {table};"))
@@ -0,0 +1,129 @@
+"""Tests for the LSH approximate nearest-neighbor index."""
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.book import Book, Genre
+from app.services import ann_index
+from app.services.ann_index import AnnIndex, build_ann_index, hash_features
+
+
+def _clustered_vectors(n, dim, n_clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim))
+    vectors = centers[rng.integers(0, n_clusters, n)] + 0.3 * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+class TestAnnIndex:
+    def test_hash_features_is_normalized_and_stable(self):
+        a = hash_features({"dragon": 1.0, "wizard": 0.5}, 64)
+        b = hash_features({"wizard": 0.5, "dragon": 1.0}, 64)
+        assert np.linalg.norm(a) == pytest.approx(1.0)
+        assert np.array_equal(a, b)
+
+    def test_query_recall_against_brute_force(self, tmp_path):
+        vectors = _clustered_vectors(2000, 32)
+        ids = np.arange(1, len(vectors) + 1)
+        index = AnnIndex.build(tmp_path, ids, vectors, idf={}, n_tables=8, n_bits=10)
+
+        hits = 0
+        for row in range(0, 2000, 100):
+            exact = set(ids[np.argsort(-(vectors @ vectors[row]))[1:11]])
+            found = {item_id for item_id, _ in index.query(vectors[row], k=10, exclude=[ids[row]])}
+            hits += len(exact & found)
+        assert hits / 200 >= 0.8
+
+    def test_insert_is_visible_to_other_readers(self, tmp_path):
+        vectors = _clustered_vectors(200, 16)
+        index = AnnIndex.build(tmp_path, np.arange(200), vectors, idf={}, n_tables=4, n_bits=8)
+        other_worker = AnnIndex(tmp_path)
+
+        index.insert(999, vectors[0])
+
+        assert len(other_worker) == 201
+        assert other_worker.query(vectors[0], k=2)[0][1] == pytest.approx(1.0)
+        assert {999, 0} == {item_id for item_id, _ in other_worker.query(vectors[0], k=2)}
+
+    def test_rebuild_swaps_generation_under_open_readers(self, tmp_path):
+        vectors = _clustered_vectors(300, 16)
+        first = AnnIndex.build(tmp_path, np.arange(100), vectors[:100], idf={}, n_tables=4, n_bits=8)
+        reader = AnnIndex(tmp_path)
+        old_ids = reader.ids
+
+        rebuilt = AnnIndex.build(tmp_path, np.arange(1000, 1300), vectors, idf={}, n_tables=4, n_bits=8)
+
+        assert np.array_equal(old_ids, np.arange(100))  # old generation's files were not rewritten
+        assert (first.generation, rebuilt.generation, reader.generation) == (2, 2, 2)
+        assert len(reader) == 300
+        assert reader.query(vectors[250], k=1)[0][0] == 1250
+
+        reader.insert(5000, vectors[0])  # lands in the new generation
+        assert len(rebuilt) == 301
+
+    def test_rebuild_keeps_only_the_previous_generation(self, tmp_path):
+        vectors = _clustered_vectors(50, 8)
+        for _ in range(3):
+            AnnIndex.build(tmp_path, np.arange(50), vectors, idf={}, n_tables=2, n_bits=4)
+        assert sorted(p.name for p in tmp_path.glob("gen-*")) == ["gen-000002", "gen-000003"]
+        assert (tmp_path / "current").resolve().name == "gen-000003"
+
+    def test_empty_index_accepts_inserts(self, tmp_path):
+        index = AnnIndex.build(tmp_path, np.empty(0), np.empty((0, 8), dtype=np.float32), idf={}, n_tables=2, n_bits=4)
+        assert index.query(hash_features({"a": 1.0}, 8)) == []
+
+        index.insert(1, hash_features({"a": 1.0}, 8))
+        assert index.query(hash_features({"a": 1.0}, 8))[0][0] == 1
+
+
+class TestCatalogIndex:
+    @pytest.fixture(autouse=True)
+    def index_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ann_index.settings, "ANN_INDEX_DIR", str(tmp_path))
+        monkeypatch.setattr(ann_index, "_index", None)
+
+    def test_created_book_is_inserted(self, db_session: Session):
+        from app.services.book_service import BookService
+
+        fantasy = Genre(name="Fantasy")
+        db_session.add(fantasy)
+        db_session.add(Book(title="Dragon Crown", author="A", description="A wizard tames a dragon", genres=[fantasy]))
+        db_session.add(Book(title="Star Fleet", author="B", description="A starship crew battles aliens"))
+        db_session.commit()
+        index = build_ann_index(db_session)
+        assert len(index) == 2
+
+        book = BookService(db_session).create({
+            "title": "Dragon Heir", "author": "C",
+            "description": "The wizard heir of a dragon kingdom", "genres": ["Fantasy"],
+        })
+
+        assert len(index) == 3
+        neighbors = ann_index.get_approximate_similar_books(db_session, book, limit=2)
+        assert neighbors[0][0].title == "Dragon Crown"
+
+    def test_book_created_during_rebuild_survives_the_swap(self, db_session: Session, monkeypatch):
+        from app.services.book_service import BookService
+
+        db_session.add(Book(title="Dragon Crown", author="A", description="A wizard tames a dragon"))
+        db_session.add(Book(title="Star Fleet", author="B", description="A starship crew battles aliens"))
+        db_session.commit()
+        build_ann_index(db_session)
+        created = []
+        publish = ann_index._publish
+
+        def create_then_publish(root, generation, catch_up=None):
+            # Lands in the old generation, after the rebuild took its snapshot
+            created.append(BookService(db_session).create({
+                "title": "Dragon Heir", "author": "C", "description": "The wizard heir of a dragon kingdom",
+            }))
+            publish(root, generation, catch_up)
+
+        monkeypatch.setattr(ann_index, "_publish", create_then_publish)
+        index = build_ann_index(db_session)
+
+        assert index.generation == 2
+        assert sorted(index.ids.tolist()) == sorted(book.id for book in db_session.query(Book))
+        assert index.query(index.vector_for(created[0].id), k=1)[0][0] == created[0].id
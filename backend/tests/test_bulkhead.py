@@ -0,0 +1,183 @@
+"""Tests for the adaptive outbound concurrency limit."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.bulkhead import AdaptiveBulkhead
+from app.core.metrics import get_counters, reset_counters
+from app.services.llm_provider import (
+    FakeLLMProvider,
+    LazyLLM,
+    LLMBusyError,
+    LLMResponse,
+    LLMTimeoutError,
+    set_llm_provider,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_counters():
+    reset_counters()
+    yield
+    reset_counters()
+
+
+def _full(limit=1):
+    bulkhead = AdaptiveBulkhead("test", max_limit=limit, latency_target=1.0)
+    for _ in range(limit):
+        assert bulkhead.try_acquire()
+    return bulkhead
+
+
+class TestAdaptiveBulkhead:
+    def test_rejects_immediately_over_the_limit(self):
+        bulkhead = _full(limit=2)
+        started = time.monotonic()
+        assert bulkhead.try_acquire() is False
+        assert time.monotonic() - started < 0.1
+        assert get_counters()["bulkhead.test.rejected"] == 1
+
+    def test_release_frees_a_slot(self):
+        bulkhead = _full(limit=1)
+        bulkhead.release(0.1)
+        assert bulkhead.try_acquire() is True
+
+    def test_slow_calls_shrink_the_limit_once_per_interval(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=10, latency_target=60)
+        for _ in range(5):
+            bulkhead.try_acquire()
+        for _ in range(5):
+            bulkhead.release(90.0)
+        assert bulkhead.limit == 9
+
+    def test_failures_shrink_the_limit_down_to_min(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=4, latency_target=0, min_limit=2)
+        for _ in range(20):
+            bulkhead.try_acquire()
+            bulkhead.release(0.0, failed=True)
+        assert bulkhead.limit == 2
+
+    def test_fast_busy_calls_grow_the_limit_back(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=10, latency_target=1.0, initial_limit=4)
+        for _ in range(20):
+            for _ in range(bulkhead.limit):
+                bulkhead.try_acquire()
+            for _ in range(bulkhead.limit):
+                bulkhead.release(0.1)
+        assert bulkhead.limit == 10
+
+    def test_idle_fast_calls_do_not_grow_the_limit(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=10, latency_target=1.0, initial_limit=4)
+        for _ in range(50):
+            bulkhead.try_acquire()
+            bulkhead.release(0.1)
+        assert bulkhead.limit == 4
+
+    def test_held_releases_and_counts_exceptions_as_failures(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=10, latency_target=60)
+        bulkhead.try_acquire()
+        with pytest.raises(RuntimeError):
+            with bulkhead.held():
+                raise RuntimeError("boom")
+        assert bulkhead.in_flight == 0
+        assert bulkhead.limit == 9
+
+    def test_caps_concurrent_callers(self):
+        bulkhead = AdaptiveBulkhead("test", max_limit=3, latency_target=60)
+        start = threading.Barrier(12)
+        admitted = []
+        peak = []
+
+        def worker():
+            start.wait()
+            if bulkhead.try_acquire():
+                admitted.append(1)
+                with bulkhead.held():
+                    peak.append(bulkhead.in_flight)
+                    time.sleep(0.05)
+
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(admitted) == 3
+        assert max(peak) <= 3
+
+    def test_timed_out_call_keeps_its_slot_until_the_worker_finishes(self):
+        class GatedProvider(FakeLLMProvider):
+            def __init__(self):
+                self.started = threading.Event()
+                self.gate = threading.Event()
+
+            def invoke(self, prompt, json_mode=False, timeout=None):
+                self.started.set()
+                self.gate.wait(5)
+                return LLMResponse(content="late")
+
+        provider = GatedProvider()
+        set_llm_provider(provider)
+        bulkhead = AdaptiveBulkhead("test", max_limit=1, latency_target=60)
+        try:
+            assert bulkhead.try_acquire()
+            with pytest.raises(LLMTimeoutError) as raised:
+                with bulkhead.held():
+                    LazyLLM()("prompt", timeout=0.05)
+            assert provider.started.is_set()
+
+            # The caller gave up but the worker still runs the call
+            assert bulkhead.in_flight == 1
+            assert bulkhead.try_acquire() is False
+
+            provider.gate.set()
+            raised.value.running_call.result(timeout=5)
+            # Done callbacks run just after result() waiters are woken
+            deadline = time.monotonic() + 5
+            while bulkhead.in_flight and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert bulkhead.in_flight == 0
+        finally:
+            provider.gate.set()
+            set_llm_provider(None)
+
+
+@patch("app.api.v1.endpoints.books._search_local_books")
+@patch("app.api.v1.endpoints.books.google_books.get_json")
+@patch("app.api.v1.endpoints.books.get_google_books_bulkhead")
+@patch("app.api.v1.endpoints.books._get_google_books_circuit_breaker")
+def test_search_falls_back_to_local_when_bulkhead_full(mock_cb, mock_bulkhead, mock_get, mock_local):
+    from app.api.v1.endpoints.books import search_external_books
+
+    mock_cb.return_value.state_permits.return_value = True
+    mock_bulkhead.return_value = _full()
+    db = MagicMock()
+
+    result = search_external_books(q="dune", max_results=10, page=1, _rate_limit=None, db=db)
+
+    assert result is mock_local.return_value
+    mock_local.assert_called_once_with("dune", 10, 1, db)
+    mock_get.assert_not_called()
+
+
+@patch("app.services.recommendation_service.find_reusable_recommendations", return_value=None)
+@patch("app.services.recommendation_service.get_candidates", return_value=[{"external_id": "vol-1", "title": "Dune"}])
+@patch("app.services.recommendation_service.get_cached_recommendations", return_value=None)
+@patch("app.services.recommendation_service.get_openai_bulkhead")
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+@patch("app.services.recommendation_service.llm")
+def test_generate_raises_busy_without_calling_llm(mock_llm, mock_cb, mock_bulkhead, *_):
+    from app.services.recommendation_service import generate_book_recommendations
+
+    mock_cb.return_value.state_permits.return_value = True
+    mock_bulkhead.return_value = _full()
+    review = SimpleNamespace(user_id=1, book_id=2, external_book_id=None, rate=5, content="Loved it")
+
+    with pytest.raises(LLMBusyError):
+        generate_book_recommendations([review])
+    mock_llm.assert_not_called()
+    mock_cb.return_value.record_failure.assert_not_called()
@@ -0,0 +1,146 @@
+"""Tests for precomputed per-genre recommendation candidate pools."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.book import Book, Genre
+from app.models.review import Review
+from app.models.user import User
+from app.services import candidate_pools
+from app.services.candidate_pools import (
+    build_local_pools,
+    get_candidates,
+    get_user_genres,
+    refresh_candidate_pools,
+    store_pools,
+    top_rated_in_genres,
+)
+
+
+class FakePoolRedis:
+    """Minimal fake Redis supporting set/mget through a pipeline."""
+
+    def __init__(self):
+        self._store: dict = {}
+
+    def pipeline(self):
+        return self
+
+    def set(self, key, value, ex=None, nx=False):
+        self._store[key] = value
+        return True
+
+    def execute(self):
+        return []
+
+    def mget(self, keys):
+        return [self._store.get(k) for k in keys]
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    redis = FakePoolRedis()
+    monkeypatch.setattr(candidate_pools, "get_redis", lambda: redis)
+    monkeypatch.setattr(candidate_pools, "_pool_cache", {})
+    return redis
+
+
+@pytest.fixture
+def catalog(db_session: Session):
+    fantasy = Genre(name="Fantasy")
+    horror = Genre(name="Horror")
+    reader = User(name="Reader", email="reader@example.com", password="x")
+    db_session.add_all([fantasy, horror, reader])
+    db_session.flush()
+    books = {
+        name: Book(title=name, author="Someone", genres=[genre])
+        for name, genre in [("Dragon", fantasy), ("Wizard", fantasy), ("Elf", fantasy), ("Ghost", horror)]
+    }
+    db_session.add_all(books.values())
+    db_session.flush()
+    db_session.add_all([
+        Review(book_id=books["Wizard"].id, user_id=reader.id, content="Great", rate=5),
+        Review(book_id=books["Dragon"].id, user_id=reader.id, content="Fine", rate=3),
+    ])
+    db_session.commit()
+    return books
+
+
+def _candidate(external_id, book_id=None):
+    return {"external_id": external_id, "book_id": book_id, "title": external_id}
+
+
+class TestLocalPools:
+    def test_pools_are_ranked_by_rating(self, db_session: Session, catalog):
+        pools = build_local_pools(db_session, pool_size=10)
+        assert [c["title"] for c in pools["fantasy"]] == ["Wizard", "Dragon", "Elf"]
+        assert pools["fantasy"][0]["averageRating"] == 5.0
+        assert pools["fantasy"][0]["external_id"] == f"book:{catalog['Wizard'].id}"
+
+    def test_pool_size_is_per_genre(self, db_session: Session, catalog):
+        pools = build_local_pools(db_session, pool_size=1)
+        assert {genre: len(pool) for genre, pool in pools.items()} == {"fantasy": 1, "horror": 1}
+
+    def test_user_genres_most_frequent_first(self, db_session: Session, catalog):
+        ids = [catalog["Dragon"].id, catalog["Wizard"].id, catalog["Ghost"].id]
+        assert get_user_genres(db_session, ids) == ["Fantasy", "Horror"]
+
+    def test_top_rated_in_genres_skips_read_and_unrated_books(self, db_session: Session, catalog):
+        recommendations = top_rated_in_genres(db_session, ["fantasy"], {catalog["Wizard"].id})
+        assert [r["title"] for r in recommendations] == ["Dragon"]
+        assert recommendations[0]["genres"] == ["Fantasy"]
+        assert recommendations[0]["score"] == 3.0
+
+    def test_refresh_merges_google_results(self, db_session: Session, catalog, fake_redis):
+        google = [_candidate("g1"), _candidate("g2")]
+        with patch("app.services.recommendation_service.get_google_books_by_genre", return_value=google) as mock_google:
+            sizes = refresh_candidate_pools(db_session)
+
+        assert sizes["fantasy"] == 5
+        assert sizes["fiction"] == 2
+        assert mock_google.call_count == len(set(candidate_pools.DEFAULT_POOL_GENRES + ["Fantasy", "Horror"]))
+        assert len(json.loads(fake_redis._store["candidate_pool:horror"])) == 3
+
+
+class TestGetCandidates:
+    def test_filters_read_books_and_interleaves_genres(self):
+        store_pools({
+            "fantasy": [_candidate("f1", 1), _candidate("f2", 2), _candidate("f3", 3)],
+            "horror": [_candidate("h1"), _candidate("f2", 2)],
+        })
+        candidates = get_candidates(["Fantasy", "Horror"], read_book_ids={1}, read_external_ids={"h1"}, limit=10)
+        assert [c["external_id"] for c in candidates] == ["f2", "f3"]
+
+    def test_reads_pools_shared_by_another_worker(self, fake_redis):
+        store_pools({"fantasy": [_candidate("f1")]})
+        candidate_pools._pool_cache.clear()
+
+        assert [c["external_id"] for c in get_candidates(["fantasy"], set(), set())] == ["f1"]
+
+    def test_unknown_genres_fall_back_to_default_pools(self):
+        store_pools({"fiction": [_candidate("g1")]})
+        assert [c["external_id"] for c in get_candidates(["Poetry"], set(), set())] == ["g1"]
+
+
+@patch("app.services.google_books.requests.get", side_effect=AssertionError("no outbound HTTP"))
+@patch("app.services.recommendation_service.get_cached_recommendations", return_value=None)
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+@patch("app.services.recommendation_service.llm")
+def test_prompt_is_built_from_pools_without_http(mock_llm, mock_cb, mock_cache, mock_http):
+    from app.services.recommendation_service import generate_book_recommendations
+
+    store_pools({"fantasy": [_candidate("f1", 1), _candidate("f2", 2)]})
+    mock_cb.return_value.state_permits.return_value = True
+    mock_llm.return_value = MagicMock(content='{"recommendations": [{"id": "f2", "title": "Book f2"}]}')
+
+    review = MagicMock(book_id=1, external_book_id=None, rate=5, content="Loved it")
+    result = generate_book_recommendations([review], ["Fantasy"])
+    assert [(r["external_id"], r["book_id"]) for r in result] == [("f2", 2)]
+
+    prompt_text = mock_llm.call_args[0][0].to_string()
+    assert "ID: f2" in prompt_text
+    assert "ID: f1" not in prompt_text
+    mock_http.assert_not_called()
@@ -1,9 +1,16 @@
+import json
+import os
+import threading
 import time
+import uuid
 from unittest.mock import MagicMock
 
 import pytest
 
-from app.core.circuit_breaker import CircuitBreaker, CircuitState
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CHANNEL, CircuitBreaker, CircuitState, get_circuit_breaker
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
 
 
 class FakeRedisHash:
@@ -11,16 +18,59 @@ class FakeRedisHash:
 
     def __init__(self):
         self._store: dict = {}
+        self.reads = 0
+        self.writes = 0
+        self.published: list = []
 
     def hgetall(self, key):
+        self.reads += 1
         return dict(self._store.get(key, {}))
 
     def hset(self, key, mapping=None, **kwargs):
+        self.writes += 1
         if key not in self._store:
             self._store[key] = {}
         if mapping:
             self._store[key].update(mapping)
 
+    def hget(self, key, field):
+        self.reads += 1
+        return self._store.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount=1):
+        self.writes += 1
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    def set(self, key, value, nx=False, ex=None):
+        """String keys with an expiry, enough for the probe lease."""
+        value_and_expiry = self._store.get(key)
+        if nx and value_and_expiry is not None and value_and_expiry[1] > time.monotonic():
+            return None
+        self._store[key] = (value, time.monotonic() + (ex or float("inf")))
+        return True
+
+    def delete(self, *keys):
+        return sum(self._store.pop(key, None) is not None for key in keys)
+
+    def register_script(self, script):
+        """Only the probe-release script: compare-and-delete."""
+        def release(keys, args):
+            value_and_expiry = self._store.get(keys[0])
+            if value_and_expiry is not None and value_and_expiry[0] == args[0]:
+                return self.delete(keys[0])
+            return 0
+        return release
+
+    def exists(self, *keys):
+        now = time.monotonic()
+        return sum(key in self._store and self._store[key][1] > now for key in keys)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
 
 class TestCircuitBreaker:
     def _make_cb(self, redis_client=None, threshold=3, timeout=5):
@@ -113,6 +163,114 @@ class TestCircuitBreaker:
         )
         assert cb.is_call_permitted() is True
 
+    def test_half_open_permits_a_single_probe(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=1, timeout=0)
+        other_worker = self._make_cb(redis, threshold=1, timeout=0)
+        cb.record_failure()
+
+        assert cb.is_call_permitted() is True
+        assert cb.is_call_permitted() is False
+        assert other_worker.is_call_permitted() is False
+        assert redis._store["circuit_breaker:test"]["state"] == CircuitState.HALF_OPEN
+
+    def test_expired_probe_lease_lets_another_request_probe(self):
+        cb = CircuitBreaker(
+            name="test", failure_threshold=1, recovery_timeout=0, redis_client=FakeRedisHash(), probe_lease=0.1
+        )
+        cb.record_failure()
+        assert cb.is_call_permitted() is True
+        assert cb.is_call_permitted() is False
+
+        time.sleep(0.15)
+        assert cb.is_call_permitted() is True
+
+    def test_probe_lease_released_when_circuit_reopens(self):
+        cb = self._make_cb(threshold=1, timeout=0)
+        cb.record_failure()
+        assert cb.is_call_permitted() is True
+        cb.record_failure()  # probe failed → OPEN, recovery_timeout 0
+        assert cb.is_call_permitted() is True
+
+    def test_state_permits_takes_no_lease(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=1, timeout=0)
+        cb.record_failure()
+
+        assert cb.state_permits() is True
+        assert cb.state_permits() is True
+        assert "circuit_breaker:test:probe" not in redis._store
+        assert cb.acquire_probe() is True
+        assert cb.state_permits() is False
+
+    def test_released_probe_lets_another_worker_probe(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=1, timeout=0)
+        other_worker = self._make_cb(redis, threshold=1, timeout=0)
+        cb.record_failure()
+
+        assert cb.acquire_probe() is True
+        cb.release_probe()  # the call was skipped
+        assert other_worker.acquire_probe() is True
+        other_worker.release_probe()
+        other_worker.release_probe()  # idempotent once released
+
+    def test_release_only_frees_own_lease(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=1, timeout=0)
+        other_worker = self._make_cb(redis, threshold=1, timeout=0)
+        cb.record_failure()
+
+        assert cb.acquire_probe() is True
+        other_worker.release_probe()
+        assert other_worker.acquire_probe() is False
+
+    def test_failure_while_open_does_not_extend_recovery(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=1, timeout=5)
+        cb.record_failure()
+        opened_at = redis._store["circuit_breaker:test"]["last_failure_time"]
+
+        time.sleep(0.01)
+        cb.record_failure()  # a call that started before the circuit opened
+        state = redis._store["circuit_breaker:test"]
+        assert state["last_failure_time"] == opened_at
+        assert state["failure_count"] == "2"
+
+    def test_late_failure_elsewhere_keeps_the_probers_lease(self):
+        redis = FakeRedisHash()
+        prober = self._make_cb(redis, threshold=1, timeout=0)
+        straggler = self._make_cb(redis, threshold=1, timeout=0)
+        prober.record_failure()
+        assert prober.acquire_probe() is True
+
+        straggler.record_failure()  # HALF_OPEN → OPEN from a call started earlier
+
+        assert "circuit_breaker:test:probe" in redis._store
+        prober.release_probe()
+        assert "circuit_breaker:test:probe" not in redis._store
+
+    def test_release_leaves_a_lease_taken_after_expiry(self):
+        redis = FakeRedisHash()
+        cb = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=0, redis_client=redis, probe_lease=0.05)
+        other_worker = self._make_cb(redis, threshold=1, timeout=0)
+        cb.record_failure()
+        assert cb.acquire_probe() is True
+        time.sleep(0.1)
+        assert other_worker.acquire_probe() is True
+
+        cb.release_probe()
+
+        assert other_worker.acquire_probe() is False
+
+    def test_failure_does_not_overwrite_concurrent_count(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, threshold=10)
+        cb.record_failure()
+        redis.hincrby("circuit_breaker:test", "failure_count", 5)  # another worker
+        cb.record_failure()
+        assert redis._store["circuit_breaker:test"]["failure_count"] == "7"
+
     def test_record_success_resets_failure_count(self):
         cb = self._make_cb(threshold=3)
         cb.record_failure()
@@ -124,3 +282,272 @@ class TestCircuitBreaker:
         assert cb.is_call_permitted() is True
         cb.record_failure()
         assert cb.is_call_permitted() is False
+
+
+@pytest.fixture
+def real_redis():
+    import redis
+
+    client = redis.Redis.from_url(TEST_REDIS_URL, decode_responses=True, socket_connect_timeout=1)
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip(f"No Redis at {TEST_REDIS_URL}")
+    yield client
+    client.close()
+
+
+def _concurrently(action, threads=16):
+    start = threading.Barrier(threads)
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(action())
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+class TestConcurrencyAgainstRedis:
+    def _workers(self, real_redis, name, count=16, **kwargs):
+        # One breaker per "worker" process, all sharing the Redis state
+        return [
+            CircuitBreaker(name=name, redis_client=real_redis, cache_ttl=0, **kwargs)
+            for _ in range(count)
+        ]
+
+    def test_concurrent_failures_are_all_counted(self, real_redis):
+        name = f"test_{uuid.uuid4().hex}"
+        breakers = iter(self._workers(real_redis, name, failure_threshold=100, recovery_timeout=30))
+        try:
+            _concurrently(lambda: next(breakers).record_failure())
+            assert real_redis.hget(f"circuit_breaker:{name}", "failure_count") == "16"
+        finally:
+            real_redis.delete(f"circuit_breaker:{name}", f"circuit_breaker:{name}:probe")
+
+    def test_only_one_worker_probes_a_half_open_circuit(self, real_redis):
+        name = f"test_{uuid.uuid4().hex}"
+        workers = self._workers(real_redis, name, failure_threshold=1, recovery_timeout=0)
+        workers[0].record_failure()
+        breakers = iter(workers)
+        try:
+            assert sum(_concurrently(lambda: next(breakers).is_call_permitted())) == 1
+        finally:
+            real_redis.delete(f"circuit_breaker:{name}", f"circuit_breaker:{name}:probe")
+
+
+    def test_probe_lease_is_only_released_by_its_holder(self, real_redis):
+        name = f"test_{uuid.uuid4().hex}"
+        prober, straggler = self._workers(real_redis, name, failure_threshold=1, recovery_timeout=0)[:2]
+        try:
+            prober.record_failure()
+            assert prober.acquire_probe() is True
+            straggler.record_failure()
+            assert real_redis.exists(f"circuit_breaker:{name}:probe") == 1
+            prober.release_probe()
+            assert real_redis.exists(f"circuit_breaker:{name}:probe") == 0
+        finally:
+            real_redis.delete(f"circuit_breaker:{name}", f"circuit_breaker:{name}:probe")
+
+class TestStateCache:
+    def _make_cb(self, redis_client, ttl=60):
+        return CircuitBreaker(
+            name="test",
+            failure_threshold=2,
+            recovery_timeout=5,
+            redis_client=redis_client,
+            cache_ttl=ttl,
+        )
+
+    def test_closed_checks_and_clean_successes_do_not_touch_redis(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis)
+        for _ in range(100):
+            assert cb.is_call_permitted() is True
+            cb.record_success()
+        assert (redis.reads, redis.writes) == (1, 0)
+
+    def test_success_after_failure_writes_once(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis)
+        cb.record_failure()
+        writes = redis.writes
+        cb.record_success()
+        cb.record_success()
+        assert redis.writes == writes + 1
+        assert redis._store["circuit_breaker:test"]["failure_count"] == "0"
+
+    def test_cache_expires_after_ttl(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, ttl=0)
+        cb.is_call_permitted()
+        cb.is_call_permitted()
+        assert redis.reads == 2
+
+    def test_stale_cache_until_update_is_applied(self):
+        redis = FakeRedisHash()
+        local = self._make_cb(redis)
+        remote = self._make_cb(redis)
+        assert local.is_call_permitted() is True
+
+        remote.record_failure()
+        remote.record_failure()
+        assert local.is_call_permitted() is True  # still cached as CLOSED
+
+        channel, message = redis.published[-1]
+        assert channel == CHANNEL
+        circuit_breaker._breakers["test"] = local
+        try:
+            circuit_breaker._apply_message({"type": "message", "data": message})
+        finally:
+            del circuit_breaker._breakers["test"]
+        assert local.is_call_permitted() is False
+
+    def test_writes_are_published(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis)
+        cb.record_failure()
+        payload = json.loads(redis.published[0][1])
+        assert payload["name"] == "test"
+        assert payload["failure_count"] == "1"
+
+
+class TestRegistry:
+    def test_same_breaker_shared_by_name(self, monkeypatch):
+        redis = FakeRedisHash()
+        monkeypatch.setattr(circuit_breaker, "_breakers", {})
+        monkeypatch.setattr(circuit_breaker, "get_redis", lambda: redis)
+
+        first = get_circuit_breaker("shared", failure_threshold=1, recovery_timeout=5)
+        second = get_circuit_breaker("shared", failure_threshold=1, recovery_timeout=5)
+
+        assert first is second
+        first.record_failure()
+        assert redis._store["circuit_breaker:shared"]["state"] == CircuitState.OPEN
+
+    def test_registry_breaker_uses_current_redis(self, monkeypatch):
+        current = {"redis": None}
+        monkeypatch.setattr(circuit_breaker, "_breakers", {})
+        monkeypatch.setattr(circuit_breaker, "get_redis", lambda: current["redis"])
+        cb = get_circuit_breaker("shared", failure_threshold=1, recovery_timeout=5)
+        cb.record_failure()
+        assert cb.is_call_permitted() is True
+
+        current["redis"] = FakeRedisHash()
+        cb.record_failure()
+        assert cb.is_call_permitted() is False
+
+
+class TestSlowCallTripping:
+    def _make_cb(self, redis_client=None, **kwargs):
+        options = dict(
+            name="test",
+            failure_threshold=100,
+            recovery_timeout=0,
+            redis_client=redis_client or FakeRedisHash(),
+            slow_call_duration=1.0,
+            slow_call_rate_threshold=0.5,
+            window_seconds=60,
+            minimum_calls=4,
+        )
+        options.update(kwargs)
+        return CircuitBreaker(**options)
+
+    def test_opens_when_most_calls_are_slow_even_if_they_succeed(self):
+        cb = self._make_cb(recovery_timeout=30)
+        cb.record_success(0.1)
+        cb.record_success(1.5)
+        cb.record_success(0.2)
+        assert cb.is_call_permitted() is True
+        cb.record_success(2.0)  # 2 of 4 slow
+        assert cb.is_call_permitted() is False
+
+    def test_needs_minimum_calls(self):
+        cb = self._make_cb(recovery_timeout=30)
+        for _ in range(3):
+            cb.record_success(5.0)
+        assert cb.is_call_permitted() is True
+
+    def test_disabled_without_slow_call_duration(self):
+        cb = self._make_cb(slow_call_duration=None, recovery_timeout=30)
+        for _ in range(10):
+            cb.record_success(60.0)
+        assert cb.is_call_permitted() is True
+
+    def test_calls_outside_window_are_forgotten(self):
+        cb = self._make_cb(window_seconds=0.1, recovery_timeout=30)
+        for _ in range(3):
+            cb.record_success(5.0)
+        time.sleep(0.15)
+        cb.record_success(5.0)
+        assert cb.is_call_permitted() is True
+        assert cb.window.stats(1.0)["calls"] == 1
+
+    def test_opens_on_failure_rate_without_consecutive_failures(self):
+        cb = self._make_cb(slow_call_duration=None, failure_rate_threshold=0.5, recovery_timeout=30)
+        for failed in (False, True, False, True, False, False, True):
+            if failed:
+                cb.record_failure(0.1)
+            else:
+                cb.record_success(0.1)  # resets the consecutive failure count
+        assert cb.is_call_permitted() is True  # 3 of 7 failed
+        cb.record_failure(0.1)
+        assert cb.is_call_permitted() is False  # 4 of 8, below the consecutive threshold of 100
+
+    def test_failure_rate_needs_minimum_calls(self):
+        cb = self._make_cb(slow_call_duration=None, failure_rate_threshold=0.5, recovery_timeout=30)
+        for _ in range(3):
+            cb.record_failure(0.1)
+        assert cb.is_call_permitted() is True
+
+    def test_slow_probe_reopens_the_circuit(self):
+        redis = FakeRedisHash()
+        cb = self._make_cb(redis, failure_threshold=1)
+        cb.record_failure()
+        assert cb.is_call_permitted() is True  # probe
+        cb.record_success(3.0)
+        assert redis._store["circuit_breaker:test"]["state"] == CircuitState.OPEN
+
+    def test_stats_report_rates_and_percentiles(self):
+        cb = self._make_cb(minimum_calls=100)
+        for duration in (0.1, 0.2, 0.3, 1.5):
+            cb.record_success(duration)
+        cb.record_failure(2.0)
+
+        stats = cb.get_stats()
+        assert stats["state"] == CircuitState.CLOSED
+        assert stats["failure_count"] == 1
+        window = stats["window"]
+        assert (window["calls"], window["failures"], window["slow_calls"]) == (5, 1, 2)
+        assert window["slow_call_rate"] == 0.4
+        assert window["p50_seconds"] == 0.3
+        assert window["max_seconds"] == 2.0
+
+
+def test_admin_circuit_breaker_endpoint(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.security import get_admin_user
+
+    redis = FakeRedisHash()
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    monkeypatch.setattr(circuit_breaker, "get_redis", lambda: redis)
+    cb = get_circuit_breaker("google_books", failure_threshold=5, recovery_timeout=30, slow_call_duration=2.0)
+    cb.record_success(0.5)
+    cb.record_success(3.0)
+
+    app.dependency_overrides[get_admin_user] = lambda: MagicMock(id=1)
+    try:
+        response = TestClient(app).get("/api/v1/admin/metrics/circuit-breakers")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    [stats] = response.json()["data"]
+    assert stats["name"] == "google_books"
+    assert stats["window"]["slow_call_rate"] == 0.5
@@ -0,0 +1,130 @@
+"""Tests for the local item-item collaborative filtering recommender."""
+
+import threading
+import time
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.review import Review
+from app.models.user import User
+from app.models.user_book import StatusEnum, UserBook
+from app.services import collaborative_filtering
+from app.services.collaborative_filtering import (
+    build_item_neighbors,
+    get_item_neighbors,
+    load_interactions,
+    recommend_for_user,
+    score_items,
+)
+
+
+class TestBuildItemNeighbors:
+    def test_co_rated_items_are_neighbors(self):
+        interactions = [
+            (1, "book:1", 1.0), (1, "book:2", 1.0),
+            (2, "book:1", 1.0), (2, "book:2", 0.8),
+            (3, "book:3", 1.0),
+        ]
+        neighbors = build_item_neighbors(interactions, top_k=5)
+
+        assert [k for k, _ in neighbors["book:1"]] == ["book:2"]
+        assert neighbors["book:1"][0][1] == pytest.approx(neighbors["book:2"][0][1])
+        assert "book:3" not in neighbors
+
+    def test_keeps_only_top_k(self):
+        interactions = [(1, f"book:{i}", 1.0) for i in range(10)]
+        neighbors = build_item_neighbors(interactions, top_k=3)
+        assert all(len(n) == 3 for n in neighbors.values())
+
+    def test_similarity_weighted_by_rate(self):
+        interactions = [
+            (1, "book:1", 1.0), (1, "book:2", 1.0), (1, "book:3", 0.2),
+            (2, "book:1", 1.0), (2, "book:2", 1.0), (2, "book:3", 0.2),
+            (3, "book:3", 1.0),
+        ]
+        neighbors = dict(build_item_neighbors(interactions, top_k=5)["book:1"])
+        assert neighbors["book:2"] > neighbors["book:3"]
+
+
+class TestScoreItems:
+    def test_excludes_already_seen_items(self):
+        neighbors = {
+            "book:1": [("book:2", 0.9), ("book:3", 0.5)],
+            "book:2": [("book:1", 0.9)],
+        }
+        ranked = score_items(neighbors, {"book:1": 1.0, "book:2": 1.0}, exclude={"book:1", "book:2"}, limit=5)
+        assert ranked == [("book:3", 0.5, "book:1")]
+
+
+@pytest.fixture
+def co_readers(db_session: Session):
+    """Three readers: two share taste, the target has read only one book."""
+    collaborative_filtering._model_cache.clear()
+    users = []
+    for name in ("cf-a", "cf-b", "cf-target"):
+        user = User(name=name, email=f"{name}@example.com", password="x", is_active=True)
+        db_session.add(user)
+        users.append(user)
+    books = []
+    for i in range(3):
+        book = Book(title=f"CF Book {i}", author=f"CF Author {i}")
+        db_session.add(book)
+        books.append(book)
+    db_session.flush()
+
+    a, b, target = users
+    for user in (a, b):
+        db_session.add(Review(user_id=user.id, book_id=books[0].id, content="Loved it", rate=5))
+        db_session.add(Review(user_id=user.id, book_id=books[1].id, content="Great", rate=5))
+    db_session.add(UserBook(user_id=b.id, book_id=books[2].id, status=StatusEnum.TO_READ))
+    db_session.add(Review(user_id=target.id, book_id=books[0].id, content="Wonderful", rate=5))
+    db_session.commit()
+    yield target, books
+    collaborative_filtering._model_cache.clear()
+
+
+class TestRecommendForUser:
+    def test_loads_reviews_and_shelves(self, db_session: Session, co_readers):
+        interactions = load_interactions(db_session)
+        keys = {key for _, key, _ in interactions}
+        assert {f"book:{b.id}" for b in co_readers[1]} <= keys
+
+    def test_recommends_co_rated_book_first(self, db_session: Session, co_readers):
+        target, books = co_readers
+        recommendations = recommend_for_user(db_session, target.id, limit=5)
+
+        assert [r["book_id"] for r in recommendations] == [books[1].id, books[2].id]
+        assert recommendations[0]["title"] == "CF Book 1"
+        assert "CF Book 0" in recommendations[0]["reasoning"]
+        assert all(r["book_id"] != books[0].id for r in recommendations)
+
+
+def test_stale_model_is_served_while_one_background_rebuild_runs(monkeypatch):
+    release, builds = threading.Event(), []
+
+    def slow_build(db):
+        builds.append(db)
+        release.wait(5)
+        collaborative_filtering._model_cache.update(neighbors={"book:1": []}, built_at=time.time())
+
+    stale = {"book:9": []}
+    monkeypatch.setattr(collaborative_filtering, "_build_model", slow_build)
+    monkeypatch.setattr(collaborative_filtering, "_model_cache", {"neighbors": stale, "built_at": 0.0})
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(get_item_neighbors(None))) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(5)
+
+    assert results == [stale] * 8
+    release.set()
+    for _ in range(50):
+        if not collaborative_filtering._build_lock.locked():
+            break
+        time.sleep(0.01)
+    assert len(builds) == 1
+    assert get_item_neighbors(None) == {"book:1": []}
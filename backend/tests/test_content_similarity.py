@@ -0,0 +1,93 @@
+"""Tests for the TF-IDF content-similarity index."""
+
+from collections import Counter
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.book import Book, BookSimilarity, Genre
+from app.services.content_similarity import (
+    TfidfCorpus,
+    get_pairwise_scores,
+    get_similar_books,
+    rebuild_content_index,
+    tokenize,
+    top_k_neighbors,
+)
+
+
+class TestTfidf:
+    def test_tokenize_drops_stop_words_and_short_tokens(self):
+        assert tokenize("The Dragon and a Wizard of Oz") == ["dragon", "wizard", "oz"]
+
+    def test_vectors_are_normalized(self):
+        corpus = TfidfCorpus({1: Counter({"dragon": 2, "magic": 1}), 2: Counter({"space": 1})})
+        norm = sum(w * w for w in corpus.vectors[1].values())
+        assert norm == pytest.approx(1.0)
+
+    def test_chunked_neighbors_match_unchunked(self):
+        docs = {
+            i: Counter({f"t{i % 4}": 2, f"t{i % 7}": 1, f"u{i % 3}": 1})
+            for i in range(1, 40)
+        }
+        corpus = TfidfCorpus(docs)
+        ids = list(docs)
+        one_chunk = top_k_neighbors(corpus, ids, top_k=5, chunk_size=len(ids), min_score=0.0)
+        small_chunks = top_k_neighbors(corpus, ids, top_k=5, chunk_size=3, min_score=0.0)
+        for book_id in ids:
+            assert [s for _, s in one_chunk[book_id]] == pytest.approx([s for _, s in small_chunks[book_id]])
+
+
+@pytest.fixture
+def catalog(db_session: Session):
+    fantasy = Genre(name="Fantasy")
+    space = Genre(name="Space Opera")
+    db_session.add_all([fantasy, space])
+    db_session.flush()
+
+    def _book(title, description, genre):
+        book = Book(title=title, author="Someone", description=description)
+        book.genres.append(genre)
+        db_session.add(book)
+        return book
+
+    books = [
+        _book("Dragon Crown", "A young wizard tames a dragon to save the kingdom", fantasy),
+        _book("Dragon Heir", "The wizard heir of a dragon kingdom learns magic", fantasy),
+        _book("Star Fleet", "A starship crew battles aliens across the galaxy", space),
+        _book("Galaxy Rim", "Aliens and a rogue starship at the edge of the galaxy", space),
+    ]
+    db_session.commit()
+    return books
+
+
+class TestContentIndex:
+    def test_full_rebuild_stores_nearest_neighbor(self, db_session: Session, catalog):
+        assert rebuild_content_index(db_session, full=True) == 4
+
+        similar = get_similar_books(db_session, catalog[0].id, limit=3)
+        assert similar[0][0].id == catalog[1].id
+        assert all(score > 0 for _, score in similar)
+
+    def test_incremental_only_scores_new_books(self, db_session: Session, catalog):
+        rebuild_content_index(db_session, full=True)
+        assert rebuild_content_index(db_session) == 0
+
+        fantasy = db_session.query(Genre).filter_by(name="Fantasy").one()
+        new_book = Book(title="Dragon Queen", author="Someone", description="A dragon queen and her wizard rule the kingdom")
+        new_book.genres.append(fantasy)
+        db_session.add(new_book)
+        db_session.commit()
+
+        assert rebuild_content_index(db_session) == 1
+        assert get_similar_books(db_session, new_book.id)[0][0].id in {catalog[0].id, catalog[1].id}
+        # The new book was merged into an existing book's neighbor list
+        neighbor_ids = {b.id for b, _ in get_similar_books(db_session, catalog[0].id)}
+        assert new_book.id in neighbor_ids
+
+    def test_pairwise_scores_are_symmetric_keys(self, db_session: Session, catalog):
+        rebuild_content_index(db_session, full=True)
+        a, b = catalog[0].id, catalog[1].id
+        scores = get_pairwise_scores(db_session, [a, b])
+        assert (min(a, b), max(a, b)) in scores
+        assert db_session.query(BookSimilarity).count() > 0
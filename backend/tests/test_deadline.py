@@ -0,0 +1,129 @@
+"""Tests for request deadlines and their propagation."""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core import deadline
+from app.core.deadline import DeadlineExceeded, RequestDeadlineMiddleware, deadline_scope
+
+
+class TestBudget:
+    def test_route_budget_and_default(self, monkeypatch):
+        monkeypatch.setattr(deadline.settings, "REQUEST_DEADLINE_SECONDS", 10)
+        monkeypatch.setattr(deadline.settings, "RECOMMENDATIONS_REQUEST_DEADLINE_SECONDS", 20)
+        assert deadline.budget_for("/books/search-external") == 10
+        assert deadline.budget_for("/recommendations/graph") == 20
+
+    def test_client_header_can_only_shorten(self, monkeypatch):
+        monkeypatch.setattr(deadline.settings, "REQUEST_DEADLINE_SECONDS", 10)
+        assert deadline.budget_for("/books", "2.5") == 2.5
+        assert deadline.budget_for("/books", "60") == 10
+        assert deadline.budget_for("/books", "soon") == 10
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(deadline.settings, "REQUEST_DEADLINE_SECONDS", 0)
+        assert deadline.budget_for("/books", "2") is None
+
+
+class TestScope:
+    def test_no_deadline_outside_requests(self):
+        assert deadline.remaining() is None
+        deadline.check_deadline()
+        assert deadline.cap(123.0) == 123.0
+
+    def test_cap_and_check(self):
+        with deadline_scope(5):
+            assert 4 < deadline.remaining() <= 5
+            assert deadline.cap(time.monotonic() + 60) == deadline.get_deadline()
+        with deadline_scope(0):
+            with pytest.raises(DeadlineExceeded):
+                deadline.check_deadline()
+        assert deadline.get_deadline() is None
+
+
+def test_middleware_sets_deadline_for_sync_endpoints(monkeypatch):
+    monkeypatch.setattr(deadline.settings, "REQUEST_DEADLINE_SECONDS", 10)
+    app = FastAPI()
+    app.add_middleware(RequestDeadlineMiddleware)
+
+    @app.get("/left")
+    def left():
+        return {"remaining": deadline.remaining()}
+
+    client = TestClient(app)
+    assert 9 < client.get("/left").json()["remaining"] <= 10
+    assert 1 < client.get("/left", headers={"X-Request-Timeout": "2"}).json()["remaining"] <= 2
+
+
+def test_google_books_call_is_capped_by_request_deadline(monkeypatch):
+    from app.services import google_books
+
+    get = MagicMock()
+    get.return_value.json.return_value = {}
+    monkeypatch.setattr(google_books.requests, "get", get)
+    monkeypatch.setattr(google_books, "_get_retry_budget", MagicMock)
+
+    with deadline_scope(1.5):
+        google_books.get_json("https://books", {})
+    assert get.call_args.kwargs["timeout"] <= 1.5
+
+    with deadline_scope(0):
+        with pytest.raises(DeadlineExceeded):
+            google_books.get_json("https://books", {})
+
+
+class TestDatabase:
+    def test_transaction_gets_statement_timeout(self):
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            with deadline_scope(3):
+                timeout = db.execute(text("SHOW statement_timeout")).scalar()
+            assert timeout.endswith("ms") or timeout.endswith("s")
+            assert timeout != "0"
+        finally:
+            db.close()
+
+    def test_slow_statement_is_cancelled_with_504(self):
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            with deadline_scope(0.3):
+                started = time.monotonic()
+                with pytest.raises(DeadlineExceeded):
+                    db.execute(text("SELECT pg_sleep(5)"))
+            assert time.monotonic() - started < 2
+        finally:
+            db.close()
+
+    def test_no_timeout_without_deadline(self):
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            assert db.execute(text("SHOW statement_timeout")).scalar() == "0"
+        finally:
+            db.close()
+
+    def test_async_session_is_cancelled_with_504(self):
+        import asyncio
+
+        from app.core.database import AsyncSessionLocal
+
+        async def run():
+            async with AsyncSessionLocal() as db:
+                with deadline_scope(0.3):
+                    assert (await db.scalar(text("SHOW statement_timeout"))) != "0"
+                    with pytest.raises(DeadlineExceeded):
+                        await db.execute(text("SELECT pg_sleep(5)"))
+
+        started = time.monotonic()
+        asyncio.run(run())
+        assert time.monotonic() - started < 2
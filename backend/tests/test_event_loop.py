@@ -0,0 +1,148 @@
+"""Tests for offloading blocking work and the event-loop lag monitor."""
+
+import asyncio
+import threading
+import time
+
+from app.core import loop_monitor, offload
+from app.core.deadline import deadline_scope, remaining
+from app.core.metrics import get_counters, get_gauges, get_histograms, reset_counters
+
+
+class TestRunInPool:
+    def setup_method(self):
+        reset_counters()
+
+    def test_runs_on_the_named_pool_with_request_context(self):
+        async def scenario():
+            with deadline_scope(5):
+                return await offload.run_in_pool(
+                    offload.PASSWORD_POOL, lambda: (threading.current_thread().name, remaining())
+                )
+
+        thread_name, left = asyncio.run(scenario())
+        assert thread_name.startswith("offload-password")
+        assert left is not None and 4 < left <= 5
+        assert get_gauges()["offload.password.pending"] == 0
+        assert get_histograms()["offload.password.seconds"]["count"] == 1
+
+    def test_blocking_call_does_not_stall_the_loop(self):
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            await offload.run_in_pool(offload.IMAGE_POOL, time.sleep, 0.2)
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(scenario()) >= 5
+
+    def test_pool_size_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(offload.settings, "IMAGE_PROCESSING_WORKERS", 1)
+        offload.shutdown_pools()
+        try:
+            assert offload.get_executor(offload.IMAGE_POOL)._max_workers == 1
+        finally:
+            offload.shutdown_pools()
+
+
+def test_signup_hashes_on_the_password_pool_but_creates_off_it(client, monkeypatch):
+    from app.api.v1.endpoints import auth
+    from app.core.security import hash_password
+    from app.services.user_service import UserService
+
+    threads = {}
+    create = UserService.create
+
+    def recording_hash(password):
+        threads["hash"] = threading.current_thread().name
+        return hash_password(password)
+
+    def recording_create(self, user_data, hashed_password=None):
+        threads["create"] = threading.current_thread().name
+        return create(self, user_data, hashed_password)
+
+    monkeypatch.setattr(auth, "hash_password", recording_hash)
+    monkeypatch.setattr(UserService, "create", recording_create)
+
+    response = client.post(
+        "/auth/signup",
+        data={"name": "Pool User", "email": "pool@example.com", "password": "secret123"},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 303
+    assert threads["hash"].startswith("offload-password")
+    assert not threads["create"].startswith("offload-")
+
+
+class TestLoopLagMonitor:
+    def setup_method(self):
+        reset_counters()
+
+    def test_blocking_the_loop_is_reported(self, monkeypatch, caplog):
+        monkeypatch.setattr(loop_monitor.settings, "LOOP_LAG_CHECK_INTERVAL", 0.02)
+        monkeypatch.setattr(loop_monitor.settings, "LOOP_LAG_THRESHOLD", 0.1)
+
+        async def scenario():
+            assert loop_monitor.start_loop_lag_monitor() is not None
+            await asyncio.sleep(0.05)
+            time.sleep(0.25)  # a blocking call on the loop
+            await asyncio.sleep(0.05)
+            await loop_monitor.stop_loop_lag_monitor()
+
+        asyncio.run(scenario())
+        assert get_counters()["event_loop.blocked"] >= 1
+        assert get_histograms()["event_loop.lag_seconds"]["count"] >= 2
+        assert "Event loop blocked" in caplog.text
+
+    def test_disabled_by_default_in_tests(self):
+        async def scenario():
+            return loop_monitor.start_loop_lag_monitor()
+
+        assert asyncio.run(scenario()) is None
+
+
+def test_login_releases_the_connection_before_hashing(monkeypatch):
+    from types import SimpleNamespace
+
+    from fastapi import BackgroundTasks, Response
+
+    from app.api.v1.endpoints import auth
+
+    events = []
+
+    class Session:
+        async def commit(self):
+            events.append("commit")
+
+    class Users:
+        def __init__(self, db):
+            pass
+
+        async def get_user_by_email(self, email):
+            events.append("lookup")
+            return SimpleNamespace(email=email, password="hash", is_active=True)
+
+    def verify(password, hashed):
+        events.append("verify")
+        return False
+
+    monkeypatch.setattr(auth, "AsyncUserService", Users)
+    monkeypatch.setattr(auth, "verify_password", verify)
+    form = SimpleNamespace(username="reader@example.com", password="wrong")
+
+    async def scenario():
+        try:
+            await auth.login_for_access_token(BackgroundTasks(), Response(), Session(), form)
+        except auth.HTTPException as e:
+            return e.status_code
+
+    assert asyncio.run(scenario()) == 401
+    assert events == ["lookup", "commit", "verify"]
@@ -0,0 +1,142 @@
+"""Tests for Google Books retries and the retry budget."""
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from app.core.metrics import get_counters, reset_counters
+from app.core.retry_budget import RetryBudget
+from app.services import google_books
+
+
+class FakeBudgetRedis:
+    """Minimal fake Redis supporting hash counters through a pipeline."""
+
+    def __init__(self):
+        self._store: dict = {}
+        self._results: list = []
+
+    def pipeline(self, transaction=True):
+        self._results = []
+        return self
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+    def hincrby(self, key, field, amount):
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        self._results.append(int(bucket[field]))
+
+    def hget(self, key, field):
+        self._results.append(self._store.get(key, {}).get(field))
+
+    def expire(self, key, ttl):
+        self._results.append(True)
+
+
+def _response(status, body=None, headers=None):
+    response = MagicMock(status_code=status, headers=headers or {})
+    response.json.return_value = body or {}
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"{status} error", response=response)
+    return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(google_books.time, "sleep", recorded.append)
+    return recorded
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    reset_counters()
+    redis = FakeBudgetRedis()
+    budget = RetryBudget("google_books", ratio=0.1, min_retries=3, window_seconds=10, redis_factory=lambda: redis)
+    monkeypatch.setattr(google_books, "_retry_budget", budget)
+    yield budget
+    reset_counters()
+
+
+@pytest.fixture
+def http(monkeypatch):
+    get = MagicMock()
+    monkeypatch.setattr(google_books.requests, "get", get)
+    return get
+
+
+class TestGetJson:
+    def test_retries_transient_errors_then_succeeds(self, http, sleeps, budget):
+        http.side_effect = [requests.Timeout("slow"), _response(503), _response(200, {"items": [1]})]
+
+        assert google_books.get_json("https://books", {"q": "dune"}) == {"items": [1]}
+        assert http.call_count == 3
+        assert len(sleeps) == 2
+
+    def test_does_not_retry_client_errors(self, http, sleeps, budget):
+        http.return_value = _response(404)
+
+        with pytest.raises(requests.HTTPError):
+            google_books.get_json("https://books", {})
+        assert http.call_count == 1
+
+    def test_gives_up_after_max_attempts(self, http, sleeps, budget, monkeypatch):
+        monkeypatch.setattr(google_books.settings, "GOOGLE_BOOKS_MAX_ATTEMPTS", 2)
+        http.side_effect = requests.ConnectionError("refused")
+
+        with pytest.raises(requests.ConnectionError):
+            google_books.get_json("https://books", {})
+        assert http.call_count == 2
+
+    def test_honours_retry_after(self, http, sleeps, budget):
+        http.side_effect = [_response(429, headers={"Retry-After": "1.5"}), _response(200, {})]
+
+        google_books.get_json("https://books", {})
+        assert sleeps == [1.5]
+
+    def test_does_not_wait_past_the_deadline(self, http, sleeps, budget):
+        http.return_value = _response(429, headers={"Retry-After": "30"})
+
+        with pytest.raises(requests.HTTPError):
+            google_books.get_json("https://books", {}, deadline_seconds=5)
+        assert http.call_count == 1
+        assert sleeps == []
+
+    def test_attempt_timeout_is_capped_by_the_deadline(self, http, sleeps, budget):
+        http.return_value = _response(200, {})
+        google_books.get_json("https://books", {}, deadline_seconds=3)
+        assert http.call_args.kwargs["timeout"] <= 3
+
+    def test_backoff_grows_with_full_jitter(self, monkeypatch):
+        monkeypatch.setattr(google_books.random, "uniform", lambda low, high: high)
+        delays = [google_books.backoff_delay(attempt) for attempt in (1, 2, 3, 10)]
+        assert delays == [0.2, 0.4, 0.8, google_books.settings.GOOGLE_BOOKS_RETRY_MAX_DELAY]
+
+
+class TestRetryBudget:
+    def test_retries_limited_to_share_of_requests(self, budget):
+        for _ in range(20):
+            budget.record_request()
+        # min_retries 3 + 10% of 20 requests
+        assert [budget.try_spend() for _ in range(6)] == [True] * 5 + [False]
+        assert get_counters()["retry_budget.google_books.exhausted"] == 1
+
+    def test_exhausted_budget_stops_retries(self, http, sleeps, budget):
+        for _ in range(3):
+            assert budget.try_spend()
+        http.side_effect = [_response(503), _response(200, {})]
+
+        with pytest.raises(requests.HTTPError):
+            google_books.get_json("https://books", {})
+        assert http.call_count == 1
+
+    def test_counts_locally_without_redis(self):
+        budget = RetryBudget("local", ratio=0.5, min_retries=0, window_seconds=10, redis_factory=lambda: None)
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_spend() is True
+        assert budget.try_spend() is False
@@ -0,0 +1,153 @@
+"""Tests for LLM call deadlines and the local fallback."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services.llm_provider import (
+    FakeLLMProvider,
+    LazyLLM,
+    LLMResponse,
+    LLMTimeoutError,
+    set_llm_provider,
+)
+
+
+class FakeRedisHash:
+    """Minimal fake Redis supporting hash operations."""
+
+    def __init__(self):
+        self._store: dict = {}
+
+    def hgetall(self, key):
+        return dict(self._store.get(key, {}))
+
+    def hset(self, key, mapping=None, **kwargs):
+        self._store.setdefault(key, {}).update(mapping or {})
+
+    def publish(self, channel, message):
+        return 0
+
+    def hget(self, key, field):
+        return self._store.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount=1):
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self._store:
+            return None
+        self._store[key] = value
+        return True
+
+    def delete(self, *keys):
+        return sum(self._store.pop(key, None) is not None for key in keys)
+
+    def register_script(self, script):
+        """Only the probe-release script: compare-and-delete."""
+        def release(keys, args):
+            if self._store.get(keys[0]) == args[0]:
+                return self.delete(keys[0])
+            return 0
+        return release
+
+
+class SlowProvider(FakeLLMProvider):
+    """Answers only after ``delay`` seconds, recording the timeout it got."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+        self.finished = threading.Event()
+
+    def invoke(self, prompt, json_mode=False, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        self.finished.set()
+        return LLMResponse(content='{"recommendations": []}')
+
+
+@pytest.fixture(autouse=True)
+def restore_provider():
+    yield
+    set_llm_provider(None)
+
+
+class TestLazyLLMDeadline:
+    def test_raises_when_deadline_passes(self):
+        provider = SlowProvider(delay=0.5)
+        set_llm_provider(provider)
+
+        started = time.monotonic()
+        with pytest.raises(LLMTimeoutError):
+            LazyLLM()("prompt", timeout=0.05)
+
+        assert time.monotonic() - started < 0.4
+        # The remaining budget is handed to the HTTP client as well
+        assert provider.timeouts == [0.05]
+
+    def test_answers_within_deadline(self):
+        set_llm_provider(SlowProvider(delay=0))
+        assert LazyLLM()("prompt", timeout=1).content == '{"recommendations": []}'
+
+    def test_expired_deadline_skips_the_call(self):
+        provider = SlowProvider(delay=0)
+        set_llm_provider(provider)
+        with pytest.raises(LLMTimeoutError):
+            LazyLLM()("prompt", timeout=0)
+        assert provider.timeouts == []
+
+
+@patch("app.services.recommendation_service.find_reusable_recommendations", return_value=None)
+@patch("app.services.recommendation_service.get_cached_recommendations", return_value=None)
+@patch("app.services.recommendation_service.get_candidates", return_value=[])
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+def test_timeout_counts_as_slow_call_on_breaker(mock_get_cb, *_):
+    from app.services.recommendation_service import generate_book_recommendations
+
+    redis = FakeRedisHash()
+    mock_get_cb.return_value = CircuitBreaker(
+        name="openai", failure_threshold=5, recovery_timeout=30, redis_client=redis
+    )
+    set_llm_provider(SlowProvider(delay=0.5))
+    review = SimpleNamespace(user_id=1, book_id=2, external_book_id=None, rate=5, content="Loved it")
+
+    with pytest.raises(LLMTimeoutError):
+        generate_book_recommendations([review], deadline=time.monotonic() + 0.05)
+
+    assert int(redis._store["circuit_breaker:openai"]["failure_count"]) == 1
+
+
+@patch("app.api.v1.endpoints.recommendations.top_rated_in_genres")
+@patch("app.api.v1.endpoints.recommendations.get_user_genres", return_value=["Fantasy"])
+@patch("app.api.v1.endpoints.recommendations.generate_book_recommendations", side_effect=LLMTimeoutError)
+def test_endpoint_falls_back_to_top_rated_in_genres(mock_gen, mock_genres, mock_top_rated):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.security import get_current_user
+    from app.core.database import get_db
+
+    review = MagicMock(
+        id=1, user_id=1, book_id=3, external_book_id=None, content="Great", rate=5,
+        user_name="Reader", user_profile_picture=None,
+    )
+    session = MagicMock()
+    session.query.return_value.filter.return_value.all.return_value = [review]
+    mock_top_rated.return_value = [{"book_id": 9, "title": "Dragon"}]
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(id=1)
+    app.dependency_overrides[get_db] = lambda: session
+
+    try:
+        response = TestClient(app).get("/recommendations/?strategy=llm&limit=3")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"strategy": "local", "recommendations": [{"book_id": 9, "title": "Dragon"}]}
+    mock_top_rated.assert_called_once_with(session, ["Fantasy"], {3}, limit=3)
@@ -0,0 +1,81 @@
+"""Tests for the lazily constructed LLM providers."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.services import llm_provider
+from app.services.llm_provider import (
+    FakeLLMProvider,
+    LLMConfigurationError,
+    OpenAIProvider,
+    get_llm_provider,
+    set_llm_provider,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_provider():
+    set_llm_provider(None)
+    yield
+    set_llm_provider(None)
+
+
+def test_provider_is_selected_from_settings(monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_PROVIDER", "fake")
+    assert isinstance(get_llm_provider(), FakeLLMProvider)
+    assert get_llm_provider() is get_llm_provider()
+
+
+def test_default_provider_outside_tests_is_openai_without_key():
+    """A deployment missing its key must not silently serve fake answers."""
+    env = {
+        k: v for k, v in os.environ.items()
+        if k not in ("OPENAI_API_KEY", "LLM_PROVIDER", "PYTEST_CURRENT_TEST", "TESTING")
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.core.config import settings; print(settings.LLM_PROVIDER)"],
+        cwd=Path(__file__).resolve().parent.parent, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "openai"
+
+
+def test_unknown_provider_is_rejected(monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_PROVIDER", "nope")
+    with pytest.raises(LLMConfigurationError):
+        get_llm_provider()
+
+
+def test_openai_provider_needs_key_only_when_called(monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "OPENAI_API_KEY", "")
+    provider = OpenAIProvider()
+    with pytest.raises(LLMConfigurationError):
+        provider.invoke("hello")
+
+
+@patch("app.services.recommendation_service.get_cached_recommendations", return_value=None)
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+def test_fake_provider_answers_recommendation_prompt(mock_cb, mock_cache, monkeypatch):
+    from app.services import candidate_pools
+    from app.services.recommendation_service import generate_book_recommendations_with_usage
+
+    set_llm_provider(FakeLLMProvider())
+    mock_cb.return_value.state_permits.return_value = True
+    monkeypatch.setattr(candidate_pools, "_pool_cache", {})
+    with patch("app.services.candidate_pools.get_redis", return_value=None):
+        candidate_pools.store_pools({"fantasy": [
+            {"external_id": "vol-1", "book_id": None, "title": "Dragon Crown", "authors": ["A. Writer"]},
+        ]})
+        review = SimpleNamespace(user_id=1, book_id=2, external_book_id=None, rate=5, content="Loved it")
+        recommendations, tokens = generate_book_recommendations_with_usage([review], ["Fantasy"])
+
+    assert [(r["external_id"], r["title"], r["authors"]) for r in recommendations] == [
+        ("vol-1", "Dragon Crown", ["A. Writer"])
+    ]
+    assert tokens > 0
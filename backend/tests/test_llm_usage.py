@@ -0,0 +1,154 @@
+"""Tests for LLM token, cost and latency accounting."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.metrics import get_counters, get_histograms, render_prometheus, reset_counters
+from app.services import llm_usage
+from app.services.llm_provider import LLMResponse
+
+
+class FakeUsageRedis:
+    """Minimal fake Redis supporting hash counters through a pipeline."""
+
+    def __init__(self):
+        self._store: dict = {}
+        self._results: list = []
+
+    def pipeline(self):
+        self._results = []
+        return self
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+    def hincrby(self, key, field, amount):
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        self._results.append(int(bucket[field]))
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(float(bucket.get(field, 0)) + amount)
+        self._results.append(float(bucket[field]))
+
+    def expire(self, key, ttl):
+        self._results.append(True)
+
+    def hgetall(self, key):
+        self._results.append(dict(self._store.get(key, {})))
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    reset_counters()
+    fake = FakeUsageRedis()
+    monkeypatch.setattr(llm_usage, "get_redis", lambda: fake)
+    yield fake
+    reset_counters()
+
+
+def _response(prompt_tokens, completion_tokens):
+    return LLMResponse(content="{}", usage_metadata={
+        "input_tokens": prompt_tokens,
+        "output_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    })
+
+
+class TestRecording:
+    def test_call_records_tokens_cost_and_latency(self):
+        llm_usage.record_call(1.5, _response(1000, 200))
+
+        today = llm_usage.get_daily_usage(1)[0]
+        assert today["calls"] == today["calls_ok"] == 1
+        assert (today["prompt_tokens"], today["completion_tokens"]) == (1000, 200)
+        assert today["cost_usd"] == pytest.approx(llm_usage.estimate_cost(1000, 200))
+        assert today["latency_histogram"]["2"] == 1
+        assert get_histograms()["llm.latency_seconds"]["count"] == 1
+
+    def test_cache_hit_rate_counts_reuse_as_hit(self):
+        llm_usage.record_cache_hit()
+        llm_usage.record_cache_hit("reuse")
+        llm_usage.record_cache_miss()
+        llm_usage.record_call(0.1, outcome=llm_usage.CALL_TIMEOUT)
+
+        today = llm_usage.get_daily_usage(1)[0]
+        assert today["cache_hit_rate"] == pytest.approx(2 / 3, abs=0.001)
+        assert today["timeouts"] == 1
+        assert today["prompt_tokens"] == 0
+
+    def test_missing_days_are_reported_as_zero(self):
+        usage = llm_usage.get_daily_usage(3)
+        assert [day["calls"] for day in usage] == [0, 0, 0]
+        assert usage[0]["avg_latency_seconds"] is None
+
+    def test_without_redis_only_process_counters(self, monkeypatch):
+        monkeypatch.setattr(llm_usage, "get_redis", lambda: None)
+        llm_usage.record_breaker_rejection()
+        assert get_counters()["llm.breaker_rejections"] == 1
+        assert llm_usage.get_daily_usage() is None
+
+
+@patch("app.services.recommendation_service.find_reusable_recommendations", return_value=None)
+@patch("app.services.recommendation_service.store_recommendations")
+@patch("app.services.recommendation_service.get_candidates", return_value=[{"external_id": "vol-1", "title": "Dune"}])
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+@patch("app.services.recommendation_service.llm")
+def test_generate_records_miss_then_hit(mock_llm, mock_cb, mock_candidates, mock_store, mock_reuse):
+    from app.services import recommendation_service
+
+    with patch.object(recommendation_service, "_recommendations_cache", {}), \
+            patch.object(recommendation_service, "get_redis", return_value=None):
+        mock_cb.return_value.state_permits.return_value = True
+        mock_llm.return_value = MagicMock(
+            content='{"recommendations": [{"id": "vol-1", "title": "Dune"}]}',
+            usage_metadata={"input_tokens": 300, "output_tokens": 50, "total_tokens": 350},
+        )
+        review = SimpleNamespace(user_id=1, book_id=2, external_book_id=None, rate=5, content="Loved it")
+
+        recommendation_service.generate_book_recommendations([review])
+        recommendation_service.generate_book_recommendations([review])
+
+        mock_cb.return_value.state_permits.return_value = False
+        assert recommendation_service.generate_book_recommendations([review]) is None
+
+    today = llm_usage.get_daily_usage(1)[0]
+    assert (today["cache_misses"], today["cache_hits"], today["calls"]) == (1, 1, 1)
+    assert today["prompt_tokens"] == 300
+    assert today["breaker_rejections"] == 1
+
+
+def test_metrics_endpoint_exports_prometheus_text():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    llm_usage.record_call(0.3, _response(10, 5))
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert "sonic_llm_prompt_tokens_total 10" in response.text
+    assert 'sonic_llm_latency_seconds_bucket{le="0.5"} 1' in response.text
+    assert response.text == render_prometheus()
+
+
+def test_admin_llm_metrics_endpoint():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.security import get_admin_user
+
+    llm_usage.record_cache_miss()
+    app.dependency_overrides[get_admin_user] = lambda: MagicMock(id=1)
+    try:
+        response = TestClient(app).get("/api/v1/admin/metrics/llm?days=2")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["daily"]) == 2
+    assert data["daily"][0]["cache_misses"] == 1
+    assert data["process"]["counters"]["llm.cache_misses"] == 1
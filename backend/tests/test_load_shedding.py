@@ -0,0 +1,118 @@
+"""Tests for per-route-class load shedding."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import load_shedding
+from app.core.load_shedding import ConcurrencyLimit, LoadSheddingMiddleware
+from app.core.metrics import get_counters, get_gauges, render_prometheus, reset_counters
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestClassify:
+    def test_expensive_default_and_exempt(self):
+        assert load_shedding.classify("/recommendations/graph") == "expensive"
+        assert load_shedding.classify("/books/search-external") == "expensive"
+        assert load_shedding.classify("/users/me") == "default"
+        assert load_shedding.classify("/books/12") == "default"
+        assert load_shedding.classify("/metrics") is None
+
+
+class TestConcurrencyLimit:
+    def setup_method(self):
+        reset_counters()
+
+    def test_rejects_when_queue_is_full(self):
+        async def scenario():
+            limit = ConcurrencyLimit("t", limit=1, max_queue=0, queue_timeout=1)
+            assert await limit.acquire()
+            assert await limit.acquire() is False
+            limit.release()
+            assert await limit.acquire()
+
+        _run(scenario())
+        assert get_counters()["load_shedding.t.rejected"] == 1
+
+    def test_queued_request_gets_released_slot(self):
+        async def scenario():
+            limit = ConcurrencyLimit("t", limit=1, max_queue=1, queue_timeout=5)
+            assert await limit.acquire()
+            waiting = asyncio.ensure_future(limit.acquire())
+            await asyncio.sleep(0)
+            assert limit.queue_depth == 1
+            assert get_gauges()["load_shedding.t.queue_depth"] == 1
+            limit.release()
+            assert await waiting
+            assert limit.in_flight == 1 and limit.queue_depth == 0
+            limit.release()
+            assert limit.in_flight == 0
+
+        _run(scenario())
+
+    def test_queue_wait_times_out(self):
+        async def scenario():
+            limit = ConcurrencyLimit("t", limit=1, max_queue=1, queue_timeout=5)
+            assert await limit.acquire()
+            assert await limit.acquire(timeout=0.05) is False
+            assert limit.queue_depth == 0
+
+        _run(scenario())
+        assert get_counters()["load_shedding.t.timed_out"] == 1
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        async def scenario():
+            limit = ConcurrencyLimit("t", limit=1, max_queue=1, queue_timeout=5)
+            assert await limit.acquire()
+            waiting = asyncio.ensure_future(limit.acquire())
+            await asyncio.sleep(0)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            assert limit.queue_depth == 0
+            limit.release()
+            assert limit.in_flight == 0
+
+        _run(scenario())
+
+
+def test_saturated_class_returns_503_without_blocking_others(monkeypatch):
+    reset_counters()
+    monkeypatch.setattr(load_shedding.settings, "LOAD_SHED_EXPENSIVE_CONCURRENCY", 1)
+    monkeypatch.setattr(load_shedding.settings, "LOAD_SHED_EXPENSIVE_QUEUE", 0)
+    monkeypatch.setattr(load_shedding.settings, "LOAD_SHED_QUEUE_TIMEOUT_SECONDS", 1)
+    app = FastAPI()
+    app.add_middleware(LoadSheddingMiddleware)
+    started, finish = threading.Event(), threading.Event()
+
+    @app.get("/recommendations/graph")
+    def graph():
+        started.set()
+        finish.wait(5)
+        return {"ok": True}
+
+    @app.get("/users/me")
+    def me():
+        return {"ok": True}
+
+    client = TestClient(app)
+    slow = threading.Thread(target=client.get, args=("/recommendations/graph",))
+    slow.start()
+    try:
+        assert started.wait(5)
+        shed = client.get("/recommendations/graph")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        assert shed.json()["status"] == "error"
+        assert client.get("/users/me").status_code == 200
+        assert "sonic_load_shedding_expensive_in_flight 1" in render_prometheus()
+    finally:
+        finish.set()
+        slow.join(5)
+    assert get_gauges()["load_shedding.expensive.in_flight"] == 0
@@ -22,6 +22,37 @@ class FakeRedisHash:
         if mapping:
             self._store[key].update(mapping)
 
+    def publish(self, channel, message):
+        return 0
+
+    def hget(self, key, field):
+        return self._store.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount=1):
+        bucket = self._store.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self._store:
+            return None
+        self._store[key] = value
+        return True
+
+    def delete(self, *keys):
+        return sum(self._store.pop(key, None) is not None for key in keys)
+
+    def register_script(self, script):
+        """Only the probe-release script: compare-and-delete."""
+        def release(keys, args):
+            if self._store.get(keys[0]) == args[0]:
+                return self.delete(keys[0])
+            return 0
+        return release
+
+    def exists(self, *keys):
+        return sum(key in self._store for key in keys)
+
 
 def _make_open_circuit(redis_client=None):
     """Create an OpenAI circuit breaker that is already in OPEN state."""
@@ -59,10 +90,33 @@ class TestOpenAICircuitBreakerInRecommendations:
 
     @patch("app.services.recommendation_service._get_openai_circuit_breaker")
     @patch("app.services.recommendation_service.get_cached_recommendations")
-    @patch("app.services.recommendation_service.get_google_books_by_genre")
+    @patch("app.services.recommendation_service.llm")
+    def test_cache_hit_does_not_take_the_probe_lease(self, mock_llm, mock_cache, mock_get_cb):
+        """A half-open circuit's probe is left for a request that calls the LLM."""
+        from app.services.recommendation_service import generate_book_recommendations
+
+        redis = FakeRedisHash()
+        cb = CircuitBreaker(name="openai", failure_threshold=1, recovery_timeout=0, redis_client=redis)
+        cb.record_failure()
+        mock_get_cb.return_value = cb
+        mock_cache.return_value = [{"external_id": "vol-1", "title": "Dune"}]
+
+        fake_review = MagicMock()
+        fake_review.book_id = 1
+        fake_review.rate = 5
+        fake_review.content = "Great book"
+
+        assert generate_book_recommendations([fake_review]) == mock_cache.return_value
+        mock_llm.assert_not_called()
+        assert "circuit_breaker:openai:probe" not in redis._store
+        assert cb.acquire_probe() is True
+
+    @patch("app.services.recommendation_service._get_openai_circuit_breaker")
+    @patch("app.services.recommendation_service.get_cached_recommendations")
+    @patch("app.services.recommendation_service.get_candidates")
     @patch("app.services.recommendation_service.llm")
     def test_records_success_on_successful_call(
-        self, mock_llm, mock_google, mock_cache, mock_get_cb
+        self, mock_llm, mock_candidates, mock_cache, mock_get_cb
     ):
         """Successful LLM call records success on the circuit breaker."""
         redis = FakeRedisHash()
@@ -71,10 +125,10 @@ class TestOpenAICircuitBreakerInRecommendations:
         )
         mock_get_cb.return_value = cb
         mock_cache.return_value = None
-        mock_google.return_value = []
+        mock_candidates.return_value = [{"external_id": "vol-1", "title": "Dune", "authors": ["Frank Herbert"]}]
 
         mock_result = MagicMock()
-        mock_result.content = "Recommendation text"
+        mock_result.content = '{"recommendations": [{"id": "vol-1", "title": "Dune", "authors": ["Frank Herbert"]}]}'
         mock_llm.return_value = mock_result
 
         fake_review = MagicMock()
@@ -85,11 +139,12 @@ class TestOpenAICircuitBreakerInRecommendations:
         from app.services.recommendation_service import generate_book_recommendations
 
         result = generate_book_recommendations([fake_review])
-        assert result == "Recommendation text"
+        assert [(r["external_id"], r["title"]) for r in result] == [("vol-1", "Dune")]
 
-        # Verify circuit is still closed
+        # Verify circuit is still closed (a clean success writes nothing)
         state = redis._store.get("circuit_breaker:openai", {})
-        assert state.get("state") == CircuitState.CLOSED
+        assert state.get("state", CircuitState.CLOSED) == CircuitState.CLOSED
+        assert cb.is_call_permitted() is True
 
     @patch("app.services.recommendation_service._get_openai_circuit_breaker")
     @patch("app.services.recommendation_service.get_cached_recommendations")
@@ -157,7 +212,7 @@ class TestRecommendationsEndpointFallback:
 
         try:
             client = TestClient(app)
-            response = client.get("/recommendations/")
+            response = client.get("/recommendations/?strategy=llm")
 
             assert response.status_code == 200
             body = response.json()
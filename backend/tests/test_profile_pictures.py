@@ -1,11 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.core import file_utils
 from app.models.user import User
 from app.core.security import hash_password
 from sqlalchemy.orm import Session
 import io
 from PIL import Image
 
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """Keep uploaded pictures out of the source tree."""
+    monkeypatch.setattr(file_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
 def create_test_image():
     """Create a simple test image."""
     img = Image.new('RGB', (100, 100), color='red')
@@ -14,7 +21,7 @@ def create_test_image():
     img_io.seek(0)
     return img_io
 
-def test_upload_profile_picture(client: TestClient, db_session: Session):
+def test_upload_profile_picture(client: TestClient, db_session: Session, upload_dir):
     """Test uploading a profile picture."""
     # Create a test user
     user = User(
@@ -52,6 +59,7 @@ def test_upload_profile_picture(client: TestClient, db_session: Session):
     # Verify user was updated in database
     db_session.refresh(user)
     assert user.profile_picture is not None
+    assert (upload_dir / user.profile_picture).exists()
 
 def test_update_profile_name(client: TestClient, db_session: Session):
     """Test updating profile name."""
@@ -1,19 +1,42 @@
+import math
+import os
+import threading
 import time
+import uuid
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from app.core.rate_limiter import GlobalRateLimiter, RateLimiter
+from app.core.rate_limiter import (
+    APPROXIMATE,
+    APPROXIMATE_WINDOW_SCRIPT,
+    SLIDING_WINDOW_SCRIPT,
+    GlobalRateLimiter,
+    HybridRateLimiter,
+    RateLimiter,
+)
 
 
 class FakeRedis:
-    """Minimal fake Redis for testing the rate limiter without a real server."""
+    """Minimal fake Redis for testing the rate limiter without a real server.
+
+    ``register_script`` returns a Python stand-in for the limiter Lua
+    scripts, run against the fake's sorted sets and hashes.  ``now_ms``
+    pins the server clock.
+    """
 
     def __init__(self):
         self._store: dict = {}
+        self.now_ms = None
+
+    def time_ms(self):
+        return self.now_ms if self.now_ms is not None else int(time.time() * 1000)
 
-    def pipeline(self):
-        return FakePipeline(self)
+    def register_script(self, script):
+        if script == APPROXIMATE_WINDOW_SCRIPT:
+            return FakeApproximateWindowScript(self)
+        assert script == SLIDING_WINDOW_SCRIPT
+        return FakeSlidingWindowScript(self)
 
     def zremrangebyscore(self, key, min_score, max_score):
         if key not in self._store:
@@ -42,46 +65,51 @@ class FakeRedis:
             return sliced
         return [m for m, _ in sliced]
 
-    def expire(self, key, seconds):
-        pass
 
-
-class FakePipeline:
+class FakeSlidingWindowScript:
     def __init__(self, redis_instance: FakeRedis):
         self._redis = redis_instance
-        self._commands: list = []
-
-    def zremrangebyscore(self, key, min_score, max_score):
-        self._commands.append(("zremrangebyscore", key, min_score, max_score))
-        return self
 
-    def zcard(self, key):
-        self._commands.append(("zcard", key))
-        return self
+    def __call__(self, keys, args):
+        key, (window, limit, member) = keys[0], args
+        now = self._redis.time_ms()
+        self._redis.zremrangebyscore(key, 0, now - window)
+        if self._redis.zcard(key) < limit:
+            self._redis.zadd(key, {member: now})
+            return [1, 0]
+        oldest = self._redis.zrange(key, 0, 0, withscores=True)
+        if not oldest:
+            return [0, math.ceil(window / 1000)]
+        return [0, max((oldest[0][1] + window - now) // 1000 + 1, 1)]
 
-    def zadd(self, key, mapping):
-        self._commands.append(("zadd", key, mapping))
-        return self
 
-    def expire(self, key, seconds):
-        self._commands.append(("expire", key, seconds))
-        return self
+class FakeApproximateWindowScript:
+    def __init__(self, redis_instance: FakeRedis):
+        self._redis = redis_instance
 
-    def execute(self):
-        results = []
-        for cmd in self._commands:
-            name = cmd[0]
-            if name == "zremrangebyscore":
-                results.append(self._redis.zremrangebyscore(cmd[1], cmd[2], cmd[3]))
-            elif name == "zcard":
-                results.append(self._redis.zcard(cmd[1]))
-            elif name == "zadd":
-                self._redis.zadd(cmd[1], cmd[2])
-                results.append(1)
-            elif name == "expire":
-                results.append(True)
-        self._commands = []
-        return results
+    def __call__(self, keys, args):
+        key, (window, limit, _) = keys[0], args
+        if limit <= 0:
+            return [0, math.ceil(window / 1000)]
+        now = self._redis.time_ms()
+        current = now // window
+        stored = self._redis._store.get(key, {})
+        count, previous = stored.get("count", 0), stored.get("previous", 0)
+        if stored.get("window") == current - 1:
+            count, previous = 0, count
+        elif stored.get("window") != current:
+            count, previous = 0, 0
+
+        window_start = current * window
+        elapsed = (now - window_start) / window
+        if previous * (1 - elapsed) + count < limit:
+            self._redis._store[key] = {"window": current, "count": count + 1, "previous": previous}
+            return [1, 0]
+        if count < limit:
+            retry_at = window_start + window * (1 - (limit - count) / previous)
+        else:
+            retry_at = window_start + window + window * (1 - limit / count)
+        return [0, max(int((retry_at - now) // 1000) + 1, 1)]
 
 
 class TestRateLimiter:
@@ -145,7 +173,7 @@ class TestRateLimiter:
 
     def test_fails_open_when_redis_raises_exception(self):
         broken_redis = MagicMock()
-        broken_redis.pipeline.side_effect = Exception("Connection refused")
+        broken_redis.register_script.return_value.side_effect = Exception("Connection refused")
 
         limiter = RateLimiter(redis_client=broken_redis, max_requests=1, window_seconds=60)
 
@@ -207,7 +235,7 @@ class TestGlobalRateLimiter:
 
     def test_fails_open_when_redis_raises_exception(self):
         broken_redis = MagicMock()
-        broken_redis.pipeline.side_effect = Exception("Connection refused")
+        broken_redis.register_script.return_value.side_effect = Exception("Connection refused")
 
         limiter = GlobalRateLimiter(redis_client=broken_redis, max_requests=1, window_seconds=60)
         assert limiter.is_allowed() is True
@@ -219,3 +247,312 @@ class TestGlobalRateLimiter:
 
         # With max_requests=0, every call is over the limit
         assert limiter.is_allowed() is False
+
+
+class TestApproximateMode:
+    def test_blocks_over_limit_within_one_window(self):
+        fake_redis = FakeRedis()
+        fake_redis.now_ms = 600_000  # start of a window
+        limiter = RateLimiter(redis_client=fake_redis, max_requests=3, window_seconds=60, mode=APPROXIMATE)
+
+        assert [limiter.is_allowed("user1")[0] for _ in range(4)] == [True, True, True, False]
+        assert set(fake_redis._store) == {"rate_limit:user1:approx"}
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        fake_redis = FakeRedis()
+        limiter = RateLimiter(redis_client=fake_redis, max_requests=10, window_seconds=60, mode=APPROXIMATE)
+        fake_redis.now_ms = 600_000
+        for _ in range(10):
+            limiter.is_allowed("user1")
+
+        # A quarter into the next window 75% of the previous count still
+        # applies: 7.5 + count < 10 admits 3 more requests
+        fake_redis.now_ms = 660_000 + 15_000
+        assert [limiter.is_allowed("user1")[0] for _ in range(4)] == [True, True, True, False]
+
+        # Two windows later nothing remains
+        fake_redis.now_ms = 780_000
+        assert limiter.is_allowed("user1") == (True, 0)
+
+    def test_retry_after_is_when_estimate_drops_below_limit(self):
+        fake_redis = FakeRedis()
+        limiter = RateLimiter(redis_client=fake_redis, max_requests=4, window_seconds=60, mode=APPROXIMATE)
+        fake_redis.now_ms = 600_000
+        for _ in range(4):
+            limiter.is_allowed("user1")
+
+        allowed, retry_after = limiter.is_allowed("user1")
+        # The current window is full, so nothing frees up before it ends
+        assert allowed is False
+        assert retry_after == 61
+
+    def test_global_limiter_supports_approximate_mode(self):
+        fake_redis = FakeRedis()
+        fake_redis.now_ms = 600_000
+        limiter = GlobalRateLimiter(redis_client=fake_redis, max_requests=2, window_seconds=60, mode=APPROXIMATE)
+        assert [limiter.is_allowed() for _ in range(3)] == [True, True, False]
+
+    def test_unknown_mode_is_rejected(self):
+        with pytest.raises(ValueError):
+            RateLimiter(redis_client=None, max_requests=1, window_seconds=60, mode="fixed")
+
+
+class FakeCounterRedis:
+    """Fake Redis with string counters and a batching pipeline."""
+
+    def __init__(self):
+        self._store: dict = {}
+        self.round_trips = 0
+        self.commands: list = []
+
+    def pipeline(self, transaction=True):
+        return FakeCounterPipeline(self)
+
+
+class FakeCounterPipeline:
+    def __init__(self, redis_instance: FakeCounterRedis):
+        self._redis = redis_instance
+        self._results: list = []
+
+    def incrby(self, key, amount):
+        self._redis.commands.append(("incrby", key))
+        self._redis._store[key] = str(int(self._redis._store.get(key, 0)) + amount)
+        self._results.append(int(self._redis._store[key]))
+
+    def expire(self, key, seconds):
+        self._results.append(True)
+
+    def get(self, key):
+        self._redis.commands.append(("get", key))
+        self._results.append(self._redis._store.get(key))
+
+    def execute(self):
+        self._redis.round_trips += 1
+        return self._results
+
+
+class TestHybridRateLimiter:
+    def _limiter(self, redis_client, max_requests=10, local_share=0.2, sync_interval=3600):
+        return HybridRateLimiter(
+            redis_factory=lambda: redis_client,
+            max_requests=max_requests,
+            window_seconds=60,
+            sync_interval=sync_interval,
+            local_share=local_share,
+        )
+
+    def test_requests_within_local_share_make_no_redis_calls(self):
+        fake_redis = FakeCounterRedis()
+        limiter = self._limiter(fake_redis, max_requests=30)
+        limiter._synced_at = time.time()
+
+        assert all(limiter.is_allowed("1.2.3.4") == (True, 0) for _ in range(6))
+        assert fake_redis.round_trips == 0
+
+    def test_exhausted_share_is_renewed_from_shared_count(self):
+        fake_redis = FakeCounterRedis()
+        limiter = self._limiter(fake_redis, max_requests=10, local_share=0.2)
+        limiter._synced_at = time.time()
+
+        results = [limiter.is_allowed("user1")[0] for _ in range(12)]
+
+        assert results == [True] * 10 + [False] * 2
+        # One batched sync per used-up share of 2, not one per request
+        assert fake_redis.round_trips <= 6
+
+    def test_workers_share_the_limit_with_bounded_overshoot(self):
+        fake_redis = FakeCounterRedis()
+        workers = [self._limiter(fake_redis, max_requests=20, local_share=0.1) for _ in range(3)]
+
+        admitted = sum(worker.is_allowed("user1")[0] for _ in range(20) for worker in workers)
+
+        capacity = workers[0].capacity
+        assert 20 <= admitted <= 20 + len(workers) * capacity
+
+    def test_blocked_identifier_is_refused_locally(self):
+        fake_redis = FakeCounterRedis()
+        limiter = self._limiter(fake_redis, max_requests=2, local_share=1)
+        limiter.is_allowed("user1")
+        limiter.is_allowed("user1")
+        allowed, retry_after = limiter.is_allowed("user1")
+        assert allowed is False
+        assert retry_after >= 1
+
+        round_trips = fake_redis.round_trips
+        assert limiter.is_allowed("user1")[0] is False
+        assert fake_redis.round_trips == round_trips
+
+    def test_other_identifiers_unaffected(self):
+        limiter = self._limiter(FakeCounterRedis(), max_requests=1, local_share=1)
+        assert limiter.is_allowed("user1")[0] is True
+        assert limiter.is_allowed("user1")[0] is False
+        assert limiter.is_allowed("user2")[0] is True
+
+    def test_sync_skips_idle_identifiers(self):
+        fake_redis = FakeCounterRedis()
+        limiter = self._limiter(fake_redis, max_requests=30)
+        for identifier in ("idle1", "idle2", "busy"):
+            limiter.is_allowed(identifier)
+        limiter.sync(force=True)
+        fake_redis.commands.clear()
+
+        limiter.is_allowed("busy")
+        limiter.sync(force=True)
+
+        assert {key.split(":")[2] for _, key in fake_redis.commands} == {"busy"}
+        assert ("incrby", limiter._get_key("busy", int(time.time() // 60))) in fake_redis.commands
+
+    def test_sync_rereads_buckets_close_to_their_share(self):
+        fake_redis = FakeCounterRedis()
+        limiter = self._limiter(fake_redis, max_requests=30)  # share of 6
+        key = limiter._get_key("user1", int(time.time() // 60))
+        fake_redis._store[key] = "24"  # other workers
+        for _ in range(4):
+            limiter.is_allowed("user1")
+        limiter.sync(force=True)
+        assert limiter._buckets["user1"].tokens == 2
+        fake_redis.commands.clear()
+
+        fake_redis._store[key] = "10"  # the shared count dropped
+        limiter.sync(force=True)
+
+        assert fake_redis.commands == [("get", key), ("get", limiter._get_key("user1", int(time.time() // 60) - 1))]
+        assert limiter._buckets["user1"].tokens == 6
+
+    def test_fails_open_without_redis(self):
+        limiter = self._limiter(None, max_requests=1, local_share=1)
+        assert [limiter.is_allowed("user1")[0] for _ in range(3)] == [True, True, True]
+
+    def test_failed_sync_keeps_pending_tokens(self):
+        broken_redis = MagicMock()
+        broken_redis.pipeline.return_value.execute.side_effect = Exception("Connection refused")
+        limiter = self._limiter(broken_redis, max_requests=10)
+        limiter.is_allowed("user1")
+        assert limiter.sync(force=True) is False
+        assert limiter._buckets["user1"].pending == 1
+
+    def test_sync_without_redis_keeps_pending_tokens(self):
+        redis_client = None
+        limiter = HybridRateLimiter(
+            redis_factory=lambda: redis_client, max_requests=10, window_seconds=60, sync_interval=3600,
+        )
+        limiter.is_allowed("user1")
+        assert limiter.sync(force=True) is False
+        assert limiter._buckets["user1"].pending == 1
+
+        redis_client = FakeCounterRedis()
+        assert limiter.sync(force=True) is True
+        assert redis_client._store[limiter._get_key("user1", int(time.time() // 60))] == "1"
+
+
+# ---------------------------------------------------------------------------
+# Real Redis: atomicity of the Lua script under concurrency
+# ---------------------------------------------------------------------------
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+def real_redis():
+    import redis
+
+    client = redis.Redis.from_url(TEST_REDIS_URL, decode_responses=True, socket_connect_timeout=1)
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip(f"No Redis at {TEST_REDIS_URL}")
+    yield client
+    client.close()
+
+
+def _hammer(check, threads=16, calls_per_thread=25):
+    """Run ``check`` concurrently from many threads; return how many passed."""
+    start = threading.Barrier(threads)
+    allowed = []
+    lock = threading.Lock()
+
+    def worker():
+        start.wait()
+        passed = sum(1 for _ in range(calls_per_thread) if check())
+        with lock:
+            allowed.append(passed)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(allowed)
+
+
+class TestAtomicityWithRealRedis:
+    def test_per_identifier_limit_is_exact_under_concurrency(self, real_redis):
+        prefix = f"test_rate_limit:{uuid.uuid4().hex}"
+        limiter = RateLimiter(redis_client=real_redis, max_requests=50, window_seconds=60, key_prefix=prefix)
+        try:
+            assert _hammer(lambda: limiter.is_allowed("user1")[0]) == 50
+            allowed, retry_after = limiter.is_allowed("user1")
+            assert allowed is False
+            assert 1 <= retry_after <= 61
+            assert real_redis.zcard(f"{prefix}:user1") == 50
+        finally:
+            real_redis.delete(f"{prefix}:user1")
+
+    def test_global_limit_is_exact_under_concurrency(self, real_redis):
+        key = f"test_global_rate_limit:{uuid.uuid4().hex}"
+        limiter = GlobalRateLimiter(redis_client=real_redis, max_requests=37, window_seconds=60, key=key)
+        try:
+            assert _hammer(limiter.is_allowed) == 37
+        finally:
+            real_redis.delete(key)
+
+    def test_approximate_limit_is_exact_within_one_window(self, real_redis):
+        prefix = f"test_rate_limit:{uuid.uuid4().hex}"
+        # Long window so the test does not straddle a window boundary
+        limiter = RateLimiter(
+            redis_client=real_redis, max_requests=50, window_seconds=3600, key_prefix=prefix, mode=APPROXIMATE
+        )
+        try:
+            assert _hammer(lambda: limiter.is_allowed("user1")[0]) == 50
+            assert real_redis.type(f"{prefix}:user1:approx") == "hash"
+        finally:
+            real_redis.delete(f"{prefix}:user1:approx")
+
+    def test_hybrid_workers_stay_within_overshoot_bound(self, real_redis):
+        prefix = f"test_rate_limit:{uuid.uuid4().hex}"
+        workers = [
+            HybridRateLimiter(
+                redis_factory=lambda: real_redis, max_requests=100, window_seconds=3600,
+                key_prefix=prefix, sync_interval=0.01, local_share=0.05,
+            )
+            for _ in range(4)
+        ]
+        try:
+            counter = iter(range(10**6))
+            admitted = _hammer(lambda: workers[next(counter) % 4].is_allowed("user1")[0])
+            assert 100 <= admitted <= 100 + 4 * workers[0].capacity
+        finally:
+            for key in real_redis.scan_iter(match=f"{prefix}:*"):
+                real_redis.delete(key)
+
+    def test_one_round_trip_per_check(self, real_redis):
+        prefix = f"test_rate_limit:{uuid.uuid4().hex}"
+        limiter = RateLimiter(redis_client=real_redis, max_requests=5, window_seconds=60, key_prefix=prefix)
+        limiter.is_allowed("user1")  # loads the script on a fresh server
+        try:
+            with patch.object(real_redis, "execute_command", wraps=real_redis.execute_command) as execute:
+                limiter.is_allowed("user1")
+            assert [call.args[0] for call in execute.call_args_list] == ["EVALSHA"]
+        finally:
+            real_redis.delete(f"{prefix}:user1")
+
+    def test_window_expires_on_server_clock(self, real_redis):
+        prefix = f"test_rate_limit:{uuid.uuid4().hex}"
+        limiter = RateLimiter(redis_client=real_redis, max_requests=1, window_seconds=1, key_prefix=prefix)
+        try:
+            assert limiter.is_allowed("user1") == (True, 0)
+            assert limiter.is_allowed("user1")[0] is False
+            time.sleep(1.1)
+            assert limiter.is_allowed("user1") == (True, 0)
+        finally:
+            real_redis.delete(f"{prefix}:user1")
@@ -0,0 +1,123 @@
+"""Tests for the nightly recommendation batch runner."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.review import Review
+from app.models.user import User
+from app.services import recommendation_batch
+from app.services.recommendation_batch import (
+    CHECKPOINT_KEY,
+    BatchAlreadyRunning,
+    active_user_ids,
+    run_batch,
+)
+
+
+class FakeBatchRedis:
+    """Minimal fake Redis supporting strings and hashes."""
+
+    def __init__(self):
+        self._store: dict = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self._store:
+            return None
+        self._store[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self._store)
+
+    def delete(self, key):
+        self._store.pop(key, None)
+
+    def hgetall(self, key):
+        return dict(self._store.get(key, {}))
+
+    def hset(self, key, mapping=None):
+        self._store.setdefault(key, {}).update(mapping or {})
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeBatchRedis()
+    monkeypatch.setattr(recommendation_batch, "get_redis", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    cb = MagicMock()
+    cb.state_permits.return_value = True
+    monkeypatch.setattr(recommendation_batch, "_get_openai_circuit_breaker", lambda: cb)
+    monkeypatch.setattr(recommendation_batch, "BREAKER_POLL_INTERVAL", 0)
+    return cb
+
+
+@pytest.fixture
+def active_users(db_session: Session):
+    users = [User(name=f"Reader {i}", email=f"reader{i}@example.com", password="x") for i in range(5)]
+    db_session.add_all(users)
+    db_session.flush()
+    db_session.add_all([Review(user_id=u.id, external_book_id="vol-1", content="Good", rate=5) for u in users])
+    db_session.commit()
+    return sorted(u.id for u in users)
+
+
+def test_active_users_come_from_recent_activity(db_session: Session, active_users):
+    from datetime import datetime, timedelta, UTC
+
+    assert active_user_ids(db_session, datetime.now(UTC) - timedelta(days=1)) == active_users
+    assert active_user_ids(db_session, datetime.now(UTC) + timedelta(days=1)) == []
+
+
+@patch("app.services.recommendation_batch.generate_book_recommendations_with_usage", return_value=("recs", 100))
+def test_run_processes_every_user_and_reports_throughput(mock_generate, db_session, active_users, redis, breaker):
+    report = run_batch(db_session, concurrency=2, token_budget=10_000)
+
+    assert report["stop_reason"] == "completed"
+    assert report["users_done"] == 5
+    assert report["tokens"] == 500
+    assert report["users_per_minute"] > 0 and report["tokens_per_minute"] > 0
+    assert redis.hgetall(CHECKPOINT_KEY)["status"] == "completed"
+    assert not redis.exists(recommendation_batch.LOCK_KEY)
+
+
+@patch("app.services.recommendation_batch.generate_book_recommendations_with_usage", return_value=("recs", 100))
+def test_token_budget_pauses_and_next_run_resumes(mock_generate, db_session, active_users, redis, breaker):
+    first = run_batch(db_session, concurrency=1, token_budget=200)
+    assert first["stop_reason"] == "token_budget"
+    assert first["users_done"] == 2
+    assert int(redis.hgetall(CHECKPOINT_KEY)["low_water"]) == active_users[1]
+
+    # Each run gets the same budget afresh, not what is left of the first run's
+    second = run_batch(db_session, concurrency=1, token_budget=200)
+    assert second["stop_reason"] == "token_budget"
+    assert second["users_done"] == 4
+    assert second["tokens"] == 400
+
+    third = run_batch(db_session, concurrency=1, token_budget=200)
+    assert third["stop_reason"] == "completed"
+    assert third["users_done"] == 5
+    processed = [call.args[0][0].user_id for call in mock_generate.call_args_list]
+    assert processed == active_users
+
+
+@patch("app.services.recommendation_batch.generate_book_recommendations_with_usage", return_value=("recs", 10))
+def test_open_circuit_pauses_the_run(mock_generate, db_session, active_users, redis, breaker):
+    breaker.state_permits.return_value = False
+
+    report = run_batch(db_session, max_breaker_wait=0)
+
+    assert report["stop_reason"] == "circuit_open"
+    assert report["users_done"] == 0
+    mock_generate.assert_not_called()
+
+
+def test_concurrent_runs_are_rejected(db_session, redis, breaker):
+    redis.set(recommendation_batch.LOCK_KEY, "1")
+    with pytest.raises(BatchAlreadyRunning):
+        run_batch(db_session)
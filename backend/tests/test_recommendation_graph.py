@@ -0,0 +1,135 @@
+"""Tests for the recommendation graph wire formats (legacy vs compact)."""
+
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.recommendation_service import (
+    EDGE_STYLE_CLASSES,
+    NODE_STYLE_CLASSES,
+    _compact_graph,
+    _create_direct_similarity_edges,
+    _expand_graph_styles,
+)
+
+GENRES = [
+    "Fantasy", "Science Fiction", "Mystery", "Romance", "Horror", "Thriller",
+    "Historical Fiction", "Biography", "Young Adult", "Poetry", "Fiction", "Classics",
+]
+
+
+def _make_graph(n_books: int = 500) -> dict:
+    nodes = []
+    edges = []
+    for i in range(n_books):
+        nodes.append({
+            "id": f"book-{i}-1",
+            "position": {"x": 100 + (i % 3) * 200, "y": 100 + (i // 3) * 150},
+            "data": {"label": f"Book {i}", "author": "Author", "rating": 4, "genre": "Fantasy"},
+            "class": "book",
+        })
+        if i:
+            edges.append({
+                "id": f"edge-{i - 1}-{i}-1",
+                "source": f"book-{i - 1}-1",
+                "target": f"book-{i}-1",
+                "label": "Same Author",
+                "class": "same-author",
+            })
+    nodes.append({
+        "id": "ai-rec-0",
+        "position": {"x": 0, "y": 0},
+        "data": {"label": "Rec", "is_recommendation": True},
+        "class": "ai-recommendation",
+    })
+    return {"nodes": nodes, "edges": edges, "message": "Graph generated successfully"}
+
+
+@pytest.fixture(scope="module")
+def library_graph() -> dict:
+    """A 500-book reading list wired up by the real similarity edge builder."""
+    rng = random.Random(0)
+    user_id = 7
+    books = [
+        SimpleNamespace(
+            id=1000 + i,
+            title=f"Book {i}",
+            author=f"Author {rng.randrange(120)}",
+            genres=[SimpleNamespace(name=g) for g in rng.sample(GENRES, rng.randint(1, 3))],
+        )
+        for i in range(500)
+    ]
+    nodes = [
+        {
+            "id": f"book-{book.id}-{user_id}",
+            "position": {"x": 100 + (i % 3) * 200, "y": 100 + (i // 3) * 150},
+            "data": {
+                "label": book.title,
+                "author": book.author,
+                "rating": rng.randint(1, 5),
+                "genre": ", ".join(g.name for g in book.genres),
+            },
+            "class": "book",
+        }
+        for i, book in enumerate(books)
+    ]
+    edges = _create_direct_similarity_edges(books, [], user_id)
+    return {"nodes": nodes, "edges": edges, "message": "Graph generated successfully"}
+
+
+class TestLegacyGraphFormat:
+    def test_styles_are_inlined(self):
+        graph = _expand_graph_styles(_make_graph(3))
+
+        book = graph["nodes"][0]
+        assert "class" not in book
+        assert book["style"] == NODE_STYLE_CLASSES["book"]["style"]
+        assert graph["nodes"][-1]["style"]["background"] == "#4a0e4e"
+
+        edge = graph["edges"][0]
+        assert "class" not in edge
+        assert edge["style"] == {"stroke": "#00aaff", "strokeWidth": 3}
+        assert edge["labelStyle"]["background"] == "rgba(0, 170, 255, 0.8)"
+        assert edge["labelBgStyle"] == {"fill": "rgba(0, 170, 255, 0.8)", "fillOpacity": 0.9}
+
+    def test_ai_recommended_edge_keeps_its_label_alpha(self):
+        style = EDGE_STYLE_CLASSES["ai-recommended"]
+        assert style["labelStyle"]["background"] == "rgba(232, 121, 249, 0.9)"
+
+
+class TestCompactGraphFormat:
+    def test_legend_contains_only_used_classes(self):
+        graph = _compact_graph(_make_graph(3))
+
+        assert graph["format"] == "compact"
+        assert set(graph["legend"]["nodes"]) == {"book", "ai-recommendation"}
+        assert set(graph["legend"]["edges"]) == {"same-author"}
+        assert all("style" not in n for n in graph["nodes"])
+        assert all("labelStyle" not in e for e in graph["edges"])
+
+    def test_columnar_positions_align_with_nodes(self):
+        source = _make_graph(4)
+        graph = _compact_graph(source, columnar=True)
+
+        assert all("position" not in n for n in graph["nodes"])
+        assert graph["positions"]["x"] == [n["position"]["x"] for n in source["nodes"]]
+        assert graph["positions"]["y"] == [n["position"]["y"] for n in source["nodes"]]
+
+    def test_columnar_edges_reference_nodes_by_index(self):
+        source = _make_graph(4)
+        graph = _compact_graph(source, columnar=True)
+
+        node_ids = [n["id"] for n in graph["nodes"]]
+        assert [node_ids[i] for i in graph["edges"]["source"]] == [e["source"] for e in source["edges"]]
+        assert [node_ids[i] for i in graph["edges"]["target"]] == [e["target"] for e in source["edges"]]
+        assert graph["edges"]["class"] == ["same-author"] * 3
+        assert graph["legend"]["edges"]["same-author"]["label"] == "Same Author"
+
+    def test_columnar_payload_is_an_order_of_magnitude_smaller(self, library_graph):
+        assert len(library_graph["edges"]) > 10 * len(library_graph["nodes"])
+        legacy = json.dumps(_expand_graph_styles(library_graph))
+        compact = json.dumps(_compact_graph(library_graph, columnar=True))
+
+        assert len(compact) * 9 < len(legacy)
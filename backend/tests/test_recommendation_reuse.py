@@ -0,0 +1,132 @@
+"""Tests for MinHash/LSH reuse of recommendations across similar users."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import recommendation_reuse
+from app.services.recommendation_reuse import (
+    filter_read_recommendations,
+    find_reusable_recommendations,
+    jaccard,
+    minhash_signature,
+    store_recommendations,
+)
+
+
+class FakeReuseRedis:
+    """Minimal fake Redis supporting the sets and hashes used for reuse."""
+
+    def __init__(self):
+        self._store: dict = {}
+        self._results: list = []
+
+    def pipeline(self):
+        self._results = []
+        return self
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+    def srandmember(self, key, count):
+        self._results.append(list(self._store.get(key, set()))[:count])
+
+    def sadd(self, key, member):
+        self._store.setdefault(key, set()).add(member)
+        self._results.append(1)
+
+    def hgetall(self, key):
+        self._results.append(dict(self._store.get(key, {})))
+
+    def hset(self, key, mapping=None):
+        self._store.setdefault(key, {}).update(mapping or {})
+        self._results.append(1)
+
+    def delete(self, key):
+        self._store.pop(key, None)
+        self._results.append(1)
+
+    def expire(self, key, ttl):
+        self._results.append(True)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeReuseRedis()
+    monkeypatch.setattr(recommendation_reuse, "get_redis", lambda: fake)
+    return fake
+
+
+def _reviews(user_id, book_ids, rate=5):
+    return [SimpleNamespace(user_id=user_id, book_id=b, external_book_id=None, rate=rate, content="Good") for b in book_ids]
+
+
+def _recommendations(*ids):
+    return [
+        {
+            "book_id": int(i.split(":")[1]) if i.startswith("book:") else None,
+            "external_id": None if i.startswith("book:") else i,
+            "title": "T",
+            "authors": ["A"],
+            "description": "D",
+            "genres": [],
+            "reasoning": "R",
+            "score": None,
+        }
+        for i in ids
+    ]
+
+
+def _ids(recommendations):
+    return [r["external_id"] or f"book:{r['book_id']}" for r in recommendations]
+
+
+class TestMinHash:
+    def test_signature_agreement_estimates_jaccard(self):
+        a = {f"book:{i}" for i in range(40)}
+        b = {f"book:{i}" for i in range(10, 50)}
+        sig_a, sig_b = minhash_signature(a), minhash_signature(b)
+        estimate = sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+        assert estimate == pytest.approx(jaccard(a, b), abs=0.15)
+
+    def test_filter_drops_read_books(self):
+        kept = filter_read_recommendations(_recommendations("g1", "book:7", "g3"), {"book:7"})
+        assert _ids(kept) == ["g1", "g3"]
+
+
+class TestReuse:
+    def test_similar_user_reuses_filtered_recommendations(self, redis):
+        store_recommendations(1, _reviews(1, range(1, 11)), _recommendations("g1", "book:11", "g3", "g4"))
+
+        reused = find_reusable_recommendations(2, _reviews(2, [*range(1, 10), 11]))
+
+        assert _ids(reused) == ["g1", "g3", "g4"]
+
+    def test_dissimilar_user_gets_nothing(self, redis):
+        store_recommendations(1, _reviews(1, range(1, 11)), _recommendations("g1", "g2", "g3"))
+        assert find_reusable_recommendations(2, _reviews(2, range(100, 110))) is None
+
+    def test_too_few_left_after_filtering(self, redis):
+        store_recommendations(1, _reviews(1, range(1, 11)), _recommendations("g1", "book:11", "book:12"))
+        assert find_reusable_recommendations(2, _reviews(2, [*range(1, 10), 11, 12])) is None
+
+    def test_low_ratings_do_not_form_a_profile(self, redis):
+        store_recommendations(1, _reviews(1, range(1, 11), rate=2), _recommendations("g1", "g2", "g3"))
+        assert redis._store == {}
+
+
+@patch("app.services.recommendation_service.get_cached_recommendations", return_value=None)
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+@patch("app.services.recommendation_service.llm")
+def test_reuse_skips_the_llm_call(mock_llm, mock_cb, mock_cache, redis):
+    from app.services.recommendation_service import generate_book_recommendations
+
+    mock_cb.return_value.state_permits.return_value = True
+    store_recommendations(1, _reviews(1, range(1, 6)), _recommendations("g1", "g2", "g3"))
+
+    result = generate_book_recommendations(_reviews(2, range(1, 6)))
+
+    assert _ids(result) == ["g1", "g2", "g3"]
+    mock_llm.assert_not_called()
@@ -0,0 +1,94 @@
+"""Tests for the shared Redis client and its health tracking."""
+
+import asyncio
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+
+from app.core import redis as redis_module
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Install a mock client and reset the health state around each test."""
+    client = MagicMock()
+    monkeypatch.setattr(redis_module, "_redis_client", client)
+    monkeypatch.setattr(redis_module, "_healthy", None)
+    monkeypatch.setattr(redis_module, "_failures", 0)
+    monkeypatch.setattr(redis_module, "_next_attempt_at", 0.0)
+    return client
+
+
+class TestGetRedis:
+    def test_first_call_pings_once_then_never_again(self, fake_client):
+        for _ in range(5):
+            assert redis_module.get_redis() is fake_client
+        assert fake_client.ping.call_count == 1
+
+    def test_unreachable_redis_returns_none_without_retrying_during_backoff(self, fake_client):
+        fake_client.ping.side_effect = redis.ConnectionError("refused")
+
+        assert redis_module.get_redis() is None
+        assert redis_module.get_redis() is None
+        assert fake_client.ping.call_count == 1
+        assert redis_module._next_attempt_at > time.monotonic()
+
+    def test_reconnects_once_backoff_expires(self, fake_client, monkeypatch):
+        fake_client.ping.side_effect = redis.ConnectionError("refused")
+        assert redis_module.get_redis() is None
+
+        fake_client.ping.side_effect = None
+        monkeypatch.setattr(redis_module, "_next_attempt_at", time.monotonic() - 1)
+
+        assert redis_module.get_redis() is fake_client
+        assert redis_module._failures == 0
+
+    def test_backoff_grows_and_is_capped(self, monkeypatch):
+        monkeypatch.setattr(redis_module.settings, "REDIS_RECONNECT_BACKOFF_MAX", 4.0)
+        monkeypatch.setattr(redis_module.random, "uniform", lambda a, b: 1.0)
+        assert [redis_module._backoff(n) for n in (1, 2, 3, 4, 10)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+    def test_reported_connection_error_marks_redis_down(self, fake_client):
+        assert redis_module.get_redis() is fake_client
+
+        redis_module.report_redis_error(redis.TimeoutError("timed out"))
+
+        assert redis_module.get_redis() is None
+        assert fake_client.ping.call_count == 1
+
+    def test_other_errors_do_not_mark_redis_down(self, fake_client):
+        assert redis_module.get_redis() is fake_client
+        redis_module.report_redis_error(redis.ResponseError("WRONGTYPE"))
+        assert redis_module.get_redis() is fake_client
+
+
+def test_async_client_against_real_redis(monkeypatch):
+    probe = redis.Redis.from_url(TEST_REDIS_URL, socket_connect_timeout=0.5)
+    try:
+        probe.ping()
+    except redis.ConnectionError:
+        pytest.skip(f"Redis not available at {TEST_REDIS_URL}")
+    finally:
+        probe.close()
+
+    monkeypatch.setattr(redis_module.settings, "REDIS_URL", TEST_REDIS_URL)
+    monkeypatch.setattr(redis_module, "_pool", None)
+    monkeypatch.setattr(redis_module, "_redis_client", None)
+    monkeypatch.setattr(redis_module, "_async_client", None)
+    monkeypatch.setattr(redis_module, "_healthy", None)
+
+    async def roundtrip():
+        client = redis_module.get_async_redis()
+        try:
+            await client.set("test_redis:async", "ok", ex=5)
+            return await client.get("test_redis:async")
+        finally:
+            await redis_module.close_redis()
+
+    assert asyncio.run(roundtrip()) == "ok"
+    assert redis_module.get_redis().get("test_redis:async") == "ok"
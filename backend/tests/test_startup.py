@@ -0,0 +1,65 @@
+"""Startup-time gate: importing the app must stay cheap and key-independent."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous default for CI runners; tighten locally via the env var
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", 3.0))
+
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_openai", "openai", "PIL", "fastapi_mail", "numpy"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY_MODULES,)
+
+
+def _import_app(**env_overrides):
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env.update(env_overrides)
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture(scope="module")
+def cold_import():
+    # Best of three to keep scheduler noise out of the measurement
+    return min((_import_app() for _ in range(3)), key=lambda r: r["seconds"])
+
+
+def test_app_boots_without_openai_key(cold_import):
+    assert cold_import["seconds"] > 0
+
+
+def test_heavy_subsystems_are_not_imported_at_startup(cold_import):
+    assert cold_import["modules"] == []
+
+
+def test_import_time_within_budget(cold_import):
+    assert cold_import["seconds"] < IMPORT_BUDGET_SECONDS, (
+        f"importing app.main took {cold_import['seconds']:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)"
+    )
+
+
+def test_startup_profile_reports_modules_and_first_request():
+    from app.startup_profile import profile_first_request, profile_imports
+
+    modules = profile_imports(top=10)
+    assert modules[0]["module"] == "app.main"
+
+    timing = profile_first_request("/docs")
+    assert timing["status"] == 200
+    assert timing["time_to_first_request_seconds"] >= timing["import_seconds"]
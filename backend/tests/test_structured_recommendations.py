@@ -0,0 +1,101 @@
+"""Tests for JSON-mode LLM recommendations parsed once and cached as objects."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.metrics import get_counters, reset_counters
+from app.services import recommendation_service
+from app.services.recommendation_service import parse_llm_recommendations
+
+CANDIDATES = [
+    {"external_id": "vol-1", "book_id": None, "title": "Dune", "authors": ["Frank Herbert"], "categories": ["Science Fiction"]},
+    {"external_id": "book:7", "book_id": 7, "title": "Emma", "authors": ["Jane Austen"], "categories": ["Classics"]},
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    reset_counters()
+    monkeypatch.setattr(recommendation_service, "_recommendations_cache", {})
+    monkeypatch.setattr(recommendation_service, "get_redis", lambda: None)
+    yield
+    reset_counters()
+
+
+def _response(*recommendations):
+    return json.dumps({"recommendations": list(recommendations)})
+
+
+class TestParse:
+    def test_maps_recommendations_onto_candidates(self):
+        content = _response(
+            {"id": "vol-1", "title": "Dune", "authors": "Frank Herbert", "reasoning": "Epic scope"},
+            {"id": "book:7", "title": "Emma", "authors": ["Jane Austen"]},
+        )
+        parsed = parse_llm_recommendations(content, CANDIDATES)
+
+        assert parsed[0] == {
+            "book_id": None,
+            "external_id": "vol-1",
+            "title": "Dune",
+            "authors": ["Frank Herbert"],
+            "description": "",
+            "genres": ["Science Fiction"],
+            "reasoning": "Epic scope",
+            "score": None,
+        }
+        assert (parsed[1]["book_id"], parsed[1]["external_id"]) == (7, None)
+
+    def test_code_fenced_json_is_accepted(self):
+        content = "```json\n" + _response({"id": "vol-1", "title": "Dune"}) + "\n```"
+        assert [r["external_id"] for r in parse_llm_recommendations(content, CANDIDATES)] == ["vol-1"]
+
+    @pytest.mark.parametrize("content", [
+        "ID: vol-1\nTitle: Dune",
+        '{"recommendations": [{"title": "Dune"}]}',
+        '{"recommendations": "Dune"}',
+    ])
+    def test_malformed_response_is_counted(self, content):
+        assert parse_llm_recommendations(content, CANDIDATES) is None
+        assert get_counters()["llm.malformed_responses"] == 1
+
+    def test_unknown_ids_are_dropped(self):
+        content = _response({"id": "made-up", "title": "Nope"}, {"id": "vol-1", "title": "Dune"})
+        assert [r["external_id"] for r in parse_llm_recommendations(content, CANDIDATES)] == ["vol-1"]
+        assert get_counters()["llm.unknown_recommendation_ids"] == 1
+
+
+@patch("app.services.recommendation_service.find_reusable_recommendations", return_value=None)
+@patch("app.services.recommendation_service.store_recommendations")
+@patch("app.services.recommendation_service.get_candidates", return_value=CANDIDATES)
+@patch("app.services.recommendation_service._get_openai_circuit_breaker")
+@patch("app.services.recommendation_service.llm")
+class TestGenerate:
+    def _reviews(self):
+        return [SimpleNamespace(user_id=1, book_id=2, external_book_id=None, rate=5, content="Loved it")]
+
+    def test_parsed_objects_are_cached_for_later_calls(self, mock_llm, mock_cb, *_):
+        mock_cb.return_value.state_permits.return_value = True
+        mock_llm.return_value = MagicMock(content=_response({"id": "vol-1", "title": "Dune"}))
+
+        first = recommendation_service.generate_book_recommendations(self._reviews())
+        second = recommendation_service.generate_book_recommendations(self._reviews())
+
+        assert second == first
+        assert mock_llm.call_count == 1
+        assert mock_llm.call_args.kwargs["json_mode"] is True
+
+    def test_malformed_response_is_not_cached(self, mock_llm, mock_cb, *_):
+        mock_cb.return_value.state_permits.return_value = True
+        mock_llm.return_value = MagicMock(content="not json")
+
+        assert recommendation_service.generate_book_recommendations(self._reviews()) == []
+        assert recommendation_service.generate_book_recommendations(self._reviews()) == []
+
+        assert mock_llm.call_count == 2
+        assert get_counters()["llm.malformed_responses"] == 2
+        # A well-formed but unusable answer is not an outage
+        mock_cb.return_value.record_failure.assert_not_called()
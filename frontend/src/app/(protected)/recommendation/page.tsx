@@ -20,6 +20,16 @@ interface BookRecommendation {
   reasoning: string;
 }
 
+interface LocalRecommendations {
+  strategy: string;
+  recommendations: (Omit<BookRecommendation, 'title' | 'description' | 'external_id'> & {
+    book_id: number | null;
+    external_id: string | null;
+    title: string | null;
+    description: string | null;
+  })[];
+}
+
 export default function RecommendationPage() {
   const user = useAuthStore((state) => state.user);
   const [loadingRecommendations, setLoadingRecommendations] = useState(false);
@@ -105,11 +115,23 @@ export default function RecommendationPage() {
       setLoadingRecommendations(true);
 
       try {
-        const rec = await apiFetchFull<string>('/recommendations', {
+        const rec = await apiFetchFull<string | LocalRecommendations>('/recommendations', {
           noCache: true,
         });
 
-        if (rec?.data) {
+        if (rec?.data && typeof rec.data !== 'string') {
+          const local = rec.data.recommendations
+            .filter((book) => book.title || book.external_id)
+            .map((book) => ({
+              external_id: book.external_id ?? '',
+              title: book.title ?? book.external_id ?? '',
+              authors: book.authors,
+              description: book.description ?? '',
+              reasoning: book.reasoning,
+            }));
+          setParsedRecommendations(local);
+          setUnavailableMessage(local.length === 0 ? rec.message ?? null : null);
+        } else if (rec?.data) {
           setUnavailableMessage(null);
           const cleanText = rec.data
             .replace(/[*_~`>#-]/g, '')